@@ -0,0 +1,430 @@
+"""
+Asyncio support: a proxy whose remote method calls are coroutines, to be used from within an asyncio event loop.
+
+Pyro - Python Remote Objects.  Copyright by Irmen de Jong (irmen@razorvine.net).
+"""
+
+import asyncio
+import logging
+from . import config, core, serializers, protocol, errors, socketutil
+from .callcontext import current_context
+
+
+log = logging.getLogger("Pyro5.aio")
+
+__all__ = ["Proxy"]
+
+
+class Proxy(object):
+    """
+    Asyncio Pyro proxy for a remote object. It speaks the same wire protocol as the regular
+    :class:`Pyro5.client.Proxy` but it doesn't block: remote methods return awaitables,
+    and remote iterators and generators are returned as async iterators.
+    Remote attributes can be read with ``await proxy.attribute``, use :meth:`_pyroSetAttr` to change them.
+
+    Any number of calls can be outstanding at the same time on the single connection of the proxy
+    (replies are matched with their calls by sequence number), so many tasks can share one proxy.
+    The proxy must only be used from the event loop that it was connected in.
+
+    .. automethod:: _pyroBind
+    .. automethod:: _pyroRelease
+    .. automethod:: _pyroInvoke
+    .. automethod:: _pyroSetAttr
+    .. automethod:: _pyroValidateHandshake
+    .. attribute:: _pyroTimeout
+
+        The timeout in seconds for connecting and for every call on this proxy. Defaults to ``config.COMMTIMEOUT``.
+
+    .. attribute:: _pyroSerializer
+
+        Name of the serializer to use by this proxy, allows you to override the default setting.
+
+    .. attribute:: _pyroHandshake
+
+        The data object that should be sent in the initial connection handshake message. Can be any serializable object.
+    """
+    __pyroAttributes = frozenset(
+        ["__getnewargs__", "__getnewargs_ex__", "__getinitargs__", "_pyroConnection", "_pyroUri",
+         "_pyroOneway", "_pyroMethods", "_pyroAttrs", "_pyroTimeout", "_pyroSeq", "_pyroLocalSocket",
+         "_pyroHandshake", "_pyroSerializer",
+         "_Proxy__pyroReader", "_Proxy__pyroPending", "_Proxy__pyroConnectLock"])
+
+    def __init__(self, uri):
+        if isinstance(uri, str):
+            uri = core.URI(uri)
+        elif not isinstance(uri, core.URI):
+            raise TypeError("expected Pyro URI")
+        self._pyroUri = uri
+        self._pyroConnection = None  # the asyncio StreamWriter of the connection
+        self._pyroSerializer = None  # can be set to the name of a serializer to override the global one per-proxy
+        self._pyroMethods = set()  # all methods of the remote object, gotten from meta-data
+        self._pyroAttrs = set()  # attributes of the remote object, gotten from meta-data
+        self._pyroOneway = set()  # oneway-methods of the remote object, gotten from meta-data
+        self._pyroSeq = 0  # message sequence number
+        self._pyroHandshake = "hello"  # the data object that should be sent in the initial connection handshake message
+        self._pyroTimeout = config.COMMTIMEOUT
+        self._pyroLocalSocket = None
+        self.__pyroReader = None  # the task that reads the replies from the connection
+        self.__pyroPending = {}  # seq -> future waiting for the reply message
+        self.__pyroConnectLock = asyncio.Lock()
+        if config.SERIALIZER not in serializers.serializers:
+            raise ValueError("unknown serializer configured")
+
+    def __del__(self):
+        try:
+            self._pyroRelease()
+        except Exception:
+            pass
+
+    def __getattr__(self, name):
+        if name in Proxy.__pyroAttributes:
+            # allows it to be safely pickled
+            raise AttributeError(name)
+        if (self._pyroMethods or self._pyroAttrs) and name not in self._pyroMethods and name not in self._pyroAttrs:
+            # client side check if the requested attr actually exists
+            raise AttributeError("remote object '%s' has no exposed attribute or method '%s'" % (self._pyroUri, name))
+        return _AsyncRemoteMethod(self, name)
+
+    def __setattr__(self, name, value):
+        if name in Proxy.__pyroAttributes:
+            return super(Proxy, self).__setattr__(name, value)  # one of the special pyro attributes
+        raise AttributeError("can't set remote attribute '%s' without awaiting, use _pyroSetAttr() instead" % name)
+
+    def __repr__(self):
+        connected = "connected" if self._pyroConnection else "not connected"
+        return "<%s.%s at 0x%x; %s; for %s>" % (self.__class__.__module__, self.__class__.__name__,
+                                                id(self), connected, self._pyroUri)
+
+    def __getstate__(self):
+        # make sure a tuple of just primitive types are used to allow for proper serialization
+        return str(self._pyroUri), tuple(self._pyroOneway), tuple(self._pyroMethods), \
+               tuple(self._pyroAttrs), self._pyroHandshake, self._pyroSerializer
+
+    def __setstate__(self, state):
+        self.__init__(state[0])
+        self._pyroOneway = set(state[1])
+        self._pyroMethods = set(state[2])
+        self._pyroAttrs = set(state[3])
+        self._pyroHandshake = state[4]
+        self._pyroSerializer = state[5]
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self._pyroRelease()
+
+    def __eq__(self, other):
+        if other is self:
+            return True
+        return isinstance(other, Proxy) and other._pyroUri == self._pyroUri
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        return hash(self._pyroUri)
+
+    def __dir__(self):
+        result = dir(self.__class__) + list(self.__dict__.keys())
+        return sorted(set(result) | self._pyroMethods | self._pyroAttrs)
+
+    def _pyroRelease(self):
+        """release the connection to the pyro daemon"""
+        writer, self._pyroConnection = self._pyroConnection, None
+        if writer is not None:
+            writer.close()  # the reader task stops by itself and fails the calls that are still waiting
+            log.debug("connection released")
+
+    async def _pyroBind(self):
+        """
+        Bind this proxy to the exact object from the uri. That means that the proxy's uri
+        will be updated with a direct PYRO uri, if it isn't one yet.
+        If the proxy is already bound, it will not bind again.
+        Returns true if a new connection was made, false if an existing one was already present.
+        """
+        async with self.__pyroConnectLock:
+            if self._pyroConnection is not None:
+                return False  # already connected
+            uri = self._pyroUri
+            if uri.protocol != "PYRO":
+                # a name server lookup is needed, that is done by regular blocking code
+                uri = await asyncio.get_running_loop().run_in_executor(None, core.resolve, uri)
+            try:
+                await asyncio.wait_for(self.__pyroConnectAndHandshake(uri), self._pyroTimeout or None)
+            except asyncio.TimeoutError:
+                raise errors.TimeoutError("connecting: timeout") from None
+            self._pyroUri = uri
+            if not self._pyroMethods and not self._pyroAttrs:
+                metadata = await self._pyroInvoke("get_metadata", [uri.object], {}, objectId=core.DAEMON_NAME)
+                self.__processMetadata(metadata)
+            return True
+
+    async def __pyroConnectAndHandshake(self, uri):
+        log.debug("connecting to %s", uri)
+        connect_location = uri.sockname or (uri.host, uri.port)
+        writer = None
+        try:
+            if config.SSL:
+                sslContext = socketutil.get_ssl_context(clientcert=config.SSL_CLIENTCERT,
+                                                        clientkey=config.SSL_CLIENTKEY,
+                                                        keypassword=config.SSL_CLIENTKEYPASSWD,
+                                                        cacerts=config.SSL_CACERTS)
+            else:
+                sslContext = None
+            if uri.sockname:
+                reader, writer = await asyncio.open_unix_connection(uri.sockname, ssl=sslContext)
+            else:
+                reader, writer = await asyncio.open_connection(uri.host, uri.port, ssl=sslContext)
+            # Do handshake.
+            serializer = serializers.serializers[self._pyroSerializer or config.SERIALIZER]
+            data = serializer.dumps({"handshake": self._pyroHandshake, "object": uri.object})
+            msg = protocol.SendingMessage(protocol.MSG_CONNECT, 0, self._pyroSeq, serializer.serializer_id,
+                                          data, annotations=current_context.annotations)
+            if config.LOGWIRE:
+                protocol.log_wiredata(log, "proxy connect sending", msg)
+            writer.writelines(msg.chunks)
+            await writer.drain()
+            msg = await _recv_message(reader, [protocol.MSG_CONNECTOK, protocol.MSG_CONNECTFAIL])
+            if config.LOGWIRE:
+                protocol.log_wiredata(log, "proxy connect response received", msg)
+        except Exception as x:
+            if writer:
+                writer.close()
+            err = "cannot connect to %s: %s" % (connect_location, x)
+            log.error(err)
+            if isinstance(x, errors.CommunicationError):
+                raise
+            else:
+                raise errors.CommunicationError(err) from x
+        handshake_response = "?"
+        if msg.data:
+            serializer = serializers.serializers_by_id[msg.serializer_id]
+            handshake_response = serializer.loads(msg.data)
+        if msg.type == protocol.MSG_CONNECTFAIL:
+            error = "connection to %s rejected: %s" % (connect_location, handshake_response)
+            writer.close()
+            log.error(error)
+            raise errors.CommunicationError(error)
+        self.__processMetadata(handshake_response["meta"])
+        try:
+            self._pyroValidateHandshake(handshake_response["handshake"])
+        except Exception:
+            writer.close()
+            raise
+        self._pyroConnection = writer
+        self._pyroLocalSocket = writer.get_extra_info("sockname")
+        self.__pyroPending = {}   # every connection gets its own, because the reader of an old connection clears it
+        self.__pyroReader = asyncio.ensure_future(self.__pyroReadReplies(reader, writer, self.__pyroPending))
+        log.debug("connected to %s - %s", uri, "SSL" if sslContext else "unencrypted")
+        if msg.annotations:
+            current_context.response_annotations = msg.annotations
+
+    async def __pyroReadReplies(self, reader, writer, pending):
+        """reads the reply messages from the connection and hands them to the calls that are waiting for them"""
+        try:
+            while True:
+                msg = await _recv_message(reader, [protocol.MSG_RESULT])
+                if config.LOGWIRE:
+                    protocol.log_wiredata(log, "proxy wiredata received", msg)
+                reply = pending.pop(msg.seq, None)
+                if reply is None:
+                    log.debug("discarding reply for seq %d, nobody is waiting for it", msg.seq)
+                elif not reply.done():
+                    reply.set_result(msg)
+        except Exception as x:
+            error = x if isinstance(x, errors.CommunicationError) else errors.ConnectionClosedError("connection broken: %s" % x)
+            if not isinstance(x, errors.ConnectionClosedError):
+                log.warning("error reading replies: %s", x)
+        except asyncio.CancelledError:
+            error = errors.ConnectionClosedError("connection closed")
+        writer.close()
+        if self._pyroConnection is writer:
+            self._pyroConnection = None
+        for reply in pending.values():
+            if not reply.done():
+                reply.set_exception(error)
+        pending.clear()
+
+    async def _pyroInvoke(self, methodname, vargs, kwargs, flags=0, objectId=None):
+        """perform the remote method call communication"""
+        if self._pyroConnection is None:
+            await self._pyroBind()
+        current_context.response_annotations = {}
+        serializer = serializers.serializers[self._pyroSerializer or config.SERIALIZER]
+        data = serializer.dumpsCall(objectId or self._pyroUri.object, methodname, vargs, kwargs)
+        if methodname in self._pyroOneway:
+            flags |= protocol.FLAGS_ONEWAY
+        self._pyroSeq = (self._pyroSeq + 1) & 0xffff
+        msg = protocol.SendingMessage(protocol.MSG_INVOKE, flags, self._pyroSeq, serializer.serializer_id, data,
+                                      annotations=current_context.annotations)
+        if config.LOGWIRE:
+            protocol.log_wiredata(log, "proxy wiredata sending", msg)
+        seq = msg.seq
+        reply = None
+        if not flags & protocol.FLAGS_ONEWAY:
+            if seq in self.__pyroPending:
+                raise errors.PyroError("too many calls in flight on this connection")
+            reply = self.__pyroPending[seq] = asyncio.get_running_loop().create_future()
+        writer = self._pyroConnection
+        if writer is None:
+            raise errors.ConnectionClosedError("the connection of this proxy has been closed")
+        try:
+            writer.writelines(msg.chunks)
+            del msg
+            await writer.drain()
+            if reply is None:
+                return None  # oneway call, no response data
+            msg = await asyncio.wait_for(reply, self._pyroTimeout or None)
+        except asyncio.TimeoutError:
+            raise errors.TimeoutError("receiving: timeout") from None
+        except OSError as x:
+            # connection got closed while sending
+            self._pyroRelease()
+            raise errors.ConnectionClosedError("sending: connection lost: %s" % x) from x
+        finally:
+            if reply is not None and self.__pyroPending.get(seq) is reply:
+                del self.__pyroPending[seq]  # the reply will be discarded when it arrives after all
+        return self.__pyroProcessResponse(msg, serializer)
+
+    async def _pyroSetAttr(self, name, value):
+        """set the value of a remote attribute"""
+        if self._pyroConnection is None:
+            await self._pyroBind()
+        if name not in self._pyroAttrs:
+            raise AttributeError("remote object '%s' has no exposed attribute '%s'" % (self._pyroUri, name))
+        await self._pyroInvoke("__setattr__", (name, value), None)
+
+    def _pyroValidateHandshake(self, response):
+        """
+        Process and validate the initial connection handshake response data received from the daemon.
+        Simply return without error if everything is ok.
+        Raise an exception if something is wrong and the connection should not be made.
+        """
+        return
+
+    def __pyroProcessResponse(self, msg, serializer):
+        if msg.serializer_id != serializer.serializer_id:
+            error = "invalid serializer in response: %d" % msg.serializer_id
+            log.error(error)
+            raise errors.SerializeError(error)
+        if msg.annotations:
+            current_context.response_annotations = msg.annotations
+        data = serializer.loads(msg.data)
+        if msg.flags & protocol.FLAGS_ITEMSTREAMRESULT:
+            streamId = bytes(msg.annotations.get("STRM", b"")).decode()
+            if not streamId:
+                raise errors.ProtocolError("result of call is an iterator, but the server is not configured to allow streaming")
+            return _AsyncStreamResultIterator(streamId, self)
+        if msg.flags & protocol.FLAGS_EXCEPTION:
+            if isinstance(data, StopIteration):
+                # a coroutine can't raise StopIteration (PEP 479). It signals the end of a remote iterator.
+                raise StopAsyncIteration(*data.args)
+            try:
+                raise data  # if you see this in your traceback, you should probably inspect the remote traceback as well
+            finally:
+                del data
+        else:
+            return data
+
+    def __processMetadata(self, metadata):
+        if not metadata:
+            return
+        self._pyroOneway = set(metadata["oneway"])
+        self._pyroMethods = set(metadata["methods"])
+        self._pyroAttrs = set(metadata["attrs"])
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("from meta: methods=%s, oneway methods=%s, attributes=%s",
+                      sorted(self._pyroMethods), sorted(self._pyroOneway), sorted(self._pyroAttrs))
+        if not self._pyroMethods and not self._pyroAttrs:
+            raise errors.PyroError("remote object '%s' doesn't expose any methods or attributes. "
+                                   "Did you forget setting @expose on them?" % self._pyroUri)
+
+
+async def _recv_message(reader, accepted_msgtypes=None):
+    """Receives a pyro message from an asyncio stream reader. The asyncio counterpart of protocol.recv_stub."""
+    try:
+        header = await reader.readexactly(protocol._header_size)
+        protocol.ReceivingMessage.validate(header)
+        msg = protocol.ReceivingMessage(header)
+        if accepted_msgtypes and msg.type not in accepted_msgtypes:
+            err = "invalid msg type {:d} received (expected: {:s})".format(msg.type, ",".join(str(t) for t in accepted_msgtypes))
+            log.error(err)
+            exc = errors.ProtocolError(err)
+            exc.pyroMsg = msg
+            raise exc
+        payload = await reader.readexactly(msg.annotations_size + msg.data_size)
+    except asyncio.IncompleteReadError as x:
+        err = errors.ConnectionClosedError("receiving: not enough data")
+        err.partialData = x.partial
+        raise err from None
+    except OSError as x:
+        raise errors.ConnectionClosedError("receiving: connection lost: %s" % x) from x
+    msg.add_payload(payload)
+    return msg
+
+
+class _AsyncRemoteMethod(object):
+    """
+    Method call abstraction for the asyncio proxy. Calling it returns a coroutine for the remote call.
+    Awaiting it directly (without calling) obtains the value of the remote attribute with that name instead.
+    """
+
+    def __init__(self, proxy, name):
+        self.__proxy = proxy
+        self.__name = name
+
+    def __getattr__(self, name):
+        return _AsyncRemoteMethod(self.__proxy, "%s.%s" % (self.__name, name))
+
+    async def __call__(self, *args, **kwargs):
+        proxy = self.__proxy
+        if proxy._pyroConnection is None:
+            await proxy._pyroBind()
+        if self.__name not in proxy._pyroMethods:
+            raise AttributeError("remote object '%s' has no exposed method '%s'" % (proxy._pyroUri, self.__name))
+        return await proxy._pyroInvoke(self.__name, args, kwargs)
+
+    def __await__(self):
+        return self.__getattr().__await__()
+
+    async def __getattr(self):
+        proxy = self.__proxy
+        if proxy._pyroConnection is None:
+            await proxy._pyroBind()
+        if self.__name not in proxy._pyroAttrs:
+            raise AttributeError("remote object '%s' has no exposed attribute '%s'" % (proxy._pyroUri, self.__name))
+        return await proxy._pyroInvoke("__getattr__", (self.__name,), None)
+
+
+class _AsyncStreamResultIterator(object):
+    """
+    Pyro returns this as a result of a remote call on an asyncio proxy which returns an iterator or generator.
+    It is an async iterable that produces elements on demand from the remote iterator: use it with ``async for``.
+    """
+    def __init__(self, streamId, proxy):
+        self.streamId = streamId
+        self.proxy = proxy
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.proxy is None:
+            raise StopAsyncIteration
+        if self.proxy._pyroConnection is None:
+            raise errors.ConnectionClosedError("the proxy for this stream result has been closed")
+        try:
+            return await self.proxy._pyroInvoke("get_next_stream_item", [self.streamId], {}, objectId=core.DAEMON_NAME)
+        except StopAsyncIteration:
+            # when the iterator is exhausted, the proxy is removed to avoid unneeded close_stream calls later
+            # (the server has closed its part of the stream by itself already)
+            self.proxy = None
+            raise
+
+    async def aclose(self):
+        """stop the iteration, and tell the server to close the remote iterator"""
+        if self.proxy and self.proxy._pyroConnection is not None:
+            await self.proxy._pyroInvoke("close_stream", [self.streamId], {},
+                                         flags=protocol.FLAGS_ONEWAY, objectId=core.DAEMON_NAME)
+        self.proxy = None
@@ -6,9 +6,12 @@ Pyro - Python Remote Objects.  Copyright by Irmen de Jong (irmen@razorvine.net).
 
 import sys
 import time
+import collections
 import logging
+import threading
 import serpent
 import contextlib
+import concurrent.futures
 from . import config, core, serializers, protocol, errors, socketutil
 from .callcontext import current_context
 try:
@@ -50,12 +53,21 @@ class Proxy(object):
         for IPV4 connections it is the familiar (hostname, port) tuple.
         Consult the Python documentation on `socket families <https://docs.python.org/3/library/socket.html#socket-families>`_
         for more details
+
+    .. attribute:: _pyroPipelined
+
+        Set this to True (before the proxy connects) to allow multiple calls to be in flight at the same time
+        on the single connection of this proxy. The proxy can then be shared among threads, and replies are
+        matched with their calls by sequence number. Also see :meth:`_pyroSubmit`.
+
+    .. automethod:: _pyroSubmit
     """
     __pyroAttributes = frozenset(
         ["__getnewargs__", "__getnewargs_ex__", "__getinitargs__", "_pyroConnection", "_pyroUri",
          "_pyroOneway", "_pyroMethods", "_pyroAttrs", "_pyroTimeout", "_pyroSeq", "_pyroLocalSocket",
-         "_pyroRawWireResponse", "_pyroHandshake", "_pyroMaxRetries", "_pyroSerializer",
-         "_Proxy__pyroTimeout", "_Proxy__pyroOwnerThread"])
+         "_pyroRawWireResponse", "_pyroHandshake", "_pyroMaxRetries", "_pyroSerializer", "_pyroPipelined",
+         "_Proxy__pyroTimeout", "_Proxy__pyroOwnerThread", "_Proxy__pyroPipeline", "_Proxy__pyroPipelineLock",
+         "_Proxy__pyroChunks"])
 
     def __init__(self, uri, connected_socket=None):
         if connected_socket:
@@ -76,6 +88,10 @@ class Proxy(object):
         self._pyroMaxRetries = config.MAX_RETRIES
         self.__pyroTimeout = config.COMMTIMEOUT
         self.__pyroOwnerThread = get_ident()     # the thread that owns this proxy
+        self._pyroPipelined = False  # allow multiple calls in flight (from multiple threads) on the connection?
+        self.__pyroPipeline = None   # the reader that dispatches the replies, in pipelined mode
+        self.__pyroPipelineLock = threading.RLock()
+        self.__pyroChunks = None     # the reader of the chunked data of the last result, if any
         if config.SERIALIZER not in serializers.serializers:
             raise ValueError("unknown serializer configured")
         # note: we're not clearing the client annotations dict here.
@@ -144,6 +160,10 @@ class Proxy(object):
         self._pyroSeq = 0
         self._pyroRawWireResponse = False
         self.__pyroOwnerThread = get_ident()
+        self._pyroPipelined = False
+        self.__pyroPipeline = None
+        self.__pyroPipelineLock = threading.RLock()
+        self.__pyroChunks = None
 
     def __copy__(self):
         p = object.__new__(type(self))
@@ -151,6 +171,7 @@ class Proxy(object):
         p._pyroTimeout = self._pyroTimeout
         p._pyroRawWireResponse = self._pyroRawWireResponse
         p._pyroMaxRetries = self._pyroMaxRetries
+        p._pyroPipelined = self._pyroPipelined
         return p
 
     def __enter__(self):
@@ -204,6 +225,8 @@ class Proxy(object):
             self._pyroConnection.close()
             self._pyroConnection = None
             self._pyroLocalSocket = None
+            self.__pyroPipeline = None     # its reader thread stops by itself because the connection is closed
+            self.__pyroChunks = None
 
     def _pyroBind(self):
         """
@@ -218,7 +241,7 @@ class Proxy(object):
 
     def __pyroSetTimeout(self, timeout):
         self.__pyroTimeout = timeout
-        if self._pyroConnection is not None:
+        if self._pyroConnection is not None and self.__pyroPipeline is None:
             self._pyroConnection.timeout = timeout
 
     _pyroTimeout = property(__pyroGetTimeout, __pyroSetTimeout, doc="""
@@ -230,26 +253,36 @@ class Proxy(object):
         """perform the remote method call communication"""
         self.__check_owner()
         current_context.response_annotations = {}
+        vargs, kwargs, chunked = protocol.detach_chunked_data(vargs, kwargs)
+        if self._pyroPipelined:
+            if chunked:
+                raise errors.PyroError("chunked data can't be sent by a pipelined proxy")
+            reply, serializer = self.__pyroSendPipelined(methodname, vargs, kwargs, flags, objectId)
+            if reply is None:
+                return None  # oneway call, no response data
+            try:
+                msg = reply.result(self.__pyroTimeout or None)
+            except concurrent.futures.TimeoutError:
+                # stop waiting for it, the reply will be discarded when it arrives. The connection remains usable.
+                reply.cancel()
+                raise errors.TimeoutError("receiving: timeout")
+            except errors.CommunicationError:
+                self.__pyroReleasePipeline(reply.connection)
+                raise
+            return self.__pyroProcessResponse(msg, serializer)
+        if self.__pyroChunks is not None:
+            self.__pyroDrainChunks()
         if self._pyroConnection is None:
             self.__pyroCreateConnection()
-        serializer = serializers.serializers[self._pyroSerializer or config.SERIALIZER]
-        objectId = objectId or self._pyroConnection.objectId
-        annotations = current_context.annotations
-        if vargs and isinstance(vargs[0], SerializedBlob):
-            # special serialization of a 'blob' that stays serialized
-            data, flags = self.__serializeBlobArgs(vargs, kwargs, annotations, flags, objectId, methodname, serializer)
-        else:
-            # normal serialization of the remote call
-            data = serializer.dumpsCall(objectId, methodname, vargs, kwargs)
-        if methodname in self._pyroOneway:
-            flags |= protocol.FLAGS_ONEWAY
-        self._pyroSeq = (self._pyroSeq + 1) & 0xffff
-        msg = protocol.SendingMessage(protocol.MSG_INVOKE, flags, self._pyroSeq, serializer.serializer_id, data, annotations=annotations)
-        if config.LOGWIRE:
-            protocol.log_wiredata(log, "proxy wiredata sending", msg)
+        if chunked:
+            flags |= protocol.FLAGS_CHUNKED
+        msg, serializer, flags = self.__pyroCreateMessage(methodname, vargs, kwargs, flags, objectId)
         try:
-            self._pyroConnection.send(msg.data)
+            seq = msg.seq
+            self._pyroConnection.send(msg.chunks)
             del msg  # invite GC to collect the object, don't wait for out-of-scope
+            if chunked:
+                self.__pyroSendChunked(seq, serializer, chunked)
             if flags & protocol.FLAGS_ONEWAY:
                 return None  # oneway call, no response data
             else:
@@ -257,27 +290,12 @@ class Proxy(object):
                 if config.LOGWIRE:
                     protocol.log_wiredata(log, "proxy wiredata received", msg)
                 self.__pyroCheckSequence(msg.seq)
-                if msg.serializer_id != serializer.serializer_id:
-                    error = "invalid serializer in response: %d" % msg.serializer_id
-                    log.error(error)
-                    raise errors.SerializeError(error)
-                if msg.annotations:
-                    current_context.response_annotations = msg.annotations
-                if self._pyroRawWireResponse:
-                    return msg
-                data = serializer.loads(msg.data)
-                if msg.flags & protocol.FLAGS_ITEMSTREAMRESULT:
-                    streamId = bytes(msg.annotations.get("STRM", b"")).decode()
-                    if not streamId:
-                        raise errors.ProtocolError("result of call is an iterator, but the server is not configured to allow streaming")
-                    return _StreamResultIterator(streamId, self)
-                if msg.flags & protocol.FLAGS_EXCEPTION:
-                    try:
-                        raise data  # if you see this in your traceback, you should probably inspect the remote traceback as well
-                    finally:
-                        del data
-                else:
-                    return data
+                result = self.__pyroProcessResponse(msg, serializer)
+                if msg.flags & protocol.FLAGS_CHUNKED:
+                    # the data of the result follows in continuation frames, read while the caller consumes it
+                    self.__pyroChunks = protocol.ChunkReader(self._pyroConnection, msg.seq)
+                    protocol.attach_chunked_data([result], self.__pyroChunks)
+                return result
         except (errors.CommunicationError, KeyboardInterrupt):
             # Communication error during read. To avoid corrupt transfers, we close the connection.
             # Otherwise we might receive the previous reply as a result of a new method call!
@@ -288,6 +306,159 @@ class Proxy(object):
             self._pyroRelease()
             raise
 
+    def _pyroSendCall(self, methodname, vargs, kwargs, objectId=None):
+        """
+        Sends a call message without waiting for the reply. Returns the sequence number and the serializer
+        that are needed to receive the reply(s) with :meth:`_pyroReceiveResult`. Not for pipelined proxies.
+        """
+        self.__check_owner()
+        if self.__pyroChunks is not None:
+            self.__pyroDrainChunks()
+        if self._pyroConnection is None:
+            self.__pyroCreateConnection()
+        msg, serializer, flags = self.__pyroCreateMessage(methodname, vargs, kwargs, 0, objectId)
+        try:
+            self._pyroConnection.send(msg.chunks)
+        except errors.CommunicationError:
+            self._pyroRelease()
+            raise
+        return msg.seq, serializer
+
+    def _pyroReceiveResult(self, seq, serializer):
+        """Receives the next reply to a call that was sent with :meth:`_pyroSendCall`, and returns its result."""
+        current_context.response_annotations = {}
+        try:
+            msg = protocol.recv_stub(self._pyroConnection, [protocol.MSG_RESULT])
+            if config.LOGWIRE:
+                protocol.log_wiredata(log, "proxy wiredata received", msg)
+            if msg.seq != seq:
+                err = "invoke: reply sequence out of sync, got %d expected %d" % (msg.seq, seq)
+                log.error(err)
+                raise errors.ProtocolError(err)
+        except (errors.CommunicationError, KeyboardInterrupt):
+            self._pyroRelease()
+            raise
+        return self.__pyroProcessResponse(msg, serializer)
+
+    def _pyroSubmit(self, methodname, *args, **kwargs):
+        """
+        Calls the remote method without waiting for the result: returns a :class:`concurrent.futures.Future` instead,
+        that will get the result (or exception) of the call when the reply arrives.
+        Many calls can be submitted in this way, they will all be in flight at the same time on the connection.
+        This requires the proxy to be in pipelined mode (``_pyroPipelined = True``).
+        """
+        if not self._pyroPipelined:
+            raise errors.PyroError("submitting calls requires the proxy to be in pipelined mode")
+        if not self._pyroMethods and not self._pyroAttrs:
+            self._pyroGetMetadata()
+        if methodname not in self._pyroMethods:
+            raise AttributeError("remote object '%s' has no exposed attribute or method '%s'" % (self._pyroUri, methodname))
+        reply, serializer = self.__pyroSendPipelined(methodname, args, kwargs, 0, None)
+        result = concurrent.futures.Future()
+        if reply is None:
+            result.set_result(None)  # oneway call, no response data
+            return result
+
+        def process_response(reply):
+            try:
+                result.set_result(self.__pyroProcessResponse(reply.result(), serializer))
+            except Exception as x:
+                if isinstance(x, errors.CommunicationError) and not isinstance(x, errors.SerializeError):
+                    self.__pyroReleasePipeline(reply.connection)
+                result.set_exception(x)
+        reply.add_done_callback(process_response)
+        return result
+
+    def __pyroCreateMessage(self, methodname, vargs, kwargs, flags, objectId):
+        serializer = serializers.serializers[self._pyroSerializer or config.SERIALIZER]
+        objectId = objectId or self._pyroConnection.objectId
+        annotations = current_context.annotations
+        if vargs and isinstance(vargs[0], SerializedBlob):
+            # special serialization of a 'blob' that stays serialized
+            data, flags = self.__serializeBlobArgs(vargs, kwargs, annotations, flags, objectId, methodname, serializer)
+        else:
+            # normal serialization of the remote call
+            data = serializer.dumpsCall(objectId, methodname, vargs, kwargs)
+        if methodname in self._pyroOneway:
+            flags |= protocol.FLAGS_ONEWAY
+        self._pyroSeq = (self._pyroSeq + 1) & 0xffff
+        msg = protocol.SendingMessage(protocol.MSG_INVOKE, flags, self._pyroSeq, serializer.serializer_id, data, annotations=annotations)
+        if config.LOGWIRE:
+            protocol.log_wiredata(log, "proxy wiredata sending", msg)
+        return msg, serializer, flags
+
+    def __pyroProcessResponse(self, msg, serializer):
+        if msg.serializer_id != serializer.serializer_id:
+            error = "invalid serializer in response: %d" % msg.serializer_id
+            log.error(error)
+            raise errors.SerializeError(error)
+        if msg.annotations:
+            current_context.response_annotations = msg.annotations
+        if self._pyroRawWireResponse:
+            return msg
+        data = serializer.loads(msg.data)
+        if msg.flags & protocol.FLAGS_ITEMSTREAMRESULT:
+            streamId = bytes(msg.annotations.get("STRM", b"")).decode()
+            if not streamId:
+                raise errors.ProtocolError("result of call is an iterator, but the server is not configured to allow streaming")
+            return _StreamResultIterator(streamId, self)
+        if msg.flags & protocol.FLAGS_EXCEPTION:
+            try:
+                raise data  # if you see this in your traceback, you should probably inspect the remote traceback as well
+            finally:
+                del data
+        else:
+            return data
+
+    def __pyroSendChunked(self, seq, serializer, chunked):
+        try:
+            protocol.send_chunked(self._pyroConnection, seq, serializer.serializer_id, chunked)
+        except errors.CommunicationError:
+            raise
+        except Exception:
+            # producing the data failed halfway, the daemon was told so. The reply of the call is of no use anymore.
+            self._pyroRelease()
+            raise
+
+    def __pyroDrainChunks(self):
+        # skip the chunked data of the previous result that wasn't consumed, so the connection is ready for the next call
+        reader, self.__pyroChunks = self.__pyroChunks, None
+        if reader.connection is self._pyroConnection:
+            try:
+                reader.drain()
+            except errors.CommunicationError:
+                self._pyroRelease()
+
+    def __pyroSendPipelined(self, methodname, vargs, kwargs, flags, objectId):
+        """
+        Sends the call message in pipelined mode. Returns the future for the reply message (None for oneway calls)
+        and the serializer that was used. The lock makes sure the messages don't get mixed up on the connection.
+        """
+        with self.__pyroPipelineLock:
+            if self._pyroConnection is None:
+                self.__pyroCreateConnection()
+            msg, serializer, flags = self.__pyroCreateMessage(methodname, vargs, kwargs, flags, objectId)
+            reply = None
+            if not flags & protocol.FLAGS_ONEWAY:
+                if self.__pyroPipeline is None or self.__pyroPipeline.connection is not self._pyroConnection:
+                    # the replies are read by a separate thread, that won't wait for a single reply with a timeout
+                    self._pyroConnection.timeout = None
+                    self.__pyroPipeline = _PipelineReader(self._pyroConnection)
+                    self.__pyroPipeline.start()
+                reply = self.__pyroPipeline.expect(msg.seq, msg.corr_id)
+            try:
+                self._pyroConnection.send(msg.chunks)
+            except errors.CommunicationError:
+                self.__pyroReleasePipeline(self._pyroConnection)
+                raise
+            return reply, serializer
+
+    def __pyroReleasePipeline(self, connection):
+        # release the connection, if it is still the one of this proxy (another thread may have replaced it already)
+        with self.__pyroPipelineLock:
+            if connection is not None and connection is self._pyroConnection:
+                self._pyroRelease()
+
     def __pyroCheckSequence(self, seq):
         if seq != self._pyroSeq:
             err = "invoke: reply sequence out of sync, got %d expected %d" % (seq, self._pyroSeq)
@@ -329,7 +500,7 @@ class Proxy(object):
                                               data, annotations=current_context.annotations)
                 if config.LOGWIRE:
                     protocol.log_wiredata(log, "proxy connect sending", msg)
-                conn.send(msg.data)
+                conn.send(msg.chunks)
                 msg = protocol.recv_stub(conn, [protocol.MSG_CONNECTOK, protocol.MSG_CONNECTFAIL])
                 if config.LOGWIRE:
                     protocol.log_wiredata(log, "proxy connect response received", msg)
@@ -370,21 +541,23 @@ class Proxy(object):
                     raise errors.ProtocolError(err)
 
         self.__check_owner()
-        if self._pyroConnection is not None:
-            return False  # already connected
-        uri = core.resolve(self._pyroUri)
-        # socket connection (normal or Unix domain socket)
-        log.debug("connecting to %s", uri)
-        connect_location = uri.sockname or (uri.host, uri.port)
-        if connected_socket:
-            self._pyroConnection = socketutil.SocketConnection(connected_socket, uri.object, True)
-            self._pyroLocalSocket = connected_socket.getsockname()
-        else:
-            connect_and_handshake()
-        # obtain metadata if this feature is enabled, and the metadata is not known yet
-        if not self._pyroMethods and not self._pyroAttrs:
-            self._pyroGetMetadata(uri.object)
-        return True
+        # the lock prevents multiple threads sharing a pipelined proxy from each creating a connection
+        with self.__pyroPipelineLock:
+            if self._pyroConnection is not None:
+                return False  # already connected
+            uri = core.resolve(self._pyroUri)
+            # socket connection (normal or Unix domain socket)
+            log.debug("connecting to %s", uri)
+            connect_location = uri.sockname or (uri.host, uri.port)
+            if connected_socket:
+                self._pyroConnection = socketutil.SocketConnection(connected_socket, uri.object, True)
+                self._pyroLocalSocket = connected_socket.getsockname()
+            else:
+                connect_and_handshake()
+            # obtain metadata if this feature is enabled, and the metadata is not known yet
+            if not self._pyroMethods and not self._pyroAttrs:
+                self._pyroGetMetadata(uri.object)
+            return True
 
     def _pyroGetMetadata(self, objectId=None, known_metadata=None):
         """
@@ -441,11 +614,24 @@ class Proxy(object):
         log.error(msg)
         raise errors.ConnectionClosedError(msg)
 
-    def _pyroInvokeBatch(self, calls, oneway=False):
+    def _pyroInvokeBatch(self, calls, oneway=False, parallel=False, stop_on_error=True):
         flags = protocol.FLAGS_BATCH
         if oneway:
             flags |= protocol.FLAGS_ONEWAY
-        return self._pyroInvoke("<batch>", calls, None, flags)
+        options = []
+        if parallel:
+            options.append("parallel")
+        if not stop_on_error:
+            options.append("all")
+        if not options:
+            return self._pyroInvoke("<batch>", calls, None, flags)
+        # the batch execution options are passed to the daemon in an annotation, for this call only
+        annotations = current_context.annotations
+        current_context.annotations = dict(annotations, BTCH=",".join(options).encode())
+        try:
+            return self._pyroInvoke("<batch>", calls, None, flags)
+        finally:
+            current_context.annotations = annotations
 
     def _pyroValidateHandshake(self, response):
         """
@@ -495,6 +681,8 @@ class Proxy(object):
             return serializer.dumpsCall(objectId, methodname, blob._data, kwargs), flags
 
     def __check_owner(self):
+        if self._pyroPipelined:
+            return  # pipelined proxies can be shared between threads
         if get_ident() != self.__pyroOwnerThread:
             raise errors.PyroError("the calling thread is not the owner of this proxy, "
                                    "create a new proxy in this thread or transfer ownership.")
@@ -522,6 +710,63 @@ class _RemoteMethod(object):
                     raise
 
 
+class _PipelineReader(threading.Thread):
+    """
+    Reads the reply messages from a pipelined proxy connection, and hands them to the calls that are waiting for them.
+    Replies are matched with their calls by sequence number (and correlation id), so they may arrive in any order.
+    (The Pyro daemon itself sends the replies of one connection in the order of the requests.)
+    """
+    def __init__(self, connection):
+        super(_PipelineReader, self).__init__(name="Pyro-PipelineReader")
+        self.daemon = True
+        self.connection = connection
+        self.pending = {}    # seq -> (future, correlation id)
+        self.lock = threading.Lock()
+        self.error = None
+
+    def expect(self, seq, corr_id):
+        """register a call that expects a reply, returns the future that will receive the reply message"""
+        reply = concurrent.futures.Future()
+        reply.connection = self.connection
+        with self.lock:
+            if self.error:
+                raise self.error
+            if seq in self.pending:
+                raise errors.PyroError("too many calls in flight on this connection")
+            self.pending[seq] = (reply, corr_id)
+        return reply
+
+    def run(self):
+        try:
+            while True:
+                msg = protocol.recv_stub(self.connection, [protocol.MSG_RESULT])
+                if config.LOGWIRE:
+                    protocol.log_wiredata(log, "proxy wiredata received", msg)
+                with self.lock:
+                    reply, corr_id = self.pending.pop(msg.seq, (None, None))
+                if reply is None:
+                    log.debug("discarding reply for seq %d, nobody is waiting for it", msg.seq)
+                elif reply.set_running_or_notify_cancel():
+                    if bytes(msg.corr_id) != corr_id and corr_id != protocol._empty_correlation_id:
+                        reply.set_exception(errors.ProtocolError("invoke: reply correlation id mismatch for seq %d" % msg.seq))
+                    else:
+                        reply.set_result(msg)
+        except Exception as x:
+            if isinstance(x, errors.CommunicationError):
+                error = x
+            else:
+                error = errors.ConnectionClosedError("pipelined connection broken: %s" % x)
+            if not isinstance(x, errors.ConnectionClosedError):
+                log.warning("error reading pipelined replies: %s", x)
+            self.connection.close()
+        with self.lock:
+            self.error = error
+            pending, self.pending = self.pending, {}
+        for reply, _ in pending.values():
+            if reply.set_running_or_notify_cancel():
+                reply.set_exception(error)
+
+
 class _StreamResultIterator(object):
     """
     Pyro returns this as a result of a remote call which returns an iterator or generator.
@@ -532,6 +777,15 @@ class _StreamResultIterator(object):
         self.streamId = streamId
         self.proxy = proxy
         self.pyroseq = proxy._pyroSeq
+        self.credit = config.ITER_STREAM_CREDIT
+        self.maxChunk = config.ITER_STREAM_CHUNK
+        self.streamProxy = None   # the separate connection that pushed items or prefetched chunks arrive over
+        self.grants = collections.deque()   # [seq, serializer, number of items] per request for items still to be received
+        self.outstanding = 0
+        self.chunk = min(8, self.maxChunk)
+        self.buffer = collections.deque()
+        self.bufferFilled = None    # (time, number of items) when the buffer was last filled with a chunk
+        self.prefetch = None
 
     def __iter__(self):
         return self
@@ -541,8 +795,12 @@ class _StreamResultIterator(object):
             raise StopIteration
         if self.proxy._pyroConnection is None:
             raise errors.ConnectionClosedError("the proxy for this stream result has been closed")
-        self.pyroseq += 1
         try:
+            if self.credit > 0:
+                return self.__nextPushed()
+            if self.maxChunk > 0:
+                return self.__nextChunked()
+            self.pyroseq += 1
             return self.proxy._pyroInvoke("get_next_stream_item", [self.streamId], {}, objectId=core.DAEMON_NAME)
         except (StopIteration, GeneratorExit):
             # when the iterator is exhausted, the proxy is removed to avoid unneeded close_stream calls later
@@ -550,6 +808,88 @@ class _StreamResultIterator(object):
             self.proxy = None
             raise
 
+    def __createStreamProxy(self):
+        # pushed items and prefetched chunks arrive over a separate connection, so the proxy remains usable for other calls
+        self.streamProxy = self.proxy.__copy__()
+        self.streamProxy._pyroPipelined = False
+
+    def __nextPushed(self):
+        # The daemon pushes items as long as we have given it credit for them, so there's no round trip per item.
+        # The credit is topped up when half of it has been used up, so the daemon never runs ahead more than that.
+        if self.streamProxy is None:
+            self.__createStreamProxy()
+        if self.outstanding <= self.credit // 2:
+            count = self.credit - self.outstanding
+            seq, serializer = self.streamProxy._pyroSendCall("get_stream_items", [self.streamId, count], {}, objectId=core.DAEMON_NAME)
+            self.grants.append([seq, serializer, count])
+            self.outstanding += count
+        grant = self.grants[0]
+        try:
+            item = self.streamProxy._pyroReceiveResult(grant[0], grant[1])
+        except Exception:
+            # the stream has ended or failed, the items of the other requests will never come
+            self.__releaseStreamProxy()
+            raise
+        grant[2] -= 1
+        self.outstanding -= 1
+        if not grant[2]:
+            self.grants.popleft()
+        return item
+
+    def __nextChunked(self):
+        # The items are fetched in chunks, and the next chunk is already fetched in the background
+        # while the current one is being consumed. The chunk size follows from the measured time it took
+        # to fetch a chunk and the time it took to consume the previous one: a chunk should last about twice
+        # as long as fetching the next one takes (it grows at most twofold per chunk, up to the maximum).
+        # A chunk with fewer items than asked for (the size limit, or the end of the stream) doesn't change the size.
+        # The end of the stream (or its error) is the result of the last fetch.
+        if not self.buffer:
+            if self.prefetch is None:
+                self.__prefetch()
+            try:
+                items, count, duration = self.prefetch.result()
+            except Exception:
+                self.__releaseStreamProxy()
+                raise
+            finally:
+                self.prefetch = None
+            now = time.perf_counter()
+            if self.bufferFilled and len(items) == count:
+                filled, consumed = self.bufferFilled
+                per_item = (now - filled) / consumed
+                wanted = int(2 * duration / per_item) + 1 if per_item > 0 else self.maxChunk
+                self.chunk = max(1, min(wanted, self.chunk * 2, self.maxChunk))
+            self.bufferFilled = (now, len(items))
+            self.buffer.extend(items)
+            self.__prefetch()
+        return self.buffer.popleft()
+
+    def __prefetch(self):
+        if self.streamProxy is None:
+            if self.proxy._pyroPipelined:
+                self.streamProxy = self.proxy   # it can be used from the prefetch thread and still be used for other calls
+            else:
+                self.__createStreamProxy()
+        self.prefetch = _stream_prefetcher().submit(self.__fetch, self.streamProxy, self.chunk)
+
+    def __fetch(self, proxy, count):
+        if not proxy._pyroPipelined:
+            proxy._pyroClaimOwnership()
+        start = time.perf_counter()
+        items = proxy._pyroInvoke("get_next_stream_items", [self.streamId, count, config.ITER_STREAM_CHUNK_BYTES], {},
+                                  objectId=core.DAEMON_NAME)
+        return items, count, time.perf_counter() - start
+
+    def __releaseStreamProxy(self):
+        if self.streamProxy is not None:
+            # close the connection directly, the proxy may be in use by the prefetch thread
+            if self.streamProxy is not self.proxy and self.streamProxy._pyroConnection is not None:
+                self.streamProxy._pyroConnection.close()
+            self.streamProxy = None
+        self.prefetch = None
+        self.grants.clear()
+        self.outstanding = 0
+
     def __del__(self):
         try:
             self.close()
@@ -557,9 +897,11 @@ class _StreamResultIterator(object):
             pass
 
     def close(self):
+        self.__releaseStreamProxy()
+        self.buffer.clear()
         if self.proxy and self.proxy._pyroConnection is not None:
-            if self.pyroseq == self.proxy._pyroSeq:
-                # we're still in sync, it's okay to use the same proxy to close this stream
+            if self.pyroseq == self.proxy._pyroSeq or self.proxy._pyroPipelined:
+                # we're still in sync (or replies are matched by seq anyway), it's okay to use the same proxy to close this stream
                 self.proxy._pyroInvoke("close_stream", [self.streamId], {},
                                        flags=protocol.FLAGS_ONEWAY, objectId=core.DAEMON_NAME)
             else:
@@ -575,6 +917,19 @@ class _StreamResultIterator(object):
         self.proxy = None
 
 
+_prefetch_executor = None
+_prefetch_executor_lock = threading.Lock()
+
+
+def _stream_prefetcher():
+    """the executor that prefetches the chunks of items of the stream iterators, it is shared by all of them"""
+    global _prefetch_executor
+    with _prefetch_executor_lock:
+        if _prefetch_executor is None:
+            _prefetch_executor = concurrent.futures.ThreadPoolExecutor(thread_name_prefix="Pyro-stream-prefetch")
+        return _prefetch_executor
+
+
 class _BatchedRemoteMethod(object):
     """method call abstraction that is used with batched calls"""
 
@@ -594,7 +949,10 @@ class BatchProxy(object):
     It is constructed with a reference to the normal proxy that will
     carry out the batched calls. Call methods on this object that you want to batch,
     and finally call the batch proxy itself. That call will return a generator
-    for the results of every method call in the batch (in sequence)."""
+    for the results of every method call in the batch (in sequence).
+    Call it with parallel=True to let the daemon execute the calls concurrently,
+    and with stop_on_error=False to execute all calls even if some of them fail.
+    The generator then produces the exception object of every failed call instead of raising it."""
 
     def __init__(self, proxy):
         self.__proxy = proxy
@@ -614,19 +972,22 @@ class BatchProxy(object):
         copy.__calls = list(self.__calls)
         return copy
 
-    def __resultsgenerator(self, results):
+    def __resultsgenerator(self, results, stop_on_error=True):
         for result in results:
             if isinstance(result, core._ExceptionWrapper):
-                result.raiseIt()  # re-raise the remote exception locally.
+                if stop_on_error:
+                    result.raiseIt()  # re-raise the remote exception locally.
+                else:
+                    yield result.exception
             else:
                 yield result  # it is a regular result object, yield that and continue.
 
-    def __call__(self, oneway=False):
+    def __call__(self, oneway=False, parallel=False, stop_on_error=True):
         self.__proxy._pyroClaimOwnership()
-        results = self.__proxy._pyroInvokeBatch(self.__calls, oneway)
+        results = self.__proxy._pyroInvokeBatch(self.__calls, oneway, parallel, stop_on_error)
         self.__calls = []  # clear for re-use
         if not oneway:
-            return self.__resultsgenerator(results)
+            return self.__resultsgenerator(results, stop_on_error)
 
     def _pyroInvoke(self, name, args, kwargs):
         # ignore all parameters, we just need to execute the batch
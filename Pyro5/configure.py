@@ -18,9 +18,14 @@ class Configuration:
     __slots__ = [
         "HOST", "NS_HOST", "NS_PORT", "NS_BCPORT", "NS_BCHOST", "NS_AUTOCLEAN", "NS_LOOKUP_DELAY",
         "NATHOST", "NATPORT", "COMPRESSION", "SERVERTYPE", "COMMTIMEOUT", "POLLTIMEOUT", "MAX_RETRIES",
-        "SOCK_REUSE", "SOCK_NODELAY", "DETAILED_TRACEBACK", "THREADPOOL_SIZE", "THREADPOOL_SIZE_MIN",
-        "MAX_MESSAGE_SIZE", "BROADCAST_ADDRS", "PREFER_IP_VERSION", "SERIALIZER", "SERPENT_BYTES_REPR",
-        "ITER_STREAMING", "ITER_STREAM_LIFETIME", "ITER_STREAM_LINGER", "LOGFILE", "LOGLEVEL", "LOGWIRE",
+        "SOCK_REUSE", "SOCK_REUSEPORT", "SOCK_NODELAY", "DETAILED_TRACEBACK", "THREADPOOL_SIZE", "THREADPOOL_SIZE_MIN",
+        "THREADPOOL_REACTOR", "THREADPOOL_QUEUE_SIZE", "THREADPOOL_QUEUE_WAIT", "THREADPOOL_IDLETIMEOUT",
+        "INSTANCEPOOL_SIZE", "INSTANCEPOOL_SIZE_MIN", "INSTANCEPOOL_IDLETIMEOUT", "PROCESSPOOL_SIZE",
+        "ONEWAY_THREADS", "ONEWAY_QUEUE_SIZE", "ONEWAY_OVERFLOW", "BATCH_THREADS",
+        "MULTIPLEX_OFFLOAD", "MULTIPLEX_HIGHWATER", "MULTIPLEX_REACTORS", "MAX_MESSAGE_SIZE",
+        "CHUNKED_FRAME_SIZE", "BROADCAST_ADDRS", "PREFER_IP_VERSION", "SERIALIZER", "SERPENT_BYTES_REPR",
+        "ITER_STREAMING", "ITER_STREAM_LIFETIME", "ITER_STREAM_LINGER", "ITER_STREAM_CREDIT", "ITER_STREAM_CHUNK",
+        "ITER_STREAM_CHUNK_BYTES", "ITER_STREAM_AHEAD", "ITER_STREAM_AHEAD_BYTES", "LOGFILE", "LOGLEVEL", "LOGWIRE",
         "SSL", "SSL_SERVERCERT", "SSL_SERVERKEY", "SSL_SERVERKEYPASSWD", "SSL_REQUIRECLIENTCERT",
         "SSL_CLIENTCERT", "SSL_CLIENTKEY", "SSL_CLIENTKEYPASSWD", "SSL_CACERTS"
     ]
@@ -48,11 +53,28 @@ class Configuration:
         self.POLLTIMEOUT = 2.0
         self.MAX_RETRIES = 0
         self.SOCK_REUSE = True  # so_reuseaddr on server sockets?
+        self.SOCK_REUSEPORT = False  # so_reuseport on server sockets?
         self.SOCK_NODELAY = False  # tcp_nodelay on socket?
         self.DETAILED_TRACEBACK = False
         self.THREADPOOL_SIZE = 80
         self.THREADPOOL_SIZE_MIN = 4
+        self.THREADPOOL_REACTOR = False
+        self.THREADPOOL_QUEUE_SIZE = 100
+        self.THREADPOOL_QUEUE_WAIT = 2.0
+        self.THREADPOOL_IDLETIMEOUT = 5.0
+        self.INSTANCEPOOL_SIZE = 16
+        self.INSTANCEPOOL_SIZE_MIN = 0
+        self.INSTANCEPOOL_IDLETIMEOUT = 60.0
+        self.PROCESSPOOL_SIZE = 0
+        self.ONEWAY_THREADS = 16
+        self.ONEWAY_QUEUE_SIZE = 1000
+        self.ONEWAY_OVERFLOW = "block"
+        self.BATCH_THREADS = 16
+        self.MULTIPLEX_OFFLOAD = False
+        self.MULTIPLEX_HIGHWATER = 4 * 1024 * 1024  # 4 megabyte
+        self.MULTIPLEX_REACTORS = 1
         self.MAX_MESSAGE_SIZE = 1024 * 1024 * 1024  # 1 gigabyte
+        self.CHUNKED_FRAME_SIZE = 1024 * 1024  # 1 megabyte
         self.BROADCAST_ADDRS = ["<broadcast>", "0.0.0.0"]
         self.PREFER_IP_VERSION = 0  # 4, 6 or 0 (0=let OS choose according to RFC 3484)
         self.SERIALIZER = "serpent"
@@ -61,6 +83,11 @@ class Configuration:
         self.ITER_STREAMING = True
         self.ITER_STREAM_LIFETIME = 0.0
         self.ITER_STREAM_LINGER = 30.0
+        self.ITER_STREAM_CREDIT = 0
+        self.ITER_STREAM_CHUNK = 0
+        self.ITER_STREAM_CHUNK_BYTES = 256 * 1024
+        self.ITER_STREAM_AHEAD = 0
+        self.ITER_STREAM_AHEAD_BYTES = 1024 * 1024
         self.LOGFILE = _pyro_logfile
         self.LOGLEVEL = _pyro_loglevel
         self.SSL = False
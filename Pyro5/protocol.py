@@ -31,6 +31,11 @@ After the header, zero or more annotation chunks may follow, of the format::
     B   x   annotation chunk databytes
 
 After that, the actual payload data bytes follow.
+
+A message with the FLAGS_CHUNKED flag is followed by continuation frames: MSG_CHUNK messages with the same
+sequence number, that each carry a part of the (raw binary) data of the ChunkedData argument or result of the call.
+All but the last frame have the FLAGS_CHUNKED flag. The last frame has no data, or, if the sender failed to
+produce the data, the FLAGS_EXCEPTION flag and the error message.
 """
 
 import struct
@@ -49,6 +54,7 @@ MSG_CONNECTFAIL = 3
 MSG_INVOKE = 4
 MSG_RESULT = 5
 MSG_PING = 6
+MSG_CHUNK = 7
 FLAGS_EXCEPTION = 1 << 0
 FLAGS_COMPRESSED = 1 << 1    # compress the data, but not the annotations (if you need that, do it yourself)
 FLAGS_ONEWAY = 1 << 2
@@ -56,6 +62,7 @@ FLAGS_BATCH = 1 << 3
 FLAGS_ITEMSTREAMRESULT = 1 << 4
 FLAGS_KEEPSERIALIZED = 1 << 5
 FLAGS_CORR_ID = 1 << 6
+FLAGS_CHUNKED = 1 << 7
 
 # wire protocol version. Note that if this gets updated, Pyrolite might need an update too.
 PROTOCOL_VERSION = 502
@@ -68,7 +75,12 @@ _empty_correlation_id = b"\0" * 16
 
 
 class SendingMessage:
-    """Wire protocol message that will be sent."""
+    """
+    Wire protocol message that will be sent.
+    The header, annotation chunks and payload are kept as separate buffers in ``chunks``,
+    so the (possibly huge) payload never has to be copied just to put the header in front of it.
+    The connection's send method accepts this list of buffers directly.
+    """
 
     def __init__(self, msgtype, flags, seq, serializer_id, payload, annotations=None):
         self.type = msgtype
@@ -91,25 +103,44 @@ class SendingMessage:
         self.flags = flags
         header_data = struct.pack(_header_format, b"PYRO", PROTOCOL_VERSION, msgtype, serializer_id, self.flags, seq,
                                   len(payload), annotations_size, self.corr_id, 0, _magic_number)
-        annotation_data = []
+        self.chunks = [header_data]
         for k, v in annotations.items():
             if len(k) != 4:
                 raise errors.ProtocolError("annotation identifier must be 4 ascii characters")
-            annotation_data.append(struct.pack("!4sI", k.encode("ascii"), len(v)))
+            self.chunks.append(struct.pack("!4sI", k.encode("ascii"), len(v)))
             if not isinstance(v, (bytes, bytearray, memoryview)):
                 raise errors.ProtocolError("annotation data must be bytes, bytearray, or memoryview", type(v))
-            annotation_data.append(v)    # note: annotations are not compressed by Pyro
-        self.data = header_data + b"".join(annotation_data) + payload
+            self.chunks.append(v)    # note: annotations are not compressed by Pyro
+        if payload:
+            self.chunks.append(payload)
+        self.size = _header_size + annotations_size + len(payload)
 
     def __repr__(self):
         return "<{:s}.{:s} at 0x{:x}; type={:d} flags={:d} seq={:d} size={:d}>" \
-            .format(self.__module__, self.__class__.__name__, id(self), self.type, self.flags, self.seq, len(self.data))
+            .format(self.__module__, self.__class__.__name__, id(self), self.type, self.flags, self.seq, self.size)
+
+    @property
+    def data(self):
+        """
+        The complete message as a single bytes object.
+        Note that this copies all buffers together, when sending the message use ``chunks`` instead.
+        """
+        if len(self.chunks) == 1:
+            return self.chunks[0]
+        data = b"".join(self.chunks)
+        self.chunks = [data]
+        return data
+
+    @data.setter
+    def data(self, data):
+        self.chunks = [data]
+        self.size = len(data)
 
     @staticmethod
     def ping(pyroConnection):
         """Convenience method to send a 'ping' message and wait for the 'pong' response"""
         ping = SendingMessage(MSG_PING, 0, 0, 42, b"ping")
-        pyroConnection.send(ping.data)
+        pyroConnection.send(ping.chunks)
         recv_stub(pyroConnection, [MSG_PING])
 
 
@@ -202,3 +233,178 @@ def recv_stub(connection, accepted_msgtypes=None):
     payload = connection.recv(msg.annotations_size + msg.data_size)
     msg.add_payload(payload)
     return msg
+
+
+class ChunkedData(object):
+    """
+    Binary data that is transferred as a sequence of continuation frames of at most ``frame_size`` bytes
+    (default: the ``CHUNKED_FRAME_SIZE`` config item), instead of as part of the message of the call or result.
+    This allows for data that is larger than ``MAX_MESSAGE_SIZE``, and neither side has to keep all of it in memory.
+    The source can be a bytes-like object, a binary file-like object or an iterable that produces bytes.
+    Pass it as a (direct) argument of a remote method call, or return it from a remote method.
+    The receiving side gets a ChunkedData as well, that reads the frames from the connection while you iterate
+    over it (or ``read()`` from it). Only a single ChunkedData can be passed per call or result.
+    """
+    def __init__(self, source=None, frame_size=0):
+        self.source = source
+        self.frame_size = frame_size or config.CHUNKED_FRAME_SIZE
+        self._reader = None     # reads the continuation frames, on the receiving side
+        self._chunks = None
+        self._buffer = b""
+
+    def __getstate__(self):
+        raise errors.SerializeError("ChunkedData can only be passed as a direct argument or return value of a call")
+
+    def __iter__(self):
+        """produces the data in chunks of at most frame_size bytes"""
+        if self._reader:
+            while True:
+                chunk = self._reader.next_frame()
+                if chunk is None:
+                    return
+                if chunk:
+                    yield chunk
+        if self.source is None:
+            raise errors.PyroError("no chunked data was received")
+        frame_size = min(self.frame_size, config.MAX_MESSAGE_SIZE)
+        if isinstance(self.source, (bytes, bytearray, memoryview)):
+            data = memoryview(self.source).cast("B")
+            for i in range(0, len(data), frame_size):
+                yield data[i:i + frame_size]
+        elif hasattr(self.source, "read"):
+            while True:
+                chunk = self.source.read(frame_size)
+                if not chunk:
+                    return
+                yield chunk
+        else:
+            for data in self.source:
+                data = memoryview(data).cast("B")
+                for i in range(0, len(data), frame_size):
+                    yield data[i:i + frame_size]
+
+    def read(self, size=-1):
+        """reads (at most) size bytes of the data, or all remaining data if size is negative"""
+        if self._chunks is None:
+            self._chunks = iter(self)
+        parts = [self._buffer]
+        available = len(self._buffer)
+        while size < 0 or available < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            parts.append(chunk)
+            available += len(chunk)
+        data = b"".join(parts)
+        if 0 <= size < len(data):
+            self._buffer = data[size:]
+            return data[:size]
+        self._buffer = b""
+        return data
+
+    def close(self):
+        """skips the remaining data that is still to be received, or closes the source when it is a file"""
+        if self._reader:
+            self._reader.drain()
+        elif hasattr(self.source, "close"):
+            self.source.close()
+        self._buffer = b""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class ChunkReader(object):
+    """Receives the continuation frames that follow the message with the given sequence number, one at a time."""
+    def __init__(self, connection, seq):
+        self.connection = connection
+        self.seq = seq
+        self.done = False
+
+    def next_frame(self):
+        """returns the data of the next frame, or None when all frames have been received"""
+        if self.done:
+            return None
+        self.done = True    # until proven otherwise: a broken transfer can't be continued
+        msg = recv_stub(self.connection, [MSG_CHUNK])
+        if msg.seq != self.seq:
+            raise errors.ProtocolError("chunk frame out of sequence, got %d expected %d" % (msg.seq, self.seq))
+        if msg.flags & FLAGS_EXCEPTION:
+            raise errors.PyroError("chunked data transfer was aborted by the sender: " + bytes(msg.data).decode("utf-8", "replace"))
+        if msg.flags & FLAGS_CHUNKED:
+            self.done = False
+            return msg.data
+        return None
+
+    def drain(self):
+        """skips the frames that haven't been received yet, so that the connection can be used for the next message"""
+        while not self.done:
+            try:
+                self.next_frame()
+            except errors.CommunicationError:
+                raise
+            except errors.PyroError:
+                pass    # the sender aborted the transfer
+
+
+def send_chunked(connection, seq, serializer_id, data):
+    """
+    Sends the contents of the ChunkedData as continuation frames, following the message with the given sequence number.
+    If producing the data fails, the receiver is told that the transfer was aborted and the error is raised.
+    """
+    chunks = iter(data)
+    while True:
+        try:
+            chunk = next(chunks)
+        except StopIteration:
+            break
+        except Exception as x:
+            error = "{:s}: {:s}".format(type(x).__name__, str(x)).encode("utf-8")
+            connection.send(SendingMessage(MSG_CHUNK, FLAGS_EXCEPTION, seq, serializer_id, error).chunks)
+            raise
+        if chunk:
+            connection.send(SendingMessage(MSG_CHUNK, FLAGS_CHUNKED, seq, serializer_id, chunk).chunks)
+    connection.send(SendingMessage(MSG_CHUNK, 0, seq, serializer_id, b"").chunks)
+
+
+def detach_chunked_data(vargs, kwargs):
+    """
+    Replaces the ChunkedData argument of a call by a placeholder that can be serialized.
+    Returns the new vargs and kwargs, and the ChunkedData (or None if there is none).
+    """
+    chunked = None
+    if any(isinstance(arg, ChunkedData) for arg in vargs):
+        vargs = list(vargs)
+        for i, arg in enumerate(vargs):
+            if isinstance(arg, ChunkedData):
+                if chunked is not None:
+                    raise errors.PyroError("only a single ChunkedData argument can be passed per call")
+                chunked = arg
+                vargs[i] = _chunked_placeholder
+    if kwargs and any(isinstance(arg, ChunkedData) for arg in kwargs.values()):
+        kwargs = dict(kwargs)
+        for key, arg in kwargs.items():
+            if isinstance(arg, ChunkedData):
+                if chunked is not None:
+                    raise errors.PyroError("only a single ChunkedData argument can be passed per call")
+                chunked = arg
+                kwargs[key] = _chunked_placeholder
+    return vargs, kwargs, chunked
+
+
+def attach_chunked_data(values, reader):
+    """
+    Connects the received ChunkedData placeholder among the given values (arguments or result) to the reader of the frames.
+    Returns if a ChunkedData was found.
+    """
+    for value in values:
+        if isinstance(value, ChunkedData) and value.source is None and value._reader is None:
+            value._reader = reader
+            return True
+    return False
+
+
+_chunked_placeholder = {"__class__": "Pyro5.protocol.ChunkedData"}
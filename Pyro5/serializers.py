@@ -174,7 +174,7 @@ class SerializerBase(object):
         Recreate an object out of a dict containing the class name and the attributes.
         Only a fixed set of classes are recognized.
         """
-        from . import core, client, server  # circular imports...
+        from . import core, client, server, protocol  # circular imports...
         classname = data.get("__class__", "<unknown>")
         if isinstance(classname, bytes):
             classname = classname.decode("utf-8")
@@ -197,6 +197,8 @@ class SerializerBase(object):
             daemon = server.Daemon.__new__(server.Daemon)
             daemon.__setstate__(data["state"])
             return daemon
+        elif classname == "Pyro5.protocol.ChunkedData":
+            return protocol.ChunkedData()     # placeholder, the data itself follows in continuation frames
         elif classname.startswith("Pyro5.util."):
             if classname == "Pyro5.util.SerpentSerializer":
                 return SerpentSerializer()
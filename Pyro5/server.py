@@ -9,7 +9,14 @@ import sys
 import uuid
 import time
 import socket
+import signal
+import select
+import functools
+import heapq
+import itertools
+import contextlib
 import collections
+import concurrent.futures
 import threading
 import logging
 import inspect
@@ -73,6 +80,17 @@ def oneway(method: Callable) -> Callable:
 _T = TypeVar("_T", bound=Union[Callable, type])
 
 
+def process_pool(method_or_class: _T) -> _T:
+    """
+    Decorator to mark a method (or all methods of a class) to be executed in a separate process,
+    taken from the daemon's process pool. Use this for cpu-bound methods, so that they don't hold the GIL
+    of the daemon process. The method is called on an instance of the class that the worker process
+    creates itself, so it can't access or change the state of the Pyro object in the daemon.
+    """
+    method_or_class._pyroProcessPool = True    # type: ignore
+    return method_or_class
+
+
 def expose(method_or_class: _T) -> _T:
     """
     Decorator to mark a method or class to be exposed for remote calls.
@@ -120,24 +138,136 @@ def expose(method_or_class: _T) -> _T:
     return method_or_class
 
 
-def behavior(instance_mode: str = "session", instance_creator: Optional[Callable] = None) -> Callable:
+def behavior(instance_mode: str = "session", instance_creator: Optional[Callable] = None, pool_size: Optional[int] = None,
+             pool_min: Optional[int] = None, pool_idle: Optional[float] = None) -> Callable:
     """
     Decorator to specify the server behavior of your Pyro class.
+    With instance mode "pool", pool_size, pool_min and pool_idle override the INSTANCEPOOL_SIZE,
+    INSTANCEPOOL_SIZE_MIN and INSTANCEPOOL_IDLETIMEOUT config items for the instance pool of this class.
     """
     def _behavior(clazz):
         if not inspect.isclass(clazz):
             raise TypeError("behavior decorator can only be used on a class")
-        if instance_mode not in ("single", "session", "percall"):
+        if instance_mode not in ("single", "session", "percall", "pool"):
             raise ValueError("invalid instance mode: " + instance_mode)
         if instance_creator and not callable(instance_creator):
             raise TypeError("instance_creator must be a callable")
+        pool_options = (pool_size, pool_min, pool_idle)
+        if instance_mode != "pool" and pool_options != (None, None, None):
+            raise ValueError("pool options can only be used with instance mode pool")
         clazz._pyroInstancing = (instance_mode, instance_creator)
+        clazz._pyroInstancePool = pool_options
         return clazz
     if not isinstance(instance_mode, str):
         raise SyntaxError("behavior decorator is missing argument(s)")
     return _behavior
 
 
+class ClientSession(object):
+    """
+    State of a client connection that is determined once, when the client connects,
+    and that stays the same for all calls on that connection. The daemon stores it in ``conn.session``.
+    Calls that don't carry their own correlation id, get a new one from :meth:`call_correlation_id`.
+    """
+    __slots__ = ("sock_addr", "serializer_id", "peer_cert", "handshake", "correlation_id", "_corr_id_base", "_calls")
+
+    def __init__(self, conn, serializer_id=0, correlation_id=None):
+        try:
+            # store, because on oneway calls, socket will be disconnected:
+            self.sock_addr = conn.sock.getpeername()
+        except (AttributeError, socket.error):
+            self.sock_addr = None  # sometimes getpeername() doesn't work...
+        try:
+            self.peer_cert = conn.getpeercert()
+        except (AttributeError, ValueError):
+            self.peer_cert = None
+        self.serializer_id = serializer_id
+        self.handshake = None
+        self.correlation_id = correlation_id or uuid.uuid4()
+        self._corr_id_base = self.correlation_id.int & ~0xffffffffffff
+        self._calls = itertools.count(1)
+
+    def call_correlation_id(self) -> uuid.UUID:
+        """
+        A new correlation id for a call on this connection: the correlation id of the session,
+        with a call counter in its lowest 48 bits. That's a lot cheaper than a new random uuid for every call.
+        """
+        return uuid.UUID(int=self._corr_id_base | next(self._calls) & 0xffffffffffff)
+
+
+def _create_instance(clazz: type, creator: Optional[Callable]) -> Any:
+    try:
+        if creator:
+            obj = creator(clazz)
+            if isinstance(obj, clazz):
+                return obj
+            raise TypeError("instance creator returned object of different type")
+        return clazz()
+    except Exception:
+        log.exception("could not create pyro object instance")
+        raise
+
+
+class InstancePool(object):
+    """
+    The instances of a class that uses instance mode "pool". Every call checks out an instance for its exclusive use,
+    and gives it back when it's done. There are at most INSTANCEPOOL_SIZE instances. INSTANCEPOOL_SIZE_MIN instances
+    are created right away (warm-up), instances above that number are discarded when they've been idle for
+    INSTANCEPOOL_IDLETIMEOUT seconds. The size, minimum size and idle timeout given here override these config items.
+    """
+    def __init__(self, clazz, creator=None, size=None, min_size=None, idle_timeout=None):
+        self.clazz = clazz
+        self.creator = creator
+        self.min_size = config.INSTANCEPOOL_SIZE_MIN if min_size is None else min_size
+        self.max_size = max(1, config.INSTANCEPOOL_SIZE if size is None else size, self.min_size)
+        self.idle_timeout = config.INSTANCEPOOL_IDLETIMEOUT if idle_timeout is None else idle_timeout
+        self.condition = threading.Condition()
+        self.idle = collections.deque()     # (instance, time it was given back), the most recently used one is at the end
+        self.size = 0       # number of instances, idle or checked out
+        for _ in range(self.min_size):
+            self.idle.append((_create_instance(clazz, creator), time.time()))
+            self.size += 1
+
+    def acquire(self):
+        """check out an instance, waits for one to become available if the pool is at its maximum size"""
+        with self.condition:
+            while not self.idle and self.size >= self.max_size:
+                if not self.condition.wait(config.COMMTIMEOUT or None):
+                    raise errors.DaemonError("no free instance of %s available in the instance pool" % self.clazz.__name__)
+            if self.idle:
+                return self.idle.pop()[0]
+            self.size += 1
+        try:
+            log.debug("instancemode pool: creating new pyro object for %s", self.clazz)
+            return _create_instance(self.clazz, self.creator)
+        except Exception:
+            with self.condition:
+                self.size -= 1
+                self.condition.notify()
+            raise
+
+    def release(self, instance):
+        """give a checked out instance back to the pool"""
+        with self.condition:
+            self.idle.append((instance, time.time()))
+            self.condition.notify()
+
+    def evict_idle(self):
+        """discard the instances above the minimum pool size that have been idle for too long"""
+        if self.idle_timeout <= 0:
+            return
+        deadline = time.time() - self.idle_timeout
+        with self.condition:
+            while self.size > self.min_size and self.idle and self.idle[0][1] < deadline:
+                self.idle.popleft()
+                self.size -= 1
+
+    def stats(self):
+        """the number of instances in the pool, and how many of those are idle"""
+        with self.condition:
+            return {"size": self.size, "idle": len(self.idle)}
+
+
 @expose
 class DaemonObject(object):
     """The part of the daemon that is exposed as a Pyro object."""
@@ -180,17 +310,50 @@ class DaemonObject(object):
         client, timestamp, linger_timestamp, stream = self.daemon.streaming_responses[streamId]
         if client is None:
             # reset client connection association (can be None if proxy disconnected)
-            self.daemon.streaming_responses[streamId] = (current_context.client, timestamp, 0, stream)
+            self.daemon._addStream(streamId, (current_context.client, timestamp, 0, stream))
         try:
             return next(stream)
         except Exception:
             # in case of error (or StopIteration!) the stream is removed
-            del self.daemon.streaming_responses[streamId]
+            self.daemon._removeStream(streamId)
             raise
 
+    def get_next_stream_items(self, streamId, count, max_size=0):
+        """
+        Returns a chunk of the next items of the stream: at most count items, and (if max_size is given) stops adding
+        items when their total (estimated) size in bytes exceeds max_size. If the stream ends or fails after the first
+        item, that is reported by the next call instead, so that the items of this chunk are not lost.
+        """
+        items = [self.get_next_stream_item(streamId)]
+        size = 0
+        while len(items) < count:
+            if max_size:
+                size += _estimated_size(items[-1])
+                if size >= max_size:
+                    break
+            info = self.daemon.streaming_responses.get(streamId)
+            try:
+                items.append(self.get_next_stream_item(streamId))
+            except Exception as x:
+                if info:
+                    self.daemon._addStream(streamId, info[:3] + (_stream_end(x),))
+                break
+        return items
+
+    def get_stream_items(self, streamId, count):
+        """
+        Pushes the next count items of the stream to the client, each in its own result message
+        (so the client doesn't have to do a call for every item). The last item is the result of this call.
+        An exception (StopIteration at the end of the stream) is the final message, even if it comes earlier.
+        """
+        # the items are sent in quick succession, they must not wait for Nagle's algorithm
+        socketutil.set_nodelay(current_context.client.sock)
+        for _ in range(count - 1):
+            self.daemon._sendStreamItem(self.get_next_stream_item(streamId))
+        return self.get_next_stream_item(streamId)
+
     def close_stream(self, streamId):
-        if streamId in self.daemon.streaming_responses:
-            del self.daemon.streaming_responses[streamId]
+        self.daemon._removeStream(streamId)
 
 
 class Daemon(object):
@@ -232,6 +395,9 @@ class Daemon(object):
             elif config.SERVERTYPE == "multiplex":
                 from .svr_multiplex import SocketServer_Multiplex
                 self.transportServer = SocketServer_Multiplex()
+            elif config.SERVERTYPE == "asyncio":
+                from .svr_asyncio import SocketServer_Asyncio
+                self.transportServer = SocketServer_Asyncio()
             else:
                 raise errors.PyroError("invalid server type '%s'" % config.SERVERTYPE)
             self.transportServer.init(self, host, port, unixsocket)
@@ -250,12 +416,24 @@ class Daemon(object):
         pyroObject._pyroId = core.DAEMON_NAME
         # Dictionary from Pyro object id to the actual Pyro object registered by this id
         self.objectsById = {pyroObject._pyroId: pyroObject}
+        self._registrations = 0     # changes every time an object is registered or unregistered
         log.debug("pyro protocol version: %d", protocol.PROTOCOL_VERSION)
         self._pyroInstances = {}   # pyro objects for instance_mode=single (singletons, just one per daemon)
+        self._pyroInstancePools = {}   # instance pools for instance_mode=pool, per class
         self.streaming_responses = {}   # stream_id -> (client, creation_timestamp, linger_timestamp, stream)
+        self._streams_by_client = {}    # client -> set of stream_ids
+        self._streams_lifetime_heap = []    # (creation_timestamp, stream_id)
+        self._streams_linger_heap = []      # (linger_timestamp, stream_id)
+        self._streams_pooled = {}   # stream_id -> (class, instance) checked out of an instance pool for as long as the stream lives
+        self._streams_lock = threading.RLock()
         self.housekeeper_lock = threading.Lock()
         self._disconnect_lock = threading.Lock()
         self.create_single_instance_lock = threading.Lock()
+        self.process_executor = None    # can be set to a custom (process pool) executor to run the @process_pool methods in
+        self._process_executor_lock = threading.Lock()
+        self.batch_executor = None    # can be set to a custom executor to run the calls of parallel batches in
+        self._batch_executor_lock = threading.Lock()
+        self.oneway_executor = OnewayCallExecutor(self, config.ONEWAY_THREADS, config.ONEWAY_QUEUE_SIZE, config.ONEWAY_OVERFLOW)
         self.__mustshutdown.clear()
         self.methodcall_error_handler = _default_methodcall_error_handler
 
@@ -296,6 +474,22 @@ class Daemon(object):
             self.__loopstopped.set()
         log.debug("daemon exits requestloop")
 
+    async def requestLoopAsync(self, loopCondition=lambda: True) -> None:
+        """
+        Coroutine version of the requestLoop, that serves requests from within an already running asyncio event loop.
+        This requires the asyncio server type (``SERVERTYPE = "asyncio"``).
+        """
+        if not hasattr(self.transportServer, "loop_async"):
+            raise errors.PyroError("the request loop can only run in an asyncio event loop with the asyncio server type")
+        self.__mustshutdown.clear()
+        log.info("daemon %s entering asyncio requestloop", self.locationStr)
+        try:
+            self.__loopstopped.clear()
+            await self.transportServer.loop_async(loopCondition=lambda: not self.__mustshutdown.is_set() and loopCondition())
+        finally:
+            self.__loopstopped.set()
+        log.debug("daemon exits requestloop")
+
     def events(self, eventsockets):
         """for use in an external event loop: handle any requests that are pending for this daemon"""
         return self.transportServer.events(eventsockets)
@@ -303,7 +497,7 @@ class Daemon(object):
     def shutdown(self):
         """Cleanly terminate a daemon that is running in the requestloop."""
         log.debug("daemon shutting down")
-        self.streaming_responses = {}
+        self._removeAllStreams()
         time.sleep(0.02)
         self.__mustshutdown.set()
         if self.transportServer:
@@ -343,6 +537,8 @@ class Daemon(object):
             serializer_id = msg.serializer_id
             serializer = serializers.serializers_by_id[serializer_id]
             data = serializer.loads(msg.data)
+            conn.session = ClientSession(conn, serializer_id, current_context.correlation_id)
+            conn.session.handshake = data["handshake"]
             handshake_response = self.validateHandshake(conn, data["handshake"])
             handshake_response = {
                 "handshake": handshake_response,
@@ -363,7 +559,7 @@ class Daemon(object):
         msg = protocol.SendingMessage(msgtype, 0, msg_seq, serializer_id, data, annotations=self.__annotations())
         if config.LOGWIRE:
             protocol.log_wiredata(log, "daemon handshake response", msg)
-        conn.send(msg.data)
+        conn.send(msg.chunks)
         return msg.type == protocol.MSG_CONNECTOK
 
     def validateHandshake(self, conn, data):
@@ -387,25 +583,31 @@ class Daemon(object):
         wraps it in a reply to the calling side, as to not make this server side loop
         terminate due to exceptions caused by remote invocations.
         """
-        request_flags = 0
-        request_seq = 0
-        request_serializer_id = serializers.MarshalSerializer.serializer_id
-        wasBatched = False
-        isCallback = False
         try:
             msg = protocol.recv_stub(conn, [protocol.MSG_INVOKE, protocol.MSG_PING])
         except errors.CommunicationError as x:
             # we couldn't even get data from the client, this is an immediate error
             # log.info("error receiving data from client %s: %s", conn.sock.getpeername(), x)
             raise x
+        self._handleRequestMessage(conn, msg)
+
+    def _handleRequestMessage(self, conn, msg, call=None):
+        """
+        Handle a received request message, see :meth:`handleRequest`.
+        If the transport server already had to deserialize the call, it passes it on as
+        the tuple (objectId, method, vargs, kwargs), so that it isn't deserialized again.
+        """
+        request_flags = msg.flags
+        request_seq = msg.seq
+        request_serializer_id = msg.serializer_id
+        wasBatched = False
+        isCallback = False
+        isSerialized = False
+        call_data = None
+        pooled = None   # (class, instance) when the instance was checked out of an instance pool
+        chunks = None   # reads the continuation frames with the data of a ChunkedData argument
         try:
-            request_flags = msg.flags
-            request_seq = msg.seq
-            request_serializer_id = msg.serializer_id
-            if msg.flags & protocol.FLAGS_CORR_ID:
-                current_context.correlation_id = uuid.UUID(bytes=msg.corr_id)
-            else:
-                current_context.correlation_id = uuid.uuid4()
+            self._setCallContext(conn, msg)
             if config.LOGWIRE:
                 protocol.log_wiredata(log, "daemon wiredata received", msg)
             if msg.type == protocol.MSG_PING:
@@ -413,44 +615,55 @@ class Daemon(object):
                 msg = protocol.SendingMessage(protocol.MSG_PING, 0, msg.seq, msg.serializer_id, b"pong", annotations=self.__annotations())
                 if config.LOGWIRE:
                     protocol.log_wiredata(log, "daemon wiredata sending", msg)
-                conn.send(msg.data)
+                conn.send(msg.chunks)
                 return
+            if request_flags & protocol.FLAGS_CHUNKED:
+                chunks = protocol.ChunkReader(conn, msg.seq)
             serializer = serializers.serializers_by_id[msg.serializer_id]
-            if request_flags & protocol.FLAGS_KEEPSERIALIZED:
+            if call is not None:
+                objId, method, vargs, kwargs = call
+            elif request_flags & protocol.FLAGS_KEEPSERIALIZED:
                 # pass on the wire protocol message blob unchanged
                 objId, method, vargs, kwargs = self.__deserializeBlobArgs(msg)
             else:
                 # normal deserialization of remote call arguments
                 objId, method, vargs, kwargs = serializer.loadsCall(msg.data)
-            current_context.client = conn
-            try:
-                # store, because on oneway calls, socket will be disconnected:
-                current_context.client_sock_addr = conn.sock.getpeername()
-            except socket.error:
-                current_context.client_sock_addr = None  # sometimes getpeername() doesn't work...
-            current_context.seq = msg.seq
-            current_context.annotations = msg.annotations
-            current_context.msg_flags = msg.flags
-            current_context.serializer_id = msg.serializer_id
+            if chunks:
+                # the method reads the data of the ChunkedData argument from the connection while it consumes it
+                protocol.attach_chunked_data(list(vargs) + list(kwargs.values()), chunks)
+            elif not request_flags & (protocol.FLAGS_KEEPSERIALIZED | protocol.FLAGS_BATCH):
+                call_data = msg.data    # in case the call has to be passed on to the process pool
             del msg  # invite GC to collect the object, don't wait for out-of-scope
             obj = _unpack_weakref(self.objectsById.get(objId))
             if obj is not None:
                 if inspect.isclass(obj):
-                    obj = self._getInstance(obj, conn)
+                    clazz, obj = obj, self._getInstance(obj, conn)
+                    if clazz._pyroInstancing[0] == "pool":
+                        pooled = (clazz, obj)
                 if request_flags & protocol.FLAGS_BATCH:
-                    # batched method calls, loop over them all and collect all results
-                    data = []
-                    for method, vargs, kwargs in vargs:
-                        method = _get_attribute(obj, method)
-                        try:
-                            result = method(*vargs, **kwargs)  # this is the actual method call to the Pyro object
-                        except Exception as xv:
-                            self.methodcall_error_handler(self, current_context.client_sock_addr, method, vargs, kwargs, xv)
-                            xv._pyroTraceback = errors.format_traceback(detailed=config.DETAILED_TRACEBACK)
-                            data.append(core._ExceptionWrapper(xv))
-                            break  # stop processing the rest of the batch
-                        else:
-                            data.append(result)    # note that we don't support streaming results in batch mode
+                    # batched method calls, execute them all and collect all results (in order)
+                    # note that we don't support streaming results in batch mode
+                    batch_options = bytes(current_context.annotations.get("BTCH", b"")).decode().split(",")
+                    stop_on_error = "all" not in batch_options
+                    if "parallel" in batch_options and len(vargs) > 1:
+                        if stop_on_error:
+                            for method, _, _ in vargs:
+                                _get_exposed_method(obj, method)    # don't start the batch if it calls an unknown method
+                        pool = None
+                        if pooled:
+                            # every call in the batch checks out its own instance from the pool
+                            self._releaseInstance(*pooled)
+                            pool, pooled = self._instancePool(pooled[0]), None
+                        data = self._parallelBatch(obj, vargs, stop_on_error, pool)
+                    else:
+                        data = []
+                        for method, vargs, kwargs in vargs:
+                            if stop_on_error:
+                                _get_exposed_method(obj, method)    # an unknown method fails the whole batch call
+                            result = self._batchCall(obj, method, vargs, kwargs)
+                            data.append(result)
+                            if stop_on_error and isinstance(result, core._ExceptionWrapper):
+                                break  # stop processing the rest of the batch
                     wasBatched = True
                 else:
                     # normal single method call
@@ -458,87 +671,226 @@ class Daemon(object):
                         # special case for direct attribute access (only exposed @properties are accessible)
                         data = _get_exposed_property_value(obj, vargs[0])
                         if not request_flags & protocol.FLAGS_ONEWAY:
-                            isStream, data = self._streamResponse(data, conn)
+                            isStream, data = self._streamResponse(data, conn, pooled)
                             if isStream:
-                                # throw an exception as well as setting message flags
-                                # this way, it is backwards compatible with older pyro versions.
-                                exc = errors.ProtocolError("result of call is an iterator")
-                                ann = {"STRM": data.encode()} if data else {}
-                                self._sendExceptionResponse(conn, request_seq, serializer.serializer_id, exc, None,
-                                                            annotations=ann, flags=protocol.FLAGS_ITEMSTREAMRESULT)
+                                if data:
+                                    pooled = None   # the instance is given back when the stream is removed
+                                self._sendStreamResponse(conn, request_seq, serializer.serializer_id, data)
                                 return
                     elif method == "__setattr__":
                         # special case for direct attribute access (only exposed @properties are accessible)
                         data = _set_exposed_property_value(obj, vargs[0], vargs[1])
                     else:
-                        method = _get_attribute(obj, method)
-                        if request_flags & protocol.FLAGS_ONEWAY:
-                            # oneway call to be run inside its own thread, otherwise client blocking can still occur
+                        method, dispatch = _lookup_exposed_method(obj, method)
+                        if not dispatch.processpool and not getattr(obj, "_pyroProcessPool", False):
+                            call_data = None
+                        if call_data is not None:
+                            # pass the call on to the process pool. Arguments and result remain serialized.
+                            future = self._processPoolCall(obj, method, serializer, call_data)
+                            call_data = None
+                            if request_flags & protocol.FLAGS_ONEWAY:
+                                future.add_done_callback(functools.partial(self._processPoolOnewayDone, method, vargs, kwargs,
+                                                                           current_context.client_sock_addr))
+                            else:
+                                try:
+                                    data = future.result()
+                                except Exception as xv:
+                                    self.methodcall_error_handler(self, current_context.client_sock_addr, method, vargs, kwargs, xv)
+                                    raise
+                                isSerialized = True
+                        elif request_flags & protocol.FLAGS_ONEWAY and not chunks:
+                            # oneway call to be run inside another thread, otherwise client blocking can still occur
                             #    on the next call on the same proxy
-                            _OnewayCallThread(method, vargs, kwargs, self, current_context.client_sock_addr).start()
+                            done = functools.partial(self._releaseInstance, *pooled) if pooled else None
+                            pooled = None   # the oneway call gives the instance back when it's done
+                            self.oneway_executor.submit(method, vargs, kwargs, current_context.client_sock_addr, done)
                         else:
-                            isCallback = getattr(method, "_pyroCallback", False)
+                            isCallback = dispatch.callback
                             try:
                                 data = method(*vargs, **kwargs)  # this is the actual method call to the Pyro object
                             except Exception as xv:
                                 self.methodcall_error_handler(self, current_context.client_sock_addr, method, vargs, kwargs, xv)
                                 raise
+                            finally:
+                                if chunks:
+                                    chunks.drain()  # skip the data that the method didn't read
                             if not request_flags & protocol.FLAGS_ONEWAY:
-                                isStream, data = self._streamResponse(data, conn)
+                                isStream, data = self._streamResponse(data, conn, pooled)
                                 if isStream:
-                                    # throw an exception as well as setting message flags
-                                    # this way, it is backwards compatible with older pyro versions.
-                                    exc = errors.ProtocolError("result of call is an iterator")
-                                    ann = {"STRM": data.encode()} if data else {}
-                                    self._sendExceptionResponse(conn, request_seq, serializer.serializer_id, exc, None,
-                                                                annotations=ann, flags=protocol.FLAGS_ITEMSTREAMRESULT)
+                                    if data:
+                                        pooled = None   # the instance is given back when the stream is removed
+                                    self._sendStreamResponse(conn, request_seq, serializer.serializer_id, data)
                                     return
             else:
                 log.debug("unknown object requested: %s", objId)
                 raise errors.DaemonError("unknown object")
+            if chunks:
+                chunks.drain()
             if request_flags & protocol.FLAGS_ONEWAY:
                 return  # oneway call, don't send a response
             else:
-                data = serializer.dumps(data)
-                response_flags = 0
-                if wasBatched:
-                    response_flags |= protocol.FLAGS_BATCH
-                msg = protocol.SendingMessage(protocol.MSG_RESULT, response_flags, request_seq, serializer.serializer_id, data,
-                                              annotations=self.__annotations())
-                current_context.response_annotations = {}
-                if config.LOGWIRE:
-                    protocol.log_wiredata(log, "daemon wiredata sending", msg)
-                conn.send(msg.data)
+                self._sendResponse(conn, request_seq, serializer, data, protocol.FLAGS_BATCH if wasBatched else 0, isSerialized)
         except Exception as xv:
-            msg = getattr(xv, "pyroMsg", None)
-            if msg:
-                request_seq = msg.seq
-                request_serializer_id = msg.serializer_id
-            if not isinstance(xv, errors.ConnectionClosedError):
-                if not request_flags & protocol.FLAGS_ONEWAY:
-                    if isinstance(xv, errors.SerializeError) or not isinstance(xv, errors.CommunicationError):
-                        # only return the error to the client if it wasn't a oneway call, and not a communication error
-                        # (in these cases, it makes no sense to try to report the error back to the client...)
-                        tblines = errors.format_traceback(detailed=config.DETAILED_TRACEBACK)
-                        self._sendExceptionResponse(conn, request_seq, request_serializer_id, xv, tblines)
+            if chunks and not isinstance(xv, errors.CommunicationError):
+                chunks.drain()
+            self._sendErrorResponse(conn, request_flags, request_seq, request_serializer_id, xv)
             if isCallback or isinstance(xv, (errors.CommunicationError, errors.SecurityError)):
                 raise  # re-raise if flagged as callback, communication or security error.
+        finally:
+            if pooled:
+                self._releaseInstance(*pooled)
+
+    def _setCallContext(self, conn, msg):
+        """Set up the call context of the current thread for handling the request message from the connection."""
+        session = getattr(conn, "session", None)
+        if session is None:
+            session = conn.session = ClientSession(conn, msg.serializer_id)
+        if msg.flags & protocol.FLAGS_CORR_ID:
+            current_context.correlation_id = uuid.UUID(bytes=msg.corr_id)
+        else:
+            current_context.correlation_id = session.call_correlation_id()
+        if current_context.client is not conn:
+            # only changes when this thread handles a request from another connection than the previous one
+            current_context.client = conn
+            current_context.client_sock_addr = session.sock_addr
+        current_context.seq = msg.seq
+        current_context.annotations = msg.annotations
+        current_context.msg_flags = msg.flags
+        current_context.serializer_id = msg.serializer_id
+
+    def _sendResponse(self, conn, seq, serializer, data, flags=0, serialized=False):
+        """Send the result of a call. A ChunkedData result is sent in continuation frames after the response message."""
+        chunked_result = None
+        if not serialized:
+            if isinstance(data, protocol.ChunkedData):
+                chunked_result, data = data, protocol._chunked_placeholder
+                flags |= protocol.FLAGS_CHUNKED
+            data = serializer.dumps(data)
+        msg = protocol.SendingMessage(protocol.MSG_RESULT, flags, seq, serializer.serializer_id, data,
+                                      annotations=self.__annotations())
+        current_context.response_annotations = {}
+        if config.LOGWIRE:
+            protocol.log_wiredata(log, "daemon wiredata sending", msg)
+        conn.send(msg.chunks)
+        if chunked_result:
+            self._sendChunkedResult(conn, seq, serializer, chunked_result)
+
+    def _sendStreamResponse(self, conn, seq, serializer_id, streamId):
+        """Tell the client that the result of its call is an item stream with the given id."""
+        # throw an exception as well as setting message flags
+        # this way, it is backwards compatible with older pyro versions.
+        exc = errors.ProtocolError("result of call is an iterator")
+        ann = {"STRM": streamId.encode()} if streamId else {}
+        self._sendExceptionResponse(conn, seq, serializer_id, exc, None, annotations=ann, flags=protocol.FLAGS_ITEMSTREAMRESULT)
+
+    def _sendErrorResponse(self, conn, request_flags, seq, serializer_id, exc_value):
+        """Report the exception that occurred while handling a request back to the client, when that makes sense."""
+        msg = getattr(exc_value, "pyroMsg", None)
+        if msg:
+            seq = msg.seq
+            serializer_id = msg.serializer_id
+        if not isinstance(exc_value, errors.ConnectionClosedError):
+            if not request_flags & protocol.FLAGS_ONEWAY:
+                if isinstance(exc_value, errors.SerializeError) or not isinstance(exc_value, errors.CommunicationError):
+                    # only return the error to the client if it wasn't a oneway call, and not a communication error
+                    # (in these cases, it makes no sense to try to report the error back to the client...)
+                    tblines = errors.format_traceback(detailed=config.DETAILED_TRACEBACK)
+                    self._sendExceptionResponse(conn, seq, serializer_id, exc_value, tblines)
+
+    def _sendChunkedResult(self, conn, seq, serializer, chunked):
+        """
+        Send the data of a ChunkedData result in continuation frames, following the response message.
+        A transport server whose request loop can't wait for a slow client, lets the connection hand this to a worker thread.
+        """
+        send = functools.partial(self.__sendChunked, conn, seq, serializer, chunked)
+        defer_send = getattr(conn, "defer_send", None)
+        if defer_send is None or not defer_send(send):
+            send()
+
+    def __sendChunked(self, conn, seq, serializer, chunked):
+        try:
+            protocol.send_chunked(conn, seq, serializer.serializer_id, chunked)
+        except errors.CommunicationError:
+            raise
+        except Exception as x:
+            # the response has already been sent, the client only learns that the transfer was aborted
+            log.warning("error while sending chunked result data: %s", x)
+        finally:
+            chunked.close()
+
+    def _batchCall(self, obj, method, vargs, kwargs, pool=None):
+        """Execute a single call of a batch. Returns the result, or the wrapped exception if the call failed."""
+        if pool:
+            obj = pool.acquire()
+        try:
+            method = _get_exposed_method(obj, method)
+            return method(*vargs, **kwargs)  # this is the actual method call to the Pyro object
+        except Exception as xv:
+            if callable(method):
+                self.methodcall_error_handler(self, current_context.client_sock_addr, method, vargs, kwargs, xv)
+            xv._pyroTraceback = errors.format_traceback(detailed=config.DETAILED_TRACEBACK)
+            return core._ExceptionWrapper(xv)
+        finally:
+            if pool:
+                pool.release(obj)
+
+    def _parallelBatchCall(self, context, obj, method, vargs, kwargs, pool):
+        current_context.from_global(context)
+        return self._batchCall(obj, method, vargs, kwargs, pool)
+
+    def _parallelBatch(self, obj, calls, stop_on_error, pool=None):
+        """
+        Execute the calls of a batch concurrently in the batch executor, and return their results in the original order.
+        When stop_on_error is set, the results end with the first failed call, and calls that haven't been started yet
+        at that time are cancelled. (Calls after the failed one may still have been executed, though.)
+        """
+        with self._batch_executor_lock:
+            if self.batch_executor is None:
+                self.batch_executor = concurrent.futures.ThreadPoolExecutor(max_workers=config.BATCH_THREADS,
+                                                                            thread_name_prefix="Pyro-batch-call")
+        context = current_context.to_global()
+        futures = [self.batch_executor.submit(self._parallelBatchCall, context, obj, method, vargs, kwargs, pool)
+                   for method, vargs, kwargs in calls]
+        results = []
+        for index, future in enumerate(futures):
+            result = future.result()
+            results.append(result)
+            if stop_on_error and isinstance(result, core._ExceptionWrapper):
+                for remaining in futures[index + 1:]:
+                    remaining.cancel()
+                break
+        return results
+
+    def _processPoolCall(self, obj, method, serializer, call_data):
+        with self._process_executor_lock:
+            if self.process_executor is None:
+                self.process_executor = concurrent.futures.ProcessPoolExecutor(max_workers=config.PROCESSPOOL_SIZE or None)
+        clazz = obj if inspect.isclass(obj) else type(obj)
+        instance_creator = getattr(clazz, "_pyroInstancing", (None, None))[1]
+        return self.process_executor.submit(_process_pool_call, clazz, instance_creator, method.__name__,
+                                            serializer.serializer_id, bytes(call_data))
+
+    def _processPoolOnewayDone(self, method, vargs, kwargs, client_sock_addr, future):
+        xv = future.exception()
+        if xv is not None:
+            self.methodcall_error_handler(self, client_sock_addr, method, vargs, kwargs, xv)
 
     def _clientDisconnect(self, conn):
         with self._disconnect_lock:
-            if config.ITER_STREAM_LINGER > 0:
-                # client goes away, keep streams around for a bit longer (allow reconnect)
-                for streamId in list(self.streaming_responses):
-                    info = self.streaming_responses.get(streamId, None)
-                    if info and info[0] is conn:
-                        _, timestamp, _, stream = info
-                        self.streaming_responses[streamId] = (None, timestamp, time.time(), stream)
-            else:
-                # client goes away, close any streams it had open as well
-                for streamId in list(self.streaming_responses):
-                    info = self.streaming_responses.get(streamId, None)
-                    if info and info[0] is conn:
-                        del self.streaming_responses[streamId]
+            with self._streams_lock:
+                streams = self._streams_by_client.pop(conn, ())
+                if config.ITER_STREAM_LINGER > 0:
+                    # client goes away, keep streams around for a bit longer (allow reconnect)
+                    now = time.time()
+                    for streamId in streams:
+                        info = self.streaming_responses.get(streamId, None)
+                        if info and info[0] is conn:
+                            _, timestamp, _, stream = info
+                            self._addStream(streamId, (None, timestamp, now, stream))
+                else:
+                    # client goes away, close any streams it had open as well
+                    for streamId in streams:
+                        self._removeStream(streamId)
         self.clientDisconnect(conn)  # user overridable hook
 
     def _housekeeping(self):
@@ -548,23 +900,14 @@ class Daemon(object):
         if self._shutting_down:
             return
         with self.housekeeper_lock:
-            if self.streaming_responses:
-                if config.ITER_STREAM_LIFETIME > 0:
-                    # cleanup iter streams that are past their lifetime
-                    for streamId in list(self.streaming_responses.keys()):
-                        info = self.streaming_responses.get(streamId, None)
-                        if info:
-                            last_use_period = time.time() - info[1]
-                            if 0 < config.ITER_STREAM_LIFETIME < last_use_period:
-                                del self.streaming_responses[streamId]
-                if config.ITER_STREAM_LINGER > 0:
-                    # cleanup iter streams that are past their linger time
-                    for streamId in list(self.streaming_responses.keys()):
-                        info = self.streaming_responses.get(streamId, None)
-                        if info and info[2]:
-                            linger_period = time.time() - info[2]
-                            if linger_period > config.ITER_STREAM_LINGER:
-                                del self.streaming_responses[streamId]
+            if self._streams_lifetime_heap:
+                # cleanup iter streams that are past their lifetime (only the expired ones are visited)
+                self._expireStreams(self._streams_lifetime_heap, 1, config.ITER_STREAM_LIFETIME or float("inf"))
+            if self._streams_linger_heap:
+                # cleanup iter streams that are past their linger time
+                self._expireStreams(self._streams_linger_heap, 2, config.ITER_STREAM_LINGER)
+            for pool in list(self._pyroInstancePools.values()):
+                pool.evict_idle()
             self.housekeeping()
 
     def housekeeping(self):
@@ -576,19 +919,10 @@ class Daemon(object):
 
     def _getInstance(self, clazz, conn):
         """
-        Find or create a new instance of the class
+        Find or create a new instance of the class.
+        With instance mode "pool", the instance is checked out of the pool and has to be given back
+        with _releaseInstance once the call is done.
         """
-        def createInstance(clazz, creator):
-            try:
-                if creator:
-                    obj = creator(clazz)
-                    if isinstance(obj, clazz):
-                        return obj
-                    raise TypeError("instance creator returned object of different type")
-                return clazz()
-            except Exception:
-                log.exception("could not create pyro object instance")
-                raise
         instance_mode, instance_creator = clazz._pyroInstancing
         if instance_mode == "single":
             # create and use one singleton instance of this class (not a global singleton, just exactly one per daemon)
@@ -596,7 +930,7 @@ class Daemon(object):
                 instance = self._pyroInstances.get(clazz)
                 if not instance:
                     log.debug("instancemode %s: creating new pyro object for %s", instance_mode, clazz)
-                    instance = createInstance(clazz, instance_creator)
+                    instance = _create_instance(clazz, instance_creator)
                     self._pyroInstances[clazz] = instance
                 return instance
         elif instance_mode == "session":
@@ -606,16 +940,35 @@ class Daemon(object):
             instance = conn.pyroInstances.get(clazz)
             if not instance:
                 log.debug("instancemode %s: creating new pyro object for %s", instance_mode, clazz)
-                instance = createInstance(clazz, instance_creator)
+                instance = _create_instance(clazz, instance_creator)
                 conn.pyroInstances[clazz] = instance
             return instance
         elif instance_mode == "percall":
             # create and use a new instance just for this call
             log.debug("instancemode %s: creating new pyro object for %s", instance_mode, clazz)
-            return createInstance(clazz, instance_creator)
+            return _create_instance(clazz, instance_creator)
+        elif instance_mode == "pool":
+            # check out an instance from the pool of instances of this class, for exclusive use by this call
+            return self._instancePool(clazz).acquire()
         else:
             raise errors.DaemonError("invalid instancemode in registered class")
 
+    def _instancePool(self, clazz):
+        pool = self._pyroInstancePools.get(clazz)
+        if pool is None:
+            with self.create_single_instance_lock:
+                pool = self._pyroInstancePools.get(clazz)
+                if pool is None:
+                    log.debug("instancemode pool: creating instance pool for %s", clazz)
+                    size, min_size, idle_timeout = getattr(clazz, "_pyroInstancePool", (None, None, None))
+                    pool = self._pyroInstancePools[clazz] = InstancePool(clazz, clazz._pyroInstancing[1],
+                                                                         size, min_size, idle_timeout)
+        return pool
+
+    def _releaseInstance(self, clazz, instance):
+        """give an instance that was checked out by _getInstance (instance mode "pool") back to its pool"""
+        self._pyroInstancePools[clazz].release(instance)
+
     def _sendExceptionResponse(self, connection, seq, serializer_id, exc_value, tbinfo, flags=0, annotations=None):
         """send an exception back including the local traceback info"""
         exc_value._pyroTraceback = tbinfo
@@ -635,7 +988,7 @@ class Daemon(object):
         msg = protocol.SendingMessage(protocol.MSG_RESULT, flags, seq, serializer.serializer_id, data, annotations=annotations)
         if config.LOGWIRE:
             protocol.log_wiredata(log, "daemon wiredata sending (error response)", msg)
-        connection.send(msg.data)
+        connection.send(msg.chunks)
 
     def register(self, obj_or_class, objectId=None, force=False, weak=False):
         """
@@ -660,6 +1013,8 @@ class Daemon(object):
             if weak: raise TypeError("Classes cannot be registered with weak=True.")
             if not hasattr(obj_or_class, "_pyroInstancing"):
                 obj_or_class._pyroInstancing = ("session", None)
+            if obj_or_class._pyroInstancing[0] == "pool":
+                self._instancePool(obj_or_class)    # creates the minimum number of instances right away
         if not force:
             if hasattr(obj_or_class, "_pyroId") and obj_or_class._pyroId != "":  # check for empty string is needed for Cython
                 pyro_id = obj_or_class._pyroId
@@ -677,8 +1032,10 @@ class Daemon(object):
                 ser.register_type_replacement(obj_or_class, _pyro_obj_to_auto_proxy)
             else:
                 ser.register_type_replacement(type(obj_or_class), _pyro_obj_to_auto_proxy)
+        _get_dispatch_table(obj_or_class)   # build it now, rather than on the first call
         # register the object/class in the mapping
         self.objectsById[obj_or_class._pyroId] = obj_or_class if not weak else weakref.ref(obj_or_class)
+        self._registrations += 1
         if weak: weakref.finalize(obj_or_class,self.unregister,objectId)
         return self.uriFor(objectId)
 
@@ -700,6 +1057,7 @@ class Daemon(object):
             return
         if objectId in self.objectsById:
             del self.objectsById[objectId]
+            self._registrations += 1
             if objectOrId is not None:
                 del objectOrId._pyroId
                 del objectOrId._pyroDaemon
@@ -756,7 +1114,14 @@ class Daemon(object):
     def close(self):
         """Close down the server and release resources"""
         self.__mustshutdown.set()
-        self.streaming_responses = {}
+        self._removeAllStreams()
+        if self.process_executor is not None:
+            self.process_executor.shutdown(wait=False)
+            self.process_executor = None
+        if self.batch_executor is not None:
+            self.batch_executor.shutdown(wait=False)
+            self.batch_executor = None
+        self.oneway_executor.shutdown()
         if self.transportServer:
             log.debug("daemon closing")
             self.transportServer.close()
@@ -805,17 +1170,96 @@ class Daemon(object):
     def __setstate__(self, state):
         assert len(state) == 0
 
-    def _streamResponse(self, data, client):
+    def _streamResponse(self, data, client, pooled=None):
+        # When the stream comes from an instance that was checked out of an instance pool (pooled), that instance
+        # stays checked out until the stream is removed, because the stream still uses it.
         if isinstance(data, collections.abc.Iterator) or inspect.isgenerator(data):
             if config.ITER_STREAMING:
                 if type(data) in (type({}.keys()), type({}.values()), type({}.items())):
                     raise errors.PyroError("won't serialize or stream lazy dict iterators, convert to list yourself")
                 stream_id = str(uuid.uuid4())
-                self.streaming_responses[stream_id] = (client, time.time(), 0, data)
+                if config.ITER_STREAM_AHEAD > 0:
+                    data = _ReadAheadStream(data, config.ITER_STREAM_AHEAD, config.ITER_STREAM_AHEAD_BYTES)
+                if pooled:
+                    self._streams_pooled[stream_id] = pooled
+                self._addStream(stream_id, (client, time.time(), 0, data))
                 return True, stream_id
             return True, None
         return False, data
 
+    def _addStream(self, streamId, info):
+        # Adds (or replaces) a stream, and indexes it by its client and in the expiry heaps.
+        # The heaps are ordered by creation and linger timestamp. Their entries of streams that have been removed
+        # (or whose timestamp has changed) are simply skipped when they come up.
+        client, timestamp, linger_timestamp, _ = info
+        with self._streams_lock:
+            previous = self.streaming_responses.get(streamId)
+            if previous and previous[0] is not None and previous[0] is not client:
+                self._unindexStream(streamId, previous[0])
+            self.streaming_responses[streamId] = info
+            if client is not None:
+                self._streams_by_client.setdefault(client, set()).add(streamId)
+            if not previous or previous[1] != timestamp:
+                heapq.heappush(self._streams_lifetime_heap, (timestamp, streamId))
+            if linger_timestamp:
+                heapq.heappush(self._streams_linger_heap, (linger_timestamp, streamId))
+
+    def _unindexStream(self, streamId, client):
+        streams = self._streams_by_client.get(client)
+        if streams:
+            streams.discard(streamId)
+            if not streams:
+                del self._streams_by_client[client]
+
+    def _removeStream(self, streamId):
+        with self._streams_lock:
+            info = self.streaming_responses.pop(streamId, None)
+            if info and info[0] is not None:
+                self._unindexStream(streamId, info[0])
+            pooled = self._streams_pooled.pop(streamId, None)
+        if info and isinstance(info[3], _ReadAheadStream):
+            info[3].close()
+        if pooled:
+            self._releaseInstance(*pooled)
+
+    def _removeAllStreams(self):
+        with self._streams_lock:
+            streams, self.streaming_responses = self.streaming_responses, {}
+            pooled, self._streams_pooled = self._streams_pooled, {}
+            self._streams_by_client = {}
+            self._streams_lifetime_heap = []
+            self._streams_linger_heap = []
+        for info in streams.values():
+            if isinstance(info[3], _ReadAheadStream):
+                info[3].close()
+        for clazz, instance in pooled.values():
+            self._releaseInstance(clazz, instance)
+
+    def _expireStreams(self, heap, timestamp_index, period):
+        # removes the streams whose timestamp in the heap is more than period seconds ago
+        expired = time.time() - period
+        with self._streams_lock:
+            while heap and heap[0][0] < expired:
+                timestamp, streamId = heapq.heappop(heap)
+                info = self.streaming_responses.get(streamId)
+                if info and info[timestamp_index] == timestamp:
+                    self._removeStream(streamId)
+            if len(heap) > 2 * len(self.streaming_responses) + 100:
+                # too many entries of streams that are already gone, rebuild the heap
+                heap[:] = [(timestamp, streamId) for timestamp, streamId in heap
+                           if streamId in self.streaming_responses and self.streaming_responses[streamId][timestamp_index] == timestamp]
+                heapq.heapify(heap)
+
+    def _sendStreamItem(self, item):
+        # an item of a pushed item stream is sent as an extra result message of the call that is being processed
+        serializer = serializers.serializers_by_id[current_context.serializer_id]
+        msg = protocol.SendingMessage(protocol.MSG_RESULT, 0, current_context.seq, serializer.serializer_id, serializer.dumps(item),
+                                      annotations=self.__annotations())
+        current_context.response_annotations = {}
+        if config.LOGWIRE:
+            protocol.log_wiredata(log, "daemon wiredata sending", msg)
+        current_context.client.send(msg.chunks)
+
     def __deserializeBlobArgs(self, protocolmsg):
         import marshal
         blobinfo = protocolmsg.annotations["BLBI"]
@@ -857,6 +1301,135 @@ def serve(objects: Dict[Any, str], host: Optional[Union[str, ipaddress.IPv4Addre
         daemon.requestLoop()
 
 
+def serve_prefork(objects: Dict[Any, str], host: Optional[Union[str, ipaddress.IPv4Address, ipaddress.IPv6Address]] = None,
+                  port: int = 0, workers: int = 0, use_ns: bool = True, verbose: bool = True) -> None:
+    """
+    Like ``serve``, but forks a number of worker processes (default: one per cpu) that each run their own
+    daemon with the same objects, listening on the same address via SO_REUSEPORT. The OS then distributes the
+    connections over the workers, so that cpu-bound methods can use more than one core.
+    The calling process stays on as supervisor: it restarts workers that die, and registers the objects
+    in the name server just once for the whole group (all workers serve the same uris).
+    Every worker has its own copy of the objects, they don't share any state.
+    Must be called from the main thread, and only works on systems that have fork() and SO_REUSEPORT.
+    Returns when the supervisor process receives SIGINT or SIGTERM, after stopping the workers.
+    """
+    if not hasattr(os, "fork") or not hasattr(socket, "SO_REUSEPORT"):
+        raise errors.PyroError("pre-forked serving requires fork() and SO_REUSEPORT")
+    workers = workers or os.cpu_count() or 1
+    host = str(host) if host is not None else str(config.HOST)
+    # The supervisor keeps the address reserved for the workers. This socket is bound, but not listening,
+    # so the OS won't give it any connections. Binding it here also fixes the port number if port is 0.
+    family = socket.AF_INET6 if socketutil.get_ip_address(host).version == 6 else socket.AF_INET
+    reserved_sock = socket.socket(family, socket.SOCK_STREAM)
+    if config.SOCK_REUSE:
+        socketutil.set_reuseaddr(reserved_sock)
+    socketutil.set_reuseport(reserved_sock)
+    reserved_sock.bind((host, port))
+    port = reserved_sock.getsockname()[1]
+    location = "[%s]:%d" % (host, port) if ":" in host else "%s:%d" % (host, port)
+    # decide on the object ids here, so that every worker registers the objects under the same uris
+    ns = core.locate_ns() if use_ns else None
+    registrations = []
+    for obj, name in objects.items():
+        objectId = name if name and not ns else "obj_" + uuid.uuid4().hex
+        registrations.append((obj, objectId, name))
+    stop_signals = []
+    previous_handlers = {signum: signal.signal(signum, lambda signum, frame: stop_signals.append(signum))
+                         for signum in (signal.SIGINT, signal.SIGTERM)}
+    children = {}   # pid -> start time
+    try:
+        for _ in range(workers):
+            pid = _fork_prefork_worker(registrations, host, port, reserved_sock)
+            children[pid] = time.time()
+        log.info("pre-forked %d worker processes on %s", workers, location)
+        for obj, objectId, name in registrations:
+            uri = core.URI("PYRO:%s@%s" % (objectId, location))
+            if verbose:
+                print("Object {0}:\n    uri = {1}".format(repr(obj), uri))
+            if name and ns:
+                ns.register(name, uri)
+                if verbose:
+                    print("    name = {0}".format(name))
+        if ns:
+            ns._pyroRelease()   # don't let restarted workers inherit the connection
+        if verbose:
+            print("Pyro daemon running with {0} worker processes.".format(workers))
+        while not stop_signals:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+            if not pid:
+                time.sleep(0.2)
+                continue
+            started = children.pop(pid, None)
+            if started is None:
+                continue
+            log.warning("worker process %d exited with status %d, restarting it", pid, status)
+            if time.time() - started < 1.0:
+                time.sleep(1.0)     # don't restart a crashing worker over and over in a tight loop
+            pid = _fork_prefork_worker(registrations, host, port, reserved_sock)
+            children[pid] = time.time()
+    finally:
+        log.info("stopping the pre-forked worker processes")
+        for pid in children:
+            with contextlib.suppress(OSError):
+                os.kill(pid, signal.SIGTERM)
+        deadline = time.time() + max(config.POLLTIMEOUT, 1.0) + 3.0
+        while children and time.time() < deadline:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+            if pid:
+                children.pop(pid, None)
+            else:
+                time.sleep(0.1)
+        for pid in children:
+            log.warning("worker process %d didn't stop, killing it", pid)
+            with contextlib.suppress(OSError):
+                os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+        reserved_sock.close()
+        for signum, handler in previous_handlers.items():
+            signal.signal(signum, handler)
+        if ns:
+            for _, _, name in registrations:
+                if name:
+                    with contextlib.suppress(errors.CommunicationError):
+                        ns.remove(name)
+
+
+def _fork_prefork_worker(registrations, host, port, reserved_sock) -> int:
+    ready_recv, ready_send = os.pipe()
+    pid = os.fork()
+    if pid:
+        # wait until the worker is listening (or has failed), so that its uris are usable once we continue
+        os.close(ready_send)
+        try:
+            readable, _, _ = select.select([ready_recv], [], [], 10.0)
+            if not readable or not os.read(ready_recv, 1):
+                log.error("pre-forked worker process %d failed to start", pid)
+        finally:
+            os.close(ready_recv)
+        return pid
+    # this is the worker process, it must never return from this function
+    exitcode = 0
+    try:
+        os.close(ready_recv)
+        reserved_sock.close()
+        stop_signals = []
+        signal.signal(signal.SIGTERM, lambda signum, frame: stop_signals.append(signum))
+        signal.signal(signal.SIGINT, signal.SIG_IGN)    # ctrl-c is handled by the supervisor
+        config.SOCK_REUSEPORT = True
+        with Daemon(host, port) as daemon:
+            for obj, objectId, _ in registrations:
+                daemon.register(obj, objectId)
+            log.info("pre-forked worker process %d serving on %s", os.getpid(), daemon.locationStr)
+            os.write(ready_send, b"R")
+            os.close(ready_send)
+            daemon.requestLoop(lambda: not stop_signals)
+    except BaseException:
+        log.exception("pre-forked worker process %d crashed", os.getpid())
+        exitcode = 1
+    finally:
+        os._exit(exitcode)
+
+
 def _default_methodcall_error_handler(daemon: Daemon, client_sock: socketutil.SocketConnection,
                                       method: Callable, vargs: Sequence[Any], kwargs: Dict[str, Any],
                                       exception: Exception) -> None:
@@ -895,7 +1468,9 @@ def _get_attribute(obj: Any, attr: str) -> Any:
     raise AttributeError("attempt to access unexposed attribute '%s'" % attr)
 
 
+_DispatchEntry = collections.namedtuple("_DispatchEntry", "function bind callback processpool coroutine")
 __exposed_member_cache = {}     # type: Dict[Tuple[type, bool], Dict[str, Set[str]]]
+__dispatch_table_cache = {}     # type: Dict[type, Dict[str, _DispatchEntry]]
 
 
 def _reset_exposed_members(obj: Any, only_exposed: bool = True) -> None:
@@ -904,6 +1479,62 @@ def _reset_exposed_members(obj: Any, only_exposed: bool = True) -> None:
         obj = obj.__class__
     cache_key = (obj, only_exposed)
     __exposed_member_cache.pop(cache_key, None)
+    __dispatch_table_cache.pop(obj, None)
+
+
+def _get_dispatch_table(obj: Any) -> Dict[str, _DispatchEntry]:
+    """
+    Return the dispatch table of the given object's class (you can also provide a class directly).
+    It maps the name of every exposed method to a _DispatchEntry (function, bind, callback, processpool, coroutine),
+    where bind tells if the function still has to be bound to the instance to call it, and the other fields
+    tell if it is marked as @callback, should run in the process pool, or is an async method.
+    Methods that are not plain functions, static methods or class methods are not in the table.
+    """
+    if not inspect.isclass(obj):
+        obj = obj.__class__
+    table = __dispatch_table_cache.get(obj)
+    if table is None:
+        table = {}
+        for name in dir(obj):
+            if is_private_attribute(name):
+                continue
+            static = inspect.getattr_static(obj, name, None)
+            if isinstance(static, (staticmethod, classmethod)):
+                function, bind = getattr(obj, name), False
+            elif inspect.isfunction(static):
+                function, bind = static, True
+            else:
+                continue
+            if getattr(function, "_pyroExposed", False):
+                table[name] = _dispatch_entry(function, bind)
+        __dispatch_table_cache[obj] = table
+    return table
+
+
+def _dispatch_entry(function: Callable, bind: bool) -> _DispatchEntry:
+    return _DispatchEntry(function, bind, getattr(function, "_pyroCallback", False),
+                          getattr(function, "_pyroProcessPool", False), inspect.iscoroutinefunction(function))
+
+
+def _lookup_exposed_method(obj: Any, name: str) -> Tuple[Callable, _DispatchEntry]:
+    """
+    Resolves the name of an exposed method of the object, using the dispatch table of its class.
+    Returns the method (bound to the object if needed) and its dispatch table entry.
+    Falls back to _get_attribute for an instance attribute of that name, or things that aren't in the table
+    (this raises the appropriate error if it's not an exposed method).
+    """
+    entry = None
+    if name not in getattr(obj, "__dict__", ()):
+        entry = _get_dispatch_table(obj).get(name)
+    if entry is None:
+        method = _get_attribute(obj, name)
+        return method, _dispatch_entry(method, False)
+    return (entry.function.__get__(obj, obj.__class__) if entry.bind else entry.function), entry
+
+
+def _get_exposed_method(obj: Any, name: str) -> Any:
+    """Resolves the name of an exposed method of the object, see _lookup_exposed_method."""
+    return _lookup_exposed_method(obj, name)[0]
 
 
 def _get_exposed_members(obj: Any, only_exposed: bool = True) -> Dict[str, Set[str]]:
@@ -957,6 +1588,99 @@ def _get_exposed_members(obj: Any, only_exposed: bool = True) -> Dict[str, Set[s
     return result
 
 
+def _estimated_size(item):
+    # a quick estimate of the size in bytes of an item of a stream
+    return len(item) if isinstance(item, (bytes, bytearray, str)) else sys.getsizeof(item)
+
+
+class _ReadAheadStream(object):
+    """
+    Runs the iterator of an item stream ahead in a background thread, so that producing the items overlaps
+    with sending them to the client. At most max_items items (and max_size bytes, if given) are buffered.
+    The producer thread stops when the buffer is full, and a new one starts when half of it has been consumed.
+    """
+    def __init__(self, iterator, max_items, max_size=0):
+        self.iterator = iterator
+        self.max_items = max_items
+        self.max_size = max_size
+        self.buffer = collections.deque()   # (item, size)
+        self.size = 0
+        self.end = None     # the exception that ended the iterator (StopIteration, or an error)
+        self.producing = False
+        self.closed = False
+        self.lock = threading.Condition()
+        with self.lock:
+            self._produce_more()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        with self.lock:
+            while not self.buffer:
+                if self.end is not None:
+                    raise self.end
+                if self.closed:
+                    raise StopIteration
+                self._produce_more()
+                self.lock.wait()
+            item, size = self.buffer.popleft()
+            self.size -= size
+            if len(self.buffer) <= self.max_items // 2 and (not self.max_size or self.size <= self.max_size // 2):
+                self._produce_more()
+            return item
+
+    def close(self):
+        """stops producing items and releases the buffered items"""
+        with self.lock:
+            self.closed = True
+            self.buffer.clear()
+            self.size = 0
+            self.lock.notify_all()
+
+    def _full(self):
+        return len(self.buffer) >= self.max_items or (self.max_size and self.size >= self.max_size)
+
+    def _produce_more(self):
+        # must be called with the lock held
+        if not self.producing and not self.closed and self.end is None and not self._full():
+            self.producing = True
+            threading.Thread(target=self._produce, name="Pyro-stream-producer", daemon=True).start()
+
+    def _produce(self):
+        while True:
+            with self.lock:
+                if self.closed or self._full():
+                    self.producing = False
+                    return
+            try:
+                item = next(self.iterator)
+            except Exception as x:
+                with self.lock:
+                    self.end = x
+                    self.producing = False
+                    self.lock.notify_all()
+                return
+            size = _estimated_size(item) if self.max_size else 0
+            with self.lock:
+                if not self.closed:
+                    self.buffer.append((item, size))
+                    self.size += size
+                    self.lock.notify_all()
+
+
+def _stream_end(exception):
+    # a stream that only raises the given exception (the end of the stream or the error that it failed with)
+    if isinstance(exception, StopIteration):
+        return iter(())
+    return _raise_in_stream(exception)
+
+
+def _raise_in_stream(exception):
+    raise exception
+    yield
+
+
 def _unpack_weakref(obj: Any):
     """
     Unpack weak reference, or return the object itself, if not a weak reference.
@@ -999,25 +1723,136 @@ def _set_exposed_property_value(obj: Any, propname: str, value: Any, only_expose
     raise AttributeError("attempt to access unexposed or unknown remote attribute '%s'" % propname)
 
 
-class _OnewayCallThread(threading.Thread):
-    def __init__(self, pyro_method, vargs, kwargs, pyro_daemon, pyro_client_sock):
-        super(_OnewayCallThread, self).__init__(target=self._methodcall, name="oneway-call")
-        self.daemon = True
-        self.parent_context = current_context.to_global()
-        self.pyro_daemon = pyro_daemon
-        self.pyro_client_sock = pyro_client_sock
-        self.pyro_method = pyro_method
-        self.pyro_vargs = vargs
-        self.pyro_kwars = kwargs
+_process_pool_instances = {}    # type: Dict[type, Any]
 
-    def run(self):
-        current_context.from_global(self.parent_context)
-        super(_OnewayCallThread, self).run()
 
-    def _methodcall(self):
-        try:
-            self.pyro_method(*self.pyro_vargs, **self.pyro_kwars)
-        except Exception as xv:
-            self.pyro_daemon.methodcall_error_handler(self.pyro_daemon, self.pyro_client_sock,
-                                                      self.pyro_method, self.pyro_vargs, self.pyro_kwars,
-                                                      xv)
+def _process_pool_call(clazz, instance_creator, method_name, serializer_id, call_data):
+    """
+    Executes a @process_pool method call, inside a process pool worker process.
+    The call arguments are passed in, and the result is returned, in serialized form.
+    Every worker process creates its own instance of the class, once, to call the methods on.
+    """
+    instance = _process_pool_instances.get(clazz)
+    if instance is None:
+        instance = instance_creator(clazz) if instance_creator else clazz()
+        _process_pool_instances[clazz] = instance
+    serializer = serializers.serializers_by_id[serializer_id]
+    _, _, vargs, kwargs = serializer.loadsCall(call_data)
+    result = getattr(instance, method_name)(*vargs, **kwargs)
+    return serializer.dumps(result)
+
+
+class OnewayCallExecutor(object):
+    """
+    Executes the oneway method calls of a daemon in a bounded set of reusable worker threads.
+    Calls that can't be started right away wait in a bounded queue. What happens to a call when that queue is full
+    is determined by the overflow policy: "block" (wait for space, which stalls the client's connection),
+    "drop" (silently discard the call) or "reject" (discard the call and disconnect the client).
+    """
+    def __init__(self, pyro_daemon, max_workers, max_queued, overflow):
+        if overflow not in ("block", "drop", "reject"):
+            raise ValueError("invalid oneway overflow policy: " + str(overflow))
+        self.pyro_daemon = pyro_daemon
+        self.max_workers = max(1, max_workers)
+        self.max_queued = max_queued
+        self.overflow = overflow
+        self.lock = threading.Lock()
+        self.call_available = threading.Condition(self.lock)
+        self.space_available = threading.Condition(self.lock)
+        self.queue = collections.deque()
+        self.workers = 0
+        self.idle = 0
+        self.closed = False
+        self.queued_total = 0
+        self.completed = 0
+        self.dropped = 0
+        self.rejected = 0
+
+    def _full(self):
+        # the calls that no idle worker is going to pick up, count against the queue limit
+        return self.workers >= self.max_workers and len(self.queue) - self.idle >= self.max_queued
+
+    def submit(self, method, vargs, kwargs, client_sock_addr, done=None):
+        """
+        queue a oneway call, it will be executed by one of the worker threads in the current call context.
+        The optional done callable is called after the call has finished (or when it is not executed at all).
+        """
+        with self.lock:
+            if self._full():
+                if self.overflow == "drop":
+                    self.dropped += 1
+                    log.debug("oneway call queue is full, dropped call to %s", method.__name__)
+                    if done:
+                        done()
+                    return
+                elif self.overflow == "reject":
+                    self.rejected += 1
+                    if done:
+                        done()
+                    raise errors.CommunicationError("oneway call rejected: too many oneway calls queued")
+                while self._full() and not self.closed:
+                    self.space_available.wait()
+            if self.closed:
+                if done:
+                    done()
+                return
+            self.queue.append((method, vargs, kwargs, client_sock_addr, current_context.to_global(), done))
+            self.queued_total += 1
+            if len(self.queue) > self.idle and self.workers < self.max_workers:
+                self.workers += 1
+                self.idle += 1
+                worker = threading.Thread(target=self._work, name="Pyro-oneway-call")
+                worker.daemon = True
+                worker.start()
+            else:
+                self.call_available.notify()
+
+    def _work(self):
+        # a new worker thread is already counted as idle when it is started
+        while True:
+            with self.lock:
+                while not self.queue and not self.closed:
+                    self.call_available.wait()
+                self.idle -= 1
+                if self.closed:
+                    self.workers -= 1
+                    return
+                method, vargs, kwargs, client_sock_addr, context, done = self.queue.popleft()
+                self.space_available.notify()
+            current_context.from_global(context)
+            try:
+                method(*vargs, **kwargs)
+            except Exception as xv:
+                self.pyro_daemon.methodcall_error_handler(self.pyro_daemon, client_sock_addr, method, vargs, kwargs, xv)
+            finally:
+                if done:
+                    done()
+            del method, vargs, kwargs, context, done
+            with self.lock:
+                self.completed += 1
+                self.idle += 1
+
+    def stats(self):
+        """statistics about the oneway calls and worker threads"""
+        with self.lock:
+            return {
+                "workers": self.workers,
+                "busy": self.workers - self.idle,
+                "idle": self.idle,
+                "queued": len(self.queue),
+                "queued_total": self.queued_total,
+                "completed": self.completed,
+                "dropped": self.dropped,
+                "rejected": self.rejected
+            }
+
+    def shutdown(self):
+        """stops the worker threads once their current call is done, calls still in the queue are discarded"""
+        with self.lock:
+            self.closed = True
+            for call in self.queue:
+                if call[-1]:
+                    call[-1]()
+            self.queue.clear()
+            self.call_available.notify_all()
+            self.space_available.notify_all()
@@ -10,16 +10,17 @@ import socket
 import errno
 import time
 import select
+import selectors
 import ipaddress
 import weakref
 import contextlib
-from typing import Union, Optional, Tuple, Dict, Type, Any
+from typing import Union, Optional, Tuple, Dict, Type, Any, List, Sequence
 try:
     import ssl
 except ImportError:
     pass
 from . import config
-from .errors import CommunicationError, TimeoutError, ConnectionClosedError
+from .errors import CommunicationError, TimeoutError, ConnectionClosedError, PyroError
 
 
 # Note: other interesting errnos are EPERM, ENOBUFS, EMFILE
@@ -54,6 +55,13 @@ if hasattr(errno, "WSAEADDRINUSE"):
 # msg_waitall has proven to be unreliable on windows
 USE_MSG_WAITALL = hasattr(socket, "MSG_WAITALL") and platform.system() != "Windows"
 
+# vectored i/o (scatter-gather) for sending multiple buffers at once, not available on windows
+USE_SENDMSG = hasattr(socket.socket, "sendmsg")
+MAX_SENDMSG_BUFFERS = 512    # stay well below the IOV_MAX limit of the OS
+
+# size of the per-connection receive buffer, reads that are larger than this bypass the buffer
+RECV_BUFFER_SIZE = 8192
+
 
 def get_ip_address(hostname: str, workaround127: bool = False, version: int = None) \
         -> Union[ipaddress.IPv4Address, ipaddress.IPv6Address]:
@@ -106,118 +114,181 @@ def get_interface(ip_address: Union[str, ipaddress.IPv4Address, ipaddress.IPv6Ad
         return ipaddress.ip_interface(sock.getsockname()[0])
 
 
-def __retrydelays():
-    # first try a few very short delays,
-    # if that doesn't work, increase by 0.1 sec every time
-    yield 0.0001
-    yield 0.001
-    yield 0.01
-    d = 0.1
-    while True:
-        yield d
-        d += 0.1
+# selector used to wait for a socket to become ready, poll doesn't need to allocate a file descriptor like epoll does
+_WaitSelector = selectors.PollSelector if hasattr(selectors, "PollSelector") else selectors.SelectSelector
+
+
+def _wait_for_socket(sock: socket.socket, event: int, deadline: Optional[float]) -> None:
+    """
+    Waits until the socket becomes readable or writable (event is EVENT_READ or EVENT_WRITE),
+    instead of retrying in a sleep loop. Raises TimeoutError if the deadline (on the monotonic clock) passes.
+    """
+    timeout = None
+    if deadline is not None:
+        timeout = deadline - time.monotonic()
+        if timeout <= 0:
+            raise TimeoutError("receiving: timeout" if event == selectors.EVENT_READ else "sending: timeout")
+    with _WaitSelector() as selector:
+        selector.register(sock, event)
+        if not selector.select(timeout):
+            raise TimeoutError("receiving: timeout" if event == selectors.EVENT_READ else "sending: timeout")
+
+
+def _io_deadline(sock: socket.socket) -> Optional[float]:
+    """the deadline for a socket operation that has to wait, based on the socket's timeout (None=wait forever)"""
+    timeout = sock.gettimeout()
+    return time.monotonic() + timeout if timeout else None
 
 
-def receive_data(sock: socket.socket, size: int) -> bytes:
+def receive_data(sock: socket.socket, size: int) -> bytearray:
     """Retrieve a given number of bytes from a socket.
     It is expected the socket is able to supply that number of bytes.
     If it isn't, an exception is raised (you will not get a zero length result
     or a result that is smaller than what you asked for). The partial data that
     has been received however is stored in the 'partialData' attribute of
-    the exception object."""
-    try:
-        delays = __retrydelays()
-        msglen = 0
-        data = bytearray()
-        if USE_MSG_WAITALL and not hasattr(sock, "getpeercert"):    # ssl doesn't support recv flags
-            while True:
-                try:
-                    chunk = sock.recv(size, socket.MSG_WAITALL)
-                    if len(chunk) == size:
-                        return chunk
-                    # less data than asked, drop down into normal receive loop to finish
-                    msglen = len(chunk)
-                    data.extend(chunk)
-                    break
-                except socket.timeout:
-                    raise TimeoutError("receiving: timeout")
-                except socket.error as x:
-                    err = getattr(x, "errno", x.args[0])
-                    if err not in ERRNO_RETRIES:
-                        raise ConnectionClosedError("receiving: connection lost: " + str(x))
-                    time.sleep(next(delays))  # a slight delay to wait before retrying
-        # old fashioned recv loop, we gather chunks until the message is complete
+    the exception object.
+    The result buffer is allocated once and the data is received directly into it."""
+    data = bytearray(size)
+    receive_data_into(sock, memoryview(data))
+    return data
+
+
+def receive_data_into(sock: socket.socket, view: memoryview, minimum: Optional[int] = None) -> int:
+    """Receive data from a socket directly into the given (writable) memoryview, without intermediate copies.
+    Keeps reading until at least ``minimum`` bytes have been received (default: fill the whole view).
+    It may receive more than that, up to the size of the view. Returns the number of bytes received.
+    Like :func:`receive_data`, an exception is raised if the socket can't supply the minimum amount
+    of bytes, the partial data is then stored in the 'partialData' attribute of the exception object."""
+    size = len(view)
+    if minimum is None:
+        minimum = size
+    received = 0
+    deadline = None
+    if minimum == size and USE_MSG_WAITALL and not hasattr(sock, "getpeercert"):    # ssl doesn't support recv flags
         while True:
             try:
-                while msglen < size:
-                    # 60k buffer limit avoids problems on certain OSes like VMS, Windows
-                    chunk = sock.recv(min(60000, size - msglen))
-                    if not chunk:
-                        break
-                    data.extend(chunk)
-                    msglen += len(chunk)
-                if len(data) != size:
-                    try:
-                        err = ConnectionClosedError("receiving: not enough data")
-                        err.partialData = data  # store the message that was received until now
-                        raise err
-                    finally:
-                        del err
-                return data  # yay, complete
+                received = sock.recv_into(view, size, socket.MSG_WAITALL)
+                break   # if we got less data than asked, drop down into normal receive loop to finish
             except socket.timeout:
                 raise TimeoutError("receiving: timeout")
             except socket.error as x:
                 err = getattr(x, "errno", x.args[0])
                 if err not in ERRNO_RETRIES:
                     raise ConnectionClosedError("receiving: connection lost: " + str(x))
-                time.sleep(next(delays))  # a slight delay to wait before retrying
-    except socket.timeout:
-        raise TimeoutError("receiving: timeout")
+                deadline = deadline or _io_deadline(sock)
+                _wait_for_socket(sock, selectors.EVENT_READ, deadline)
+    # old fashioned recv loop, we receive chunks until the minimum amount has been read
+    while received < minimum:
+        try:
+            # 60k buffer limit avoids problems on certain OSes like VMS, Windows
+            chunksize = sock.recv_into(view[received:], min(60000, size - received))
+            if not chunksize:
+                try:
+                    err = ConnectionClosedError("receiving: not enough data")
+                    err.partialData = bytes(view[:received])  # store the message that was received until now
+                    raise err
+                finally:
+                    del err
+            received += chunksize
+        except socket.timeout:
+            raise TimeoutError("receiving: timeout")
+        except socket.error as x:
+            err = getattr(x, "errno", x.args[0])
+            if err not in ERRNO_RETRIES:
+                raise ConnectionClosedError("receiving: connection lost: " + str(x))
+            deadline = deadline or _io_deadline(sock)
+            _wait_for_socket(sock, selectors.EVENT_READ, deadline)
+    return received
 
 
-def send_data(sock: socket.socket, data: bytes) -> None:
+def send_data(sock: socket.socket, data: Union[bytes, bytearray, memoryview, Sequence[Any]]) -> None:
     """
     Send some data over a socket.
+    The data can be a single bytes-like object, or a list of them (such as the ``chunks`` of a message).
+    A list of buffers is sent with a single vectored ``sendmsg()`` call where possible, so that
+    the buffers never have to be concatenated (copied) first.
     Some systems have problems with ``sendall()`` when the socket is in non-blocking mode.
     For instance, Mac OS X seems to be happy to throw EAGAIN errors too often.
     This function falls back to using a regular send loop if needed.
     """
-    if sock.gettimeout() is None:
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        buffers = [data]
+    else:
+        # Join the small buffers together, that is cheaper than a vectored send of them.
+        # This also avoids sending lots of tiny packets when the buffers have to be sent one by one.
+        buffers = _coalesce_small_buffers(data)
+    use_sendmsg = USE_SENDMSG and len(buffers) > 1 and not hasattr(sock, "getpeercert")   # ssl doesn't support sendmsg
+    if sock.gettimeout() is None and not use_sendmsg:
         # socket is in blocking mode, we can use sendall normally.
         try:
-            sock.sendall(data)
+            for buf in buffers:
+                sock.sendall(buf)
             return
         except socket.timeout:
             raise TimeoutError("sending: timeout")
         except socket.error as x:
             raise ConnectionClosedError("sending: connection lost: " + str(x))
-    else:
-        # Socket is in non-blocking mode, use regular send loop.
-        delays = __retrydelays()
-        while data:
-            try:
-                sent = sock.send(data)
-                data = data[sent:]
-            except socket.timeout:
-                raise TimeoutError("sending: timeout")
-            except socket.error as x:
-                err = getattr(x, "errno", x.args[0])
-                if err not in ERRNO_RETRIES:
-                    raise ConnectionClosedError("sending: connection lost: " + str(x))
-                time.sleep(next(delays))  # a slight delay to wait before retrying
+    # Regular send loop, advances through the buffers without copying them.
+    # Used for vectored sends, and for sockets in non-blocking mode.
+    buffers = [memoryview(buf).cast("B") for buf in buffers]
+    deadline = None
+    while buffers:
+        try:
+            if use_sendmsg:
+                sent = sock.sendmsg(buffers[:MAX_SENDMSG_BUFFERS])
+            else:
+                sent = sock.send(buffers[0])
+        except socket.timeout:
+            raise TimeoutError("sending: timeout")
+        except socket.error as x:
+            err = getattr(x, "errno", x.args[0])
+            if err not in ERRNO_RETRIES:
+                raise ConnectionClosedError("sending: connection lost: " + str(x))
+            deadline = deadline or _io_deadline(sock)
+            _wait_for_socket(sock, selectors.EVENT_WRITE, deadline)
+            continue
+        while sent:
+            if sent >= len(buffers[0]):
+                sent -= len(buffers.pop(0))
+            else:
+                buffers[0] = buffers[0][sent:]
+                sent = 0
+
+
+def _coalesce_small_buffers(buffers: Sequence[Any], limit: int = 65536) -> List[Any]:
+    """joins consecutive small buffers together, big buffers are passed through as-is (empty ones are dropped)"""
+    if len(buffers) == 1:
+        return [buffers[0]] if len(buffers[0]) else []
+    result = []     # type: List[Any]
+    small = []      # type: List[Any]
+    for buf in buffers:
+        if not len(buf):
+            continue
+        if len(buf) < limit:
+            small.append(buf)
+        else:
+            if small:
+                result.append(b"".join(small))
+                small = []
+            result.append(buf)
+    if small:
+        result.append(b"".join(small))
+    return result
 
 
 def create_socket(bind: Union[Tuple, str] = None,
                   connect: Union[Tuple, str] = None,
                   reuseaddr: bool = False, keepalive: bool = True,
                   timeout: Optional[float] = -1, noinherit: bool = False,
-                  ipv6: bool = False, nodelay: bool = True, sslContext: ssl.SSLContext = None) -> socket.socket:
+                  ipv6: bool = False, nodelay: bool = True, sslContext: ssl.SSLContext = None,
+                  reuseport: bool = False) -> socket.socket:
     """
     Create a socket. Default socket options are keepalive and IPv4 family, and nodelay (nagle disabled).
     If 'bind' or 'connect' is a string, it is assumed a Unix domain socket is requested.
     Otherwise, a normal tcp/ip socket tuple (addr, port, ...) is used.
     Set ipv6=True to create an IPv6 socket rather than IPv4.
     Set ipv6=None to use the PREFER_IP_VERSION config setting.
+    Set reuseport=True to allow multiple processes to bind on the same address (SO_REUSEPORT).
     """
     if bind and connect:
         raise ValueError("bind and connect cannot both be specified at the same time")
@@ -270,6 +341,8 @@ def create_socket(bind: Union[Tuple, str] = None,
         set_nodelay(sock)
     if reuseaddr:
         set_reuseaddr(sock)
+    if reuseport:
+        set_reuseport(sock)
     if noinherit:
         set_noinherit(sock)
     if timeout is not None:
@@ -374,6 +447,16 @@ def set_reuseaddr(sock: socket.socket) -> None:
         sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
 
 
+def set_reuseport(sock: socket.socket) -> None:
+    """
+    sets the SO_REUSEPORT option on the socket, so that multiple processes can listen on the same address.
+    Unlike the other socket options, this raises an error if it is not supported, because things won't work without it.
+    """
+    if not hasattr(socket, "SO_REUSEPORT"):
+        raise PyroError("SO_REUSEPORT is not supported on this platform")
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+
+
 def set_nodelay(sock: socket.socket) -> None:
     """sets the TCP_NODELAY option on the socket (to disable Nagle's algorithm), if possible."""
     with contextlib.suppress(Exception):
@@ -417,13 +500,20 @@ except ImportError:
 
 
 class SocketConnection(object):
-    """A wrapper class for plain sockets, containing various methods such as :meth:`send` and :meth:`recv`"""
+    """
+    A wrapper class for plain sockets, containing various methods such as :meth:`send` and :meth:`recv`.
+    Received data goes through a small buffer, so that reading the message header and a small payload
+    usually takes just a single system call. Large reads bypass the buffer.
+    """
     def __init__(self, sock: socket.socket, objectId: str = None, keep_open: bool = False) -> None:
         self.sock = sock
         self.objectId = objectId
         self.pyroInstances = {}    # type: Dict[Type, Any]   # pyro objects for instance_mode=session
         self.tracked_resources = weakref.WeakSet()   # type: weakref.WeakSet[Any]  # weakrefs to resources for this connection
+        self.session = None    # type: Any   # client session state, set up by the daemon when the client connects
         self.keep_open = keep_open
+        self._recv_view = memoryview(bytearray(RECV_BUFFER_SIZE))     # type: memoryview   # receive buffer
+        self._recv_start = self._recv_end = 0
 
     def __del__(self):
         self.close()
@@ -434,11 +524,59 @@ class SocketConnection(object):
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.close()
 
-    def send(self, data: bytes) -> None:
+    def send(self, data: Union[bytes, Sequence[Any]]) -> None:
         send_data(self.sock, data)
 
-    def recv(self, size: int) -> bytes:
-        return receive_data(self.sock, size)
+    def recv(self, size: int) -> Union[bytes, bytearray]:
+        start = self._recv_start
+        end = start + size
+        if end > self._recv_end:
+            if size > RECV_BUFFER_SIZE:
+                return self._recv_large(size)
+            self._fill_recv_buffer(size)
+            start, end = 0, size
+        if end == self._recv_end:
+            self._recv_start = self._recv_end = 0
+        else:
+            self._recv_start = end
+        # Copy the data out, because the buffer will be reused for the next read.
+        # (this is only ever done for small amounts of data)
+        return self._recv_view[start:end].tobytes()
+
+    @property
+    def buffered(self) -> int:
+        """the number of received bytes that are waiting in the receive buffer"""
+        return self._recv_end - self._recv_start
+
+    def _fill_recv_buffer(self, size: int) -> None:
+        # make sure at least size bytes are in the buffer, but read as many as are available
+        buffered = self._recv_end - self._recv_start
+        if self._recv_start:
+            # move the remaining data to the front of the buffer to make room
+            self._recv_view[:buffered] = self._recv_view[self._recv_start:self._recv_end]
+            self._recv_start, self._recv_end = 0, buffered
+        try:
+            self._recv_end += receive_data_into(self.sock, self._recv_view[buffered:], size - buffered)
+        except ConnectionClosedError as x:
+            if hasattr(x, "partialData"):
+                x.partialData = bytes(self._recv_view[:buffered]) + x.partialData
+            self._recv_start = self._recv_end = 0
+            raise
+
+    def _recv_large(self, size: int) -> bytearray:
+        # allocate the result once, and receive the remainder directly into it
+        data = bytearray(size)
+        buffered = self._recv_end - self._recv_start
+        if buffered:
+            data[:buffered] = self._recv_view[self._recv_start:self._recv_end]
+            self._recv_start = self._recv_end = 0
+        try:
+            receive_data_into(self.sock, memoryview(data)[buffered:])
+        except ConnectionClosedError as x:
+            if hasattr(x, "partialData"):
+                x.partialData = bytes(data[:buffered]) + x.partialData
+            raise
+        return data
 
     def close(self) -> None:
         if self.keep_open:
@@ -0,0 +1,453 @@
+"""
+Socket server based on asyncio. All connections are served by a single event loop.
+Exposed ``async def`` methods are awaited directly on the event loop,
+normal methods are executed in a thread pool executor.
+
+Pyro - Python Remote Objects.  Copyright by Irmen de Jong (irmen@razorvine.net).
+"""
+
+import socket
+import sys
+import os
+import time
+import types
+import logging
+import inspect
+import asyncio
+import threading
+import contextlib
+import concurrent.futures
+from . import config, socketutil, errors, protocol, serializers, server
+from .callcontext import current_context
+
+log = logging.getLogger("Pyro5.asyncioserver")
+
+
+class AsyncioConnection(socketutil.SocketConnection):
+    """
+    Client connection of the asyncio server. Every message is read completely by the event loop first,
+    after which :meth:`recv` simply hands out its bytes (it never blocks).
+    A worker thread that reads on after that (the continuation frames of chunked data) lets the event loop
+    receive the next message, and waits for it.
+    Sending is done via the asyncio stream writer, also when called from a worker thread.
+    A worker thread that has written more than drain_size bytes, waits until the stream writer is drained
+    (so that the continuation frames of a ChunkedData result are produced no faster than the client takes them).
+    """
+    drain_size = 65536
+
+    def __init__(self, reader, writer, eventloop, loop_thread):
+        super(AsyncioConnection, self).__init__(writer.get_extra_info("socket"))
+        self.reader = reader
+        self.writer = writer
+        self.eventloop = eventloop
+        self.loop_thread = loop_thread
+        self.received = []      # the buffers of the message that was received, still to be handed out by recv
+        self.undrained = 0      # the number of bytes written by worker threads since the stream writer was drained
+
+    def __del__(self):
+        pass    # the connection is closed by the server (and asyncio's transport cleans up after itself)
+
+    async def receive_message(self):
+        """reads the next complete message from the stream, returns the header and the payload"""
+        try:
+            header = await asyncio.wait_for(self.reader.readexactly(protocol._header_size), config.COMMTIMEOUT or None)
+            protocol.ReceivingMessage.validate(header)
+            msg = protocol.ReceivingMessage(header)
+            payload = await asyncio.wait_for(self.reader.readexactly(msg.annotations_size + msg.data_size),
+                                             config.COMMTIMEOUT or None)
+        except asyncio.IncompleteReadError as x:
+            err = errors.ConnectionClosedError("receiving: not enough data")
+            err.partialData = x.partial
+            raise err from None
+        except asyncio.TimeoutError:
+            raise errors.TimeoutError("receiving: timeout") from None
+        self.received = [header, payload]
+        return header, payload
+
+    def recv(self, size):
+        if not self.received and threading.get_ident() != self.loop_thread and not self.eventloop.is_closed():
+            asyncio.run_coroutine_threadsafe(self.receive_message(), self.eventloop).result()
+        if not self.received:
+            raise errors.ConnectionClosedError("receiving: not enough data")
+        data = self.received[0]
+        if len(data) == size:
+            del self.received[0]
+            return data
+        if len(data) > size:
+            self.received[0] = data[size:]
+            return data[:size]
+        raise errors.ProtocolError("receiving: message boundary mismatch")
+
+    @property
+    def buffered(self):
+        return sum(len(data) for data in self.received)
+
+    def send(self, data):
+        if not isinstance(data, (list, tuple)):
+            data = [data]
+        if self.eventloop.is_closed():
+            raise errors.ConnectionClosedError("sending: connection lost")
+        if threading.get_ident() == self.loop_thread:
+            self.writer.writelines(data)
+        else:
+            # called from a worker thread, the event loop performs the actual write
+            self.eventloop.call_soon_threadsafe(self.writer.writelines, list(data))
+            self.undrained += sum(len(buf) for buf in data)
+            if self.undrained > self.drain_size:
+                self._drain()
+
+    def _drain(self):
+        # called from a worker thread: wait until the event loop has sent most of the written data
+        self.undrained = 0
+        drained = asyncio.run_coroutine_threadsafe(self.writer.drain(), self.eventloop)
+        try:
+            drained.result(config.COMMTIMEOUT or None)
+        except concurrent.futures.TimeoutError:
+            drained.cancel()
+            raise errors.TimeoutError("sending: timeout") from None
+        except ConnectionError as x:
+            raise errors.ConnectionClosedError("sending: connection lost: " + str(x)) from None
+
+    def close(self):
+        if self.keep_open:
+            return
+        with contextlib.suppress(Exception):
+            if threading.get_ident() == self.loop_thread:
+                self.writer.close()
+            else:
+                self.eventloop.call_soon_threadsafe(self.writer.close)
+        self.pyroInstances = {}   # release the session instances
+        for rsc in self.tracked_resources:
+            with contextlib.suppress(Exception):
+                rsc.close()     # it is assumed a 'resource' has a close method.
+        self.tracked_resources.clear()
+
+    def settimeout(self, timeout):
+        pass    # timeouts are dealt with by the event loop
+
+    def gettimeout(self):
+        return config.COMMTIMEOUT
+
+    timeout = property(gettimeout, settimeout)
+
+
+class SocketServer_Asyncio(object):
+    """transport server for socket connections, asyncio version."""
+
+    def __init__(self):
+        self.daemon = self.sock = self._socketaddr = self.locationStr = self.sslContext = None
+        self.executor = None    # can be set to a custom executor to run the normal (non-coroutine) method calls in
+        self.shutting_down = False
+        self.eventloop = self.loop_thread = None
+        self.connections = set()
+        self._stop = None
+        self._tasks = set()     # oneway coroutine calls that are running
+        self._registrations = -1
+        self._serves_coroutines = False
+
+    def init(self, daemon, host, port, unixsocket=None):
+        log.info("starting asyncio socketserver")
+        self.daemon = daemon
+        self.sock = None
+        bind_location = unixsocket if unixsocket else (host, port)
+        if config.SSL:
+            # the ssl layer is added by asyncio, not by wrapping the server socket
+            self.sslContext = socketutil.get_ssl_context(servercert=config.SSL_SERVERCERT,
+                                                         serverkey=config.SSL_SERVERKEY,
+                                                         keypassword=config.SSL_SERVERKEYPASSWD,
+                                                         cacerts=config.SSL_CACERTS)
+            log.info("using SSL,  cert=%s  key=%s  cacerts=%s", config.SSL_SERVERCERT, config.SSL_SERVERKEY, config.SSL_CACERTS)
+        else:
+            self.sslContext = None
+            log.info("not using SSL")
+        self.sock = socketutil.create_socket(bind=bind_location,
+                                             reuseaddr=config.SOCK_REUSE,
+                                             reuseport=config.SOCK_REUSEPORT,
+                                             noinherit=True,
+                                             nodelay=config.SOCK_NODELAY)
+        self._socketaddr = self.sock.getsockname()
+        if not unixsocket and self._socketaddr[0].startswith("127."):
+            if host is None or host.lower() != "localhost" and not host.startswith("127."):
+                log.warning("weird DNS setup: %s resolves to localhost (127.x.x.x)", host)
+        if unixsocket:
+            self.locationStr = "./u:" + unixsocket
+        else:
+            host = host or self._socketaddr[0]
+            port = port or self._socketaddr[1]
+            if ":" in host:  # ipv6
+                self.locationStr = "[%s]:%d" % (host, port)
+            else:
+                self.locationStr = "%s:%d" % (host, port)
+
+    def __del__(self):
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+    def __repr__(self):
+        return "<%s on %s; %d connections>" % (self.__class__.__name__, self.locationStr, len(self.connections))
+
+    def loop(self, loopCondition=lambda: True):
+        log.debug("asyncio server requestloop")
+        try:
+            asyncio.run(self.loop_async(loopCondition))
+        except KeyboardInterrupt:
+            log.debug("stopping on break signal")
+
+    async def loop_async(self, loopCondition=lambda: True):
+        """runs the server on the current (already running) event loop, until the loop condition becomes false"""
+        if self.sock is None:
+            return
+        self.eventloop = asyncio.get_running_loop()
+        self.loop_thread = threading.get_ident()
+        self._stop = asyncio.Event()
+        if self.executor is None:
+            self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=config.THREADPOOL_SIZE,
+                                                                  thread_name_prefix="Pyro-asyncio-worker")
+        if hasattr(socket, "AF_UNIX") and self.sock.family == socket.AF_UNIX:
+            srv = await asyncio.start_unix_server(self._handleConnection, sock=self.sock, ssl=self.sslContext)
+        else:
+            srv = await asyncio.start_server(self._handleConnection, sock=self.sock, ssl=self.sslContext)
+        waittime = config.POLLTIMEOUT or 2.0
+        try:
+            while not self.shutting_down and loopCondition():
+                with contextlib.suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(self._stop.wait(), waittime)
+                self.daemon._housekeeping()
+        finally:
+            srv.close()
+            for conn in list(self.connections):
+                conn.close()
+            self.connections.clear()
+
+    async def _handleConnection(self, reader, writer):
+        conn = AsyncioConnection(reader, writer, self.eventloop, self.loop_thread)
+        caddr = writer.get_extra_info("peername")
+        log.debug("connected %s - %s", caddr, "SSL" if self.sslContext else "unencrypted")
+        self.connections.add(conn)
+        try:
+            if not await self._handshake(conn):
+                return
+            while not self.shutting_down:
+                if not await self.handleRequest(conn):
+                    break
+                await writer.drain()
+        except (ConnectionError, OSError):
+            log.debug("disconnected %s", caddr)
+        finally:
+            self.connections.discard(conn)
+            try:
+                self.daemon._clientDisconnect(conn)
+            except Exception as x:
+                log.warning("Error in clientDisconnect: %s", x)
+            conn.close()
+
+    async def _handshake(self, conn):
+        try:
+            await conn.receive_message()
+            # the handshake and its user validation hook may block, run it in the executor
+            if await self.eventloop.run_in_executor(self.executor, self.daemon._handshake, conn):
+                return True
+        except Exception:
+            ex_t, ex_v, ex_tb = sys.exc_info()
+            tb = errors.format_traceback(ex_t, ex_v, ex_tb)
+            log.warning("error during connect/handshake: %s; %s", ex_v, "\n".join(tb))
+        return False
+
+    async def handleRequest(self, conn):
+        """Handles a single request on the connection, returns if the connection is still active"""
+        try:
+            header, payload = await conn.receive_message()
+            msg = protocol.ReceivingMessage(header)
+            if self._servesCoroutines() and msg.type == protocol.MSG_INVOKE and \
+                    not msg.flags & (protocol.FLAGS_BATCH | protocol.FLAGS_KEEPSERIALIZED | protocol.FLAGS_CHUNKED):
+                # this may be a call of an async method; that can only be known after deserializing the call,
+                # which is done (once) in the executor, that also handles the call right away if it's a normal one.
+                msg.add_payload(payload)
+                conn.received = []
+                call = await self.eventloop.run_in_executor(self.executor, self._dispatchCall, conn, msg)
+                if call:
+                    await self._handleCoroutineCall(conn, msg, *call)
+            else:
+                await self.eventloop.run_in_executor(self.executor, self.daemon.handleRequest, conn)
+            return True
+        except (socket.error, errors.ConnectionClosedError, errors.SecurityError):
+            # client went away or caused a security error.
+            # close the connection silently.
+            log.debug("disconnected %s", conn.writer.get_extra_info("peername"))
+            return False
+        except errors.TimeoutError as x:
+            # for timeout errors we're not really interested in detailed traceback info
+            log.warning("error during handleRequest: %s", x)
+            return False
+        except Exception:
+            # other error occurred, close the connection, but also log a warning
+            ex_t, ex_v, ex_tb = sys.exc_info()
+            tb = errors.format_traceback(ex_t, ex_v, ex_tb)
+            msg = "error during handleRequest: %s; %s" % (ex_v, "".join(tb))
+            log.warning(msg)
+            return False
+
+    def _servesCoroutines(self):
+        # Checks if any of the registered objects has async methods at all. If not, there is no need
+        # to look at the calls before the daemon handles them, they all go directly to the executor.
+        # That is checked again whenever objects have been registered or unregistered.
+        if self.daemon._registrations != self._registrations:
+            self._registrations = self.daemon._registrations
+            objects = list(self.daemon.objectsById.values())
+            self._serves_coroutines = any(_has_coroutines(server._unpack_weakref(obj)) for obj in objects)
+        return self._serves_coroutines
+
+    def _dispatchCall(self, conn, msg):
+        """
+        Runs in the executor. If the message is a call of an async method, returns the details of that call
+        so that it can be awaited on the event loop, otherwise the daemon handles the call and None is returned.
+        """
+        try:
+            serializer = serializers.serializers_by_id[msg.serializer_id]
+            objId, method, vargs, kwargs = serializer.loadsCall(msg.data)
+        except Exception:
+            # let the daemon deal with it in the regular way (and report the error to the client)
+            self.daemon._handleRequestMessage(conn, msg)
+            return None
+        obj = self.daemon.objectsById.get(objId)
+        if obj is not None:
+            obj = server._unpack_weakref(obj)
+        if obj is not None and method not in getattr(obj, "__dict__", ()):
+            entry = server._get_dispatch_table(obj).get(method)
+            if entry and entry.coroutine:
+                return obj, method, vargs, kwargs
+        self.daemon._handleRequestMessage(conn, msg, (objId, method, vargs, kwargs))
+        return None
+
+    async def _handleCoroutineCall(self, conn, msg, obj, method, vargs, kwargs):
+        daemon = self.daemon
+        serializer = serializers.serializers_by_id[msg.serializer_id]
+        if config.LOGWIRE:
+            protocol.log_wiredata(log, "daemon wiredata received", msg)
+        pooled = None   # (class, instance) when the instance was checked out of an instance pool
+        try:
+            daemon._setCallContext(conn, msg)
+            if inspect.isclass(obj):
+                if obj._pyroInstancing[0] == "pool":
+                    # checking out an instance may have to wait for one to become available, don't block the event loop
+                    pooled = (obj, await self.eventloop.run_in_executor(self.executor, daemon._getInstance, obj, conn))
+                    obj = pooled[1]
+                else:
+                    obj = daemon._getInstance(obj, conn)
+            method = server._get_exposed_method(obj, method)
+            context = current_context.to_global()
+            if msg.flags & protocol.FLAGS_ONEWAY:
+                task = self.eventloop.create_task(self._onewayCall(method, vargs, kwargs, context, pooled))
+                pooled = None   # the oneway call gives the instance back when it's done
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+                return  # oneway call, don't send a response
+            try:
+                data = await _run_in_context(method(*vargs, **kwargs), context)
+            except Exception as xv:
+                daemon.methodcall_error_handler(daemon, current_context.client_sock_addr, method, vargs, kwargs, xv)
+                raise
+            isStream, data = daemon._streamResponse(data, conn, pooled)
+            if isStream:
+                if data:
+                    pooled = None   # the instance is given back when the stream is removed
+                daemon._sendStreamResponse(conn, msg.seq, serializer.serializer_id, data)
+            elif isinstance(data, protocol.ChunkedData):
+                # the event loop can't wait for the client to take all the data, a worker thread sends it
+                await self.eventloop.run_in_executor(self.executor, self._sendResponse, conn, msg.seq, serializer, data,
+                                                     current_context.to_global())
+            else:
+                daemon._sendResponse(conn, msg.seq, serializer, data)
+        except Exception as xv:
+            daemon._sendErrorResponse(conn, msg.flags, msg.seq, msg.serializer_id, xv)
+            if isinstance(xv, (errors.CommunicationError, errors.SecurityError)):
+                raise
+        finally:
+            if pooled:
+                daemon._releaseInstance(*pooled)
+
+    def _sendResponse(self, conn, seq, serializer, data, context):
+        # runs in the executor, with the call context of the coroutine call
+        current_context.from_global(context)
+        self.daemon._sendResponse(conn, seq, serializer, data)
+
+    async def _onewayCall(self, method, vargs, kwargs, context, pooled=None):
+        try:
+            await _run_in_context(method(*vargs, **kwargs), context)
+        except Exception as xv:
+            self.daemon.methodcall_error_handler(self.daemon, context["client_sock_addr"], method, vargs, kwargs, xv)
+        finally:
+            if pooled:
+                self.daemon._releaseInstance(*pooled)
+
+    def combine_loop(self, server):
+        raise TypeError("You can't use the loop combiner on the asyncio server type")
+
+    def events(self, eventsockets):
+        raise errors.PyroError("the asyncio server can't be driven by an external selector, use Daemon.requestLoopAsync instead")
+
+    def shutdown(self):
+        self.shutting_down = True
+        self.wakeup()
+        time.sleep(0.05)
+        self.close()
+
+    def close(self):
+        if self.sock:
+            sockname = None
+            with contextlib.suppress(socket.error, OSError):
+                sockname = self.sock.getsockname()
+            with contextlib.suppress(Exception):
+                self.sock.close()
+            if type(sockname) is str:
+                # it was a Unix domain socket, remove it from the filesystem
+                if os.path.exists(sockname):
+                    os.remove(sockname)
+            self.sock = None
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+
+    @property
+    def sockets(self):
+        return [self.sock] + [conn.sock for conn in list(self.connections)]
+
+    @property
+    def selector(self):
+        raise TypeError("asyncio server doesn't have multiplexing selector")
+
+    def wakeup(self):
+        if self.eventloop is not None and self._stop is not None:
+            with contextlib.suppress(RuntimeError):   # loop could be closed already
+                self.eventloop.call_soon_threadsafe(self._stop.set)
+
+
+def _has_coroutines(obj):
+    """does the object (or class) have exposed async methods?"""
+    return any(entry.coroutine for entry in server._get_dispatch_table(obj).values())
+
+
+@types.coroutine
+def _run_in_context(coro, context):
+    """
+    Runs the coroutine, but restores the (thread local) call context every time it resumes.
+    Other calls running on the event loop in the meantime change the context as well.
+    Changes made by the coroutine itself (such as response annotations) are kept in the context dict.
+    """
+    value = error = None
+    while True:
+        current_context.from_global(context)
+        try:
+            if error is None:
+                step = coro.send(value)
+            else:
+                step = coro.throw(error)
+        except StopIteration as x:
+            return x.value
+        finally:
+            context.update(current_context.to_global())
+        try:
+            value = yield step
+            error = None
+        except BaseException as x:
+            value, error = None, x
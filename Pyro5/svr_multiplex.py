@@ -1,5 +1,7 @@
 """
-Socket server based on socket multiplexing. Doesn't use threads.
+Socket server based on socket multiplexing. Doesn't use threads,
+unless the method calls are offloaded to a thread pool executor (MULTIPLEX_OFFLOAD).
+Calls with chunked data are always executed by a worker thread.
 Uses the best available selector (kqueue, poll, select).
 
 Pyro - Python Remote Objects.  Copyright by Irmen de Jong (irmen@razorvine.net).
@@ -11,12 +13,274 @@ import sys
 import logging
 import os
 import selectors
+import threading
+import itertools
 import contextlib
-from collections import defaultdict
-from . import config, socketutil, errors
+import concurrent.futures
+from collections import defaultdict, deque
+from typing import Tuple, Type
+from . import config, socketutil, errors, protocol
 
 log = logging.getLogger("Pyro5.multiplexserver")
 
+_NO_DATA_AVAILABLE = (BlockingIOError, InterruptedError)     # type: Tuple[Type[Exception], ...]
+_NO_SPACE_AVAILABLE = (BlockingIOError, InterruptedError)    # type: Tuple[Type[Exception], ...]
+try:
+    import ssl
+    _NO_DATA_AVAILABLE += (ssl.SSLWantReadError,)
+    _NO_SPACE_AVAILABLE += (ssl.SSLWantWriteError,)
+except ImportError:
+    pass
+
+
+class MultiplexConnection(socketutil.SocketConnection):
+    """
+    Client connection of the multiplex server. The selector thread reads whatever data is available
+    without blocking, and assembles the request messages from it (so a slow client can't stall the server).
+    Complete request messages are queued on the connection and processed one after another,
+    on the selector thread or by a worker thread (so the replies stay in request order):
+    while a request is processed, :meth:`recv` hands out the bytes of its message. When the request reads on
+    (the continuation frames of chunked data, always in a worker thread), recv takes the next queued message,
+    waiting for the selector thread to receive it if needed. Reading pauses while too much is queued.
+    Sending doesn't block either: what can't be sent right away is queued, and sent by the selector thread
+    when the socket becomes writable. Only a worker thread waits, when it has queued more than the high-water mark
+    (such as the continuation frames of a ChunkedData result that the client doesn't take fast enough).
+    """
+    read_size = 65536
+
+    def __init__(self, sock, server=None):
+        super(MultiplexConnection, self).__init__(sock)
+        self.server = server
+        self.requests = deque()     # received request messages (header, payload) that are waiting to be processed
+        self.requests_size = 0      # the number of bytes of the queued request messages
+        self.received = None        # the buffers of the request that is being processed, still to be handed out by recv
+        self.processing = False     # is a worker busy with the requests of this connection?
+        self.closing = False
+        self.handshaken = False
+        self.counted = False        # is the connection counted by its server?
+        self.connected_since = time.monotonic()
+        self.eof = False            # has the client closed its side of the connection?
+        self.partial_since = None   # time when the first bytes of the message that is still incomplete were received
+        self.lock = threading.Condition()     # notified when requests have been queued while a worker is processing
+        self.io_lock = threading.Lock()   # so that reads and writes never happen at the same time (required for ssl)
+        self.drained = threading.Condition(self.io_lock)   # notified when most of the queued output has been sent
+        self.outbound = deque()     # the buffers that are still waiting to be sent
+        self.outbound_size = 0
+        self.paused = False         # reading is paused, because too much data is waiting to be sent or processed
+        self._header = bytearray()
+        self._payload = None
+        self._payload_received = 0
+        self._read_view = None
+
+    def receive_messages(self):
+        """
+        Reads the data that is available on the socket, without blocking. Returns the number of request messages
+        that have been completed by it, they're added to the requests queue.
+        """
+        completed = len(self.requests)
+        with self.io_lock:
+            if self._read_view is None:
+                self._read_view = memoryview(bytearray(self.read_size))
+            while True:
+                remaining = len(self._payload) - self._payload_received if self._payload is not None else 0
+                if remaining > self.read_size:
+                    # large payload: read directly into it
+                    received = self._receive_available(memoryview(self._payload)[self._payload_received:])
+                    if received:
+                        self._payload_received += received
+                        self._completePayload()
+                else:
+                    received = self._receive_available(self._read_view)
+                    if received:
+                        self._consume(self._read_view[:received])
+                if received is None:
+                    break       # no more data available right now
+                if received == 0:
+                    self.eof = True
+                    break
+                if not (hasattr(self.sock, "pending") and self.sock.pending()):
+                    break       # the selector will tell when more data arrives
+        if self._header or self._payload is not None:
+            if self.partial_since is None:
+                self.partial_since = time.monotonic()
+        else:
+            self.partial_since = None
+        if self.eof and self.partial_since is not None:
+            raise errors.ConnectionClosedError("receiving: not enough data")
+        return len(self.requests) - completed
+
+    def _receive_available(self, view):
+        # receive into the view without blocking (the socket is non-blocking), returns None if no data is available
+        try:
+            return self.sock.recv_into(view)
+        except _NO_DATA_AVAILABLE:
+            return None
+        except socket.error as x:
+            if getattr(x, "errno", None) in socketutil.ERRNO_RETRIES:
+                return None
+            raise errors.ConnectionClosedError("receiving: connection lost: " + str(x))
+
+    def _consume(self, data):
+        # the incremental message parser: assembles the header and payload from the received bytes
+        pos = 0
+        while pos < len(data):
+            if self._payload is None:
+                needed = protocol._header_size - len(self._header)
+                self._header += data[pos:pos + needed]
+                pos += needed
+                if len(self._header) >= 6:
+                    protocol.ReceivingMessage.validate(self._header)
+                if len(self._header) == protocol._header_size:
+                    msg = protocol.ReceivingMessage(bytes(self._header))
+                    self._payload = bytearray(msg.annotations_size + msg.data_size)
+                    self._payload_received = 0
+                    self._completePayload()
+            else:
+                chunk = data[pos:pos + len(self._payload) - self._payload_received]
+                self._payload[self._payload_received:self._payload_received + len(chunk)] = chunk
+                self._payload_received += len(chunk)
+                pos += len(chunk)
+                self._completePayload()
+
+    def _completePayload(self):
+        if self._payload_received == len(self._payload):
+            with self.lock:
+                self.requests.append((bytes(self._header), self._payload))
+                self.requests_size += len(self._header) + len(self._payload)
+            self._header = bytearray()
+            self._payload = None
+
+    def next_request(self):
+        """
+        Takes the next queued request message. If reading was paused because too much was queued,
+        the selector thread is told to resume it when the queue has become small enough.
+        """
+        with self.lock:
+            header, payload = self.requests.popleft()
+            self.requests_size -= len(header) + len(payload)
+            if self.paused and self.requests_size <= config.MULTIPLEX_HIGHWATER and self.server:
+                self.server._outputPending(self)
+            return [header, payload]
+
+    def clear_requests(self):
+        with self.lock:
+            self.requests.clear()
+            self.requests_size = 0
+
+    def recv(self, size):
+        if self.received is None:
+            return super(MultiplexConnection, self).recv(size)
+        if not self.received:
+            self.received = self._next_message()
+        data = self.received[0]
+        if len(data) == size:
+            del self.received[0]
+            return data
+        if len(data) > size:
+            self.received[0] = data[size:]
+            return data[:size]
+        raise errors.ProtocolError("receiving: message boundary mismatch")
+
+    def _next_message(self):
+        # The request that is being processed reads beyond its own message: hand out the next one that was received.
+        # That only happens in a worker thread (requests with chunked data are always given to a worker),
+        # the selector thread receives the messages meanwhile, and never waits for them itself.
+        with self.lock:
+            if not self.processing:
+                raise errors.ProtocolError("receiving: message boundary mismatch")
+            if not self.lock.wait_for(lambda: self.requests or self.closing or self.eof, config.COMMTIMEOUT or None):
+                raise errors.TimeoutError("receiving: timeout")
+            if not self.requests:
+                raise errors.ConnectionClosedError("receiving: not enough data")
+            return self.next_request()
+
+    def send(self, data):
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            data = [data]
+        buffers = [memoryview(buf).cast("B") for buf in socketutil._coalesce_small_buffers(data)]
+        with self.io_lock:
+            was_pending = bool(self.outbound)
+            self.outbound.extend(buffers)
+            self.outbound_size += sum(len(buf) for buf in buffers)
+            if not was_pending:
+                self._flush()
+            if not self.outbound:
+                return
+            notify = not was_pending or (self.outbound_size > config.MULTIPLEX_HIGHWATER and not self.paused)
+        if notify and self.server:
+            # not everything could be sent right away, let the selector thread take care of the rest
+            self.server._outputPending(self)
+        if self.outbound_size > config.MULTIPLEX_HIGHWATER and self.server and threading.get_ident() != self.server._selector_thread:
+            # a worker thread produces the data faster than the client takes it: wait for the selector thread to send it
+            with self.drained:
+                if not self.drained.wait_for(lambda: self.outbound_size <= config.MULTIPLEX_HIGHWATER or self.closing,
+                                             config.COMMTIMEOUT or None):
+                    raise errors.TimeoutError("sending: timeout")
+                if self.closing:
+                    raise errors.ConnectionClosedError("sending: connection lost")
+
+    def flush(self):
+        """sends as much of the queued data as possible without blocking, returns the number of bytes still queued"""
+        with self.io_lock:
+            self._flush()
+            if self.outbound_size <= config.MULTIPLEX_HIGHWATER:
+                self.drained.notify_all()
+            return self.outbound_size
+
+    def _flush(self):
+        # must be called with the io_lock held
+        use_sendmsg = socketutil.USE_SENDMSG and not hasattr(self.sock, "getpeercert")   # ssl doesn't support sendmsg
+        while self.outbound:
+            try:
+                if use_sendmsg and len(self.outbound) > 1:
+                    sent = self.sock.sendmsg(list(itertools.islice(self.outbound, socketutil.MAX_SENDMSG_BUFFERS)))
+                else:
+                    sent = self.sock.send(self.outbound[0])
+            except _NO_SPACE_AVAILABLE:
+                return
+            except socket.error as x:
+                if getattr(x, "errno", None) in socketutil.ERRNO_RETRIES:
+                    return
+                raise errors.ConnectionClosedError("sending: connection lost: " + str(x))
+            self.outbound_size -= sent
+            while sent:
+                if sent >= len(self.outbound[0]):
+                    sent -= len(self.outbound.popleft())
+                else:
+                    self.outbound[0] = self.outbound[0][sent:]
+                    sent = 0
+
+    def defer_send(self, send):
+        """
+        Called with the function that sends the rest of a response (the continuation frames of a ChunkedData result).
+        The selector thread can't wait for the client to take all that data, so a worker thread is given the job;
+        the requests that arrive meanwhile wait for it. Returns False if the calling thread can do it itself.
+        """
+        if self.server is None or threading.get_ident() != self.server._selector_thread:
+            return False
+        with self.lock:
+            self.processing = True
+        self.server._chunkedExecutor().submit(self.server._sendDeferred, self, send)
+        return True
+
+    def close(self):
+        if self.outbound:
+            # last attempt to send what is still queued, such as the reply to a denied connection
+            with contextlib.suppress(Exception):
+                self.flush()
+            with self.io_lock:
+                self.outbound.clear()
+                self.outbound_size = 0
+                self.drained.notify_all()
+        super(MultiplexConnection, self).close()
+        if self.server is not None:
+            self.server._countConnection(self, False)
+
+
+def _is_chunked(request):
+    # does the request message (header, payload) have chunked data that follows in continuation frames?
+    return protocol.ReceivingMessage(request[0]).flags & protocol.FLAGS_CHUNKED
+
 
 class SocketServer_Multiplex(object):
     """Multiplexed transport server for socket connections (uses select, poll, kqueue, ...)"""
@@ -24,6 +288,18 @@ class SocketServer_Multiplex(object):
         self.sock = self.daemon = self.locationStr = None
         self.selector = selectors.DefaultSelector()
         self.shutting_down = False
+        self.executor = None    # can be set to a custom executor to offload the method calls to
+        self._finished = deque()    # connections whose worker is done with them (offload mode)
+        self._output_pending = deque()   # connections with data waiting to be sent, reported by a worker (offload mode)
+        self._selector_thread = None
+        self._last_slow_check = 0.0
+        self._wakeup_recv = self._wakeup_send = None
+        self.reactors = []      # the selector loops the connections are distributed over (MULTIPLEX_REACTORS > 1)
+        self.reactor_thread = None
+        self._adopted = deque()     # new connections handed to this server by the accepting server (reactor mode)
+        self._connections = 0       # the number of client connections served by this selector loop
+        self._chunked_executor = None   # executes the requests with chunked data when the method calls aren't offloaded
+        self._connections_lock = threading.Lock()
 
     def init(self, daemon, host, port, unixsocket=None):
         log.info("starting multiplexed socketserver")
@@ -41,6 +317,7 @@ class SocketServer_Multiplex(object):
             log.info("not using SSL")
         self.sock = socketutil.create_socket(bind=bind_location,
                                              reuseaddr=config.SOCK_REUSE,
+                                             reuseport=config.SOCK_REUSEPORT,
                                              timeout=config.COMMTIMEOUT,
                                              noinherit=True,
                                              nodelay=config.SOCK_NODELAY,
@@ -60,9 +337,64 @@ class SocketServer_Multiplex(object):
             else:
                 self.locationStr = "%s:%d" % (host, port)
         self.selector.register(self.sock, selectors.EVENT_READ, self)
+        if config.MULTIPLEX_OFFLOAD or self.executor is not None:
+            # the selector thread reads the requests, the method calls are executed by worker threads.
+            # a socket pair is used to wake up the selector when a worker is done with a connection.
+            if self.executor is None:
+                self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=config.THREADPOOL_SIZE,
+                                                                      thread_name_prefix="Pyro-multiplex-worker")
+            log.info("method calls are offloaded to an executor")
+            self._initWakeup()
+        if config.MULTIPLEX_REACTORS > 1:
+            # this thread only accepts the connections, they are served by a number of reactor threads,
+            # that each run their own selector loop.
+            log.info("connections are distributed over %d reactor threads", config.MULTIPLEX_REACTORS)
+            for number in range(config.MULTIPLEX_REACTORS):
+                reactor = SocketServer_Multiplex()
+                reactor._initReactor(daemon, self.executor, self.locationStr)
+                reactor.reactor_thread = threading.Thread(target=reactor.loop, args=(lambda r=reactor: not r.shutting_down,),
+                                                          name="Pyro-multiplex-reactor-%d" % (number + 1), daemon=True)
+                reactor.reactor_thread.start()
+                self.reactors.append(reactor)
+
+    def _initWakeup(self):
+        # a socket pair is used to wake up the selector from other threads
+        self._wakeup_recv, self._wakeup_send = socket.socketpair()
+        self._wakeup_recv.setblocking(False)
+        self._wakeup_send.setblocking(False)
+        self.selector.register(self._wakeup_recv, selectors.EVENT_READ, self)
+
+    def _initReactor(self, daemon, executor, locationStr):
+        # a reactor has no server socket, it serves the connections that the accepting server gives to it
+        self.daemon = daemon
+        self.executor = executor
+        self.locationStr = locationStr
+        self._initWakeup()
+
+    def _wakeupSelector(self):
+        with contextlib.suppress(OSError):
+            self._wakeup_send.send(b"!")
+
+    def adopt(self, conn):
+        """take over a new client connection, called from the accepting thread (reactor mode)"""
+        conn.server = self
+        self._countConnection(conn, True)
+        self._adopted.append(conn)
+        self._wakeupSelector()
+
+    def _countConnection(self, conn, counted):
+        # keeps the number of connections up to date, called from the accepting thread and the selector threads
+        with self._connections_lock:
+            if conn.counted != counted:
+                conn.counted = counted
+                self._connections += 1 if counted else -1
+
+    @property
+    def connection_count(self):
+        return self._connections + sum(reactor._connections for reactor in self.reactors)
 
     def __repr__(self):
-        return "<%s on %s; %d connections>" % (self.__class__.__name__, self.locationStr, len(self.selector.get_map()) - 1)
+        return "<%s on %s; %d connections>" % (self.__class__.__name__, self.locationStr, self.connection_count)
 
     def __del__(self):
         if self.sock is not None:
@@ -72,6 +404,7 @@ class SocketServer_Multiplex(object):
 
     def events(self, eventsockets):
         """handle events that occur on one of the sockets of this server"""
+        self._selector_thread = threading.get_ident()
         for s in eventsockets:
             if self.shutting_down:
                 return
@@ -79,19 +412,177 @@ class SocketServer_Multiplex(object):
                 # server socket, means new connection
                 conn = self._handleConnection(self.sock)
                 if conn:
-                    self.selector.register(conn, selectors.EVENT_READ, self)
+                    if self.reactors:
+                        min(self.reactors, key=lambda reactor: reactor._connections).adopt(conn)
+                    else:
+                        self._countConnection(conn, True)
+                        self.selector.register(conn, selectors.EVENT_READ, self)
+            elif s is self._wakeup_recv:
+                # new connections to serve, or a worker is done with some connections or has data waiting to be sent
+                with contextlib.suppress(OSError):
+                    self._wakeup_recv.recv(4096)
+                while self._adopted:
+                    self.selector.register(self._adopted.popleft(), selectors.EVENT_READ, self)
+                while self._output_pending:
+                    self._updateInterest(self._output_pending.popleft())
+                while self._finished:
+                    self._disconnect(self._finished.popleft())
             else:
                 # must be client socket, means remote call
-                active = self.handleRequest(s)
-                if not active:
-                    try:
-                        self.daemon._clientDisconnect(s)
-                    except Exception as x:
-                        log.warning("Error in clientDisconnect: %s", x)
-                    self.selector.unregister(s)
-                    s.close()
+                if not self._receiveRequests(s):
+                    self._disconnect(s)
+                elif s.outbound or s.requests_size > config.MULTIPLEX_HIGHWATER:
+                    self._updateInterest(s)
+        self._checkSlowClients()
         self.daemon._housekeeping()
 
+    def writable(self, conn):
+        """the connection's socket can accept data again: send what is waiting for it"""
+        try:
+            conn.flush()
+        except errors.CommunicationError as x:
+            log.debug("disconnected a client: %s", x)
+            self._disconnect(conn)
+            return
+        self._updateInterest(conn)
+
+    def _outputPending(self, conn):
+        # called by the connection when it couldn't send everything right away
+        if threading.get_ident() == self._selector_thread:
+            self._updateInterest(conn)
+        else:
+            self._output_pending.append(conn)
+            self._wakeupSelector()
+
+    def _updateInterest(self, conn):
+        # select the events the connection is waiting for, pausing the reading when too much output is waiting,
+        # or too many received requests are still waiting to be processed (chunked data that comes in faster
+        # than the method call consumes it, for instance)
+        with conn.lock:
+            if conn.outbound_size > config.MULTIPLEX_HIGHWATER or conn.requests_size > config.MULTIPLEX_HIGHWATER:
+                if not conn.paused:
+                    log.debug("too much data waiting for client, pausing reading")
+                conn.paused = True
+            elif not conn.outbound:
+                conn.paused = False
+        events = 0 if conn.paused else selectors.EVENT_READ
+        if conn.outbound:
+            events |= selectors.EVENT_WRITE
+        with contextlib.suppress(KeyError, ValueError):
+            self.selector.modify(conn, events, self)
+
+    def _disconnect(self, conn):
+        with contextlib.suppress(KeyError, ValueError):
+            self.selector.unregister(conn)
+        if isinstance(conn, MultiplexConnection):
+            if self._stopWaiting(conn):
+                return      # a worker is still busy with it, the connection is closed when it is done
+            if not conn.handshaken:
+                conn.close()
+                return
+        try:
+            self.daemon._clientDisconnect(conn)
+        except Exception as x:
+            log.warning("Error in clientDisconnect: %s", x)
+        conn.close()
+
+    def _stopWaiting(self, conn):
+        # marks the connection as closing, so that a worker that waits to receive or send more gives up.
+        # returns if a worker is still busy with it
+        with conn.lock:
+            conn.closing = True
+            conn.lock.notify_all()
+            processing = conn.processing
+        with conn.drained:
+            conn.drained.notify_all()
+        return processing
+
+    def _receiveRequests(self, conn):
+        """
+        Reads the available data from the connection, and handles the requests that are complete
+        (or hands them to a worker). Returns if the connection is still active.
+        """
+        try:
+            conn.receive_messages()
+        except (socket.error, errors.CommunicationError) as x:
+            # client went away, or sent garbage. close the connection silently.
+            log.debug("disconnected a client: %s", x)
+            return False
+        if not conn.handshaken:
+            if not conn.requests:
+                return not conn.eof
+            if not self._handshake(conn):
+                return False
+        if not self.executor:
+            while conn.requests and not conn.processing and not self.shutting_down:
+                if _is_chunked(conn.requests[0]):
+                    # The request reads on after its own message, to get the continuation frames of its chunked data.
+                    # The selector thread can't wait for those, they're received here while a worker processes it.
+                    break
+                conn.received = conn.next_request()
+                if not self.handleRequest(conn):
+                    return False
+        with conn.lock:
+            if conn.requests and not conn.processing and not self.shutting_down:
+                conn.processing = True
+                (self.executor or self._chunkedExecutor()).submit(self._processRequests, conn)
+            conn.lock.notify_all()
+        return not conn.eof
+
+    def _chunkedExecutor(self):
+        if self._chunked_executor is None:
+            self._chunked_executor = concurrent.futures.ThreadPoolExecutor(max_workers=config.THREADPOOL_SIZE,
+                                                                           thread_name_prefix="Pyro-multiplex-chunked")
+            if self._wakeup_recv is None:
+                self._initWakeup()
+        return self._chunked_executor
+
+    def _processRequests(self, conn):
+        # runs in a worker thread: process the queued requests of the connection in order
+        while True:
+            with conn.lock:
+                if not conn.requests:
+                    conn.processing = False
+                    closing = conn.closing
+                    break
+                conn.received = conn.next_request()
+            if not self.handleRequest(conn):
+                with conn.lock:
+                    conn.clear_requests()
+                    conn.closing = True
+        if closing:
+            # let the selector thread clean up the connection
+            self._finished.append(conn)
+            self._wakeupSelector()
+
+    def _sendDeferred(self, conn, send):
+        # runs in a worker thread: sends the rest of a response that the selector thread couldn't wait for,
+        # and then processes the requests of the connection that have been received meanwhile
+        try:
+            send()
+        except errors.CommunicationError as x:
+            log.debug("disconnected a client: %s", x)
+            with conn.lock:
+                conn.clear_requests()
+                conn.closing = True
+        self._processRequests(conn)
+
+    def _checkSlowClients(self):
+        # close the connections that didn't complete their request message within the communication timeout
+        if not config.COMMTIMEOUT:
+            return
+        now = time.monotonic()
+        if now - self._last_slow_check < 1.0:
+            return
+        self._last_slow_check = now
+        for key in list(self.selector.get_map().values()):
+            conn = key.fileobj
+            if key.data is self and isinstance(conn, MultiplexConnection):
+                since = conn.partial_since if conn.handshaken else conn.connected_since
+                if since is not None and now - since > config.COMMTIMEOUT:
+                    log.warning("client %s is too slow sending its request, closing connection", conn.sock.getpeername())
+                    self._disconnect(conn)
+
     def _handleConnection(self, sock):
         try:
             if sock is None:
@@ -101,8 +592,7 @@ class SocketServer_Multiplex(object):
                 log.debug("connected %s - SSL", caddr)
             else:
                 log.debug("connected %s - unencrypted", caddr)
-            if config.COMMTIMEOUT:
-                csock.settimeout(config.COMMTIMEOUT)
+            csock.setblocking(False)    # all i/o on the client connections is done without blocking
         except (socket.error, OSError) as x:
             err = getattr(x, "errno", x.args[0])
             if err in socketutil.ERRNO_BADF or err in socketutil.ERRNO_ENOTSOCK:
@@ -112,19 +602,20 @@ class SocketServer_Multiplex(object):
             err = getattr(x, "errno", x.args[0])
             log.warning("accept() failed '%s' with errno=%d, shouldn't happen", x, err)
             return None
+        # the connection handshake is done when its message has been received completely
+        return MultiplexConnection(csock, self)
+
+    def _handshake(self, conn):
+        conn.received = conn.next_request()
         try:
-            conn = socketutil.SocketConnection(csock)
             if self.daemon._handshake(conn):
-                return conn
-            conn.close()
+                conn.handshaken = True
+                return True
         except Exception:  # catch all errors, otherwise the event loop could terminate
             ex_t, ex_v, ex_tb = sys.exc_info()
             tb = errors.format_traceback(ex_t, ex_v, ex_tb)
             log.warning("error during connect/handshake: %s; %s", ex_v, "\n".join(tb))
-            with contextlib.suppress(OSError, socket.error):
-                csock.shutdown(socket.SHUT_RDWR)
-            csock.close()
-        return None
+        return False
 
     def shutdown(self):
         self.shutting_down = True
@@ -134,7 +625,28 @@ class SocketServer_Multiplex(object):
         self.sock = None
 
     def close(self):
+        for reactor in self.reactors:
+            reactor.shutting_down = True
+            reactor._wakeupSelector()
+            reactor.reactor_thread.join(timeout=2)
+            reactor.executor = None     # it's shared, closed below
+            reactor.close()
+        self.reactors = []
+        for conn in self.sockets:
+            if isinstance(conn, MultiplexConnection):
+                self._stopWaiting(conn)
         self.selector.close()
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+            self.executor = None
+        if self._chunked_executor is not None:
+            self._chunked_executor.shutdown(wait=False)
+            self._chunked_executor = None
+        if self._wakeup_recv is not None:
+            with contextlib.suppress(OSError):
+                self._wakeup_recv.close()
+                self._wakeup_send.close()
+            self._wakeup_recv = self._wakeup_send = None
         if self.sock:
             sockname = None
             with contextlib.suppress(OSError, socket.error):
@@ -193,14 +705,18 @@ class SocketServer_Multiplex(object):
                 except OSError:
                     events = []
                 # get all the socket connection objects that have a READ event
-                # (the WRITE events are ignored here, they're registered to let timeouts work etc)
+                # (WRITE events only occur for connections that have output waiting to be sent)
+                self._selector_thread = threading.get_ident()
                 events_per_server = defaultdict(list)
                 for key, mask in events:
+                    if mask & selectors.EVENT_WRITE:
+                        key.data.writable(key.fileobj)
                     if mask & selectors.EVENT_READ:
                         events_per_server[key.data].append(key.fileobj)
                 for server, fileobjs in events_per_server.items():
                     server.events(fileobjs)
                 if not events_per_server:
+                    self._checkSlowClients()
                     self.daemon._housekeeping()
             except socket.timeout:
                 pass  # just continue the loop on a timeout
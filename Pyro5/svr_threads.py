@@ -14,6 +14,7 @@ import threading
 import os
 import selectors
 import contextlib
+import collections
 from . import config, socketutil, errors
 
 log = logging.getLogger("Pyro5.threadpoolserver")
@@ -33,33 +34,38 @@ class ClientConnectionJob(object):
     def __call__(self):
         if self.handleConnection():
             try:
-                while True:
-                    try:
-                        self.daemon.handleRequest(self.csock)
-                    except (socket.error, errors.ConnectionClosedError):
-                        # client went away.
-                        log.debug("disconnected %s", self.caddr)
-                        break
-                    except errors.SecurityError:
-                        log.debug("security error on client %s", self.caddr)
-                        break
-                    except errors.TimeoutError as x:
-                        # for timeout errors we're not really interested in detailed traceback info
-                        log.warning("error during handleRequest: %s", x)
-                        break
-                    except Exception:
-                        # other errors log a warning, break this loop and close the client connection
-                        ex_t, ex_v, ex_tb = sys.exc_info()
-                        tb = errors.format_traceback(ex_t, ex_v, ex_tb)
-                        msg = "error during handleRequest: %s; %s" % (ex_v, "".join(tb))
-                        log.warning(msg)
-                        break
+                while self.handleRequest():
+                    pass
             finally:
-                try:
-                    self.daemon._clientDisconnect(self.csock)
-                except Exception as x:
-                    log.warning("Error in clientDisconnect: %s", x)
-                self.csock.close()
+                self.disconnect()
+
+    def handleRequest(self):
+        """Handles a single request on the connection and returns if the connection is still active"""
+        try:
+            self.daemon.handleRequest(self.csock)
+            return True
+        except (socket.error, errors.ConnectionClosedError):
+            # client went away.
+            log.debug("disconnected %s", self.caddr)
+        except errors.SecurityError:
+            log.debug("security error on client %s", self.caddr)
+        except errors.TimeoutError as x:
+            # for timeout errors we're not really interested in detailed traceback info
+            log.warning("error during handleRequest: %s", x)
+        except Exception:
+            # other errors log a warning, break this loop and close the client connection
+            ex_t, ex_v, ex_tb = sys.exc_info()
+            tb = errors.format_traceback(ex_t, ex_v, ex_tb)
+            msg = "error during handleRequest: %s; %s" % (ex_v, "".join(tb))
+            log.warning(msg)
+        return False
+
+    def disconnect(self):
+        try:
+            self.daemon._clientDisconnect(self.csock)
+        except Exception as x:
+            log.warning("Error in clientDisconnect: %s", x)
+        self.csock.close()
 
     def handleConnection(self):
         # connection handshake
@@ -80,6 +86,42 @@ class ClientConnectionJob(object):
         self.daemon._handshake(self.csock, denied_reason=reason)
         self.csock.close()
 
+    def expired(self):
+        # called by the pool when the connection waited too long in the queue for a free worker
+        self.denyConnection("no free workers, increase server threadpool size")
+
+
+class ReactorConnectionJob(ClientConnectionJob):
+    """
+    Used in reactor mode: only occupies a worker thread while the connection has work to do
+    (the handshake, or a request that has arrived). After that the connection is handed back to the server,
+    which waits for the next request on it, together with all other idle connections.
+    """
+
+    def __init__(self, connection, clientAddr, server, handshake=False):
+        self.csock = connection
+        self.caddr = clientAddr
+        self.daemon = server.daemon
+        self.server = server
+        self.handshake = handshake
+
+    def __call__(self):
+        if self.handshake:
+            active = self.handleConnection()
+            if not active:
+                return
+        else:
+            active = self.handleRequest()
+            while active and self.csock.buffered and not self.server.shutting_down:
+                # more requests have already been received into the connection's buffer,
+                # the selector won't report those so we need to process them right away.
+                active = self.handleRequest()
+        if active and not self.server.shutting_down:
+            self.handshake = False
+            self.server.reactor_done(self)
+        else:
+            self.disconnect()
+
 
 class Housekeeper(threading.Thread):
     def __init__(self, daemon):
@@ -104,6 +146,10 @@ class SocketServer_Threadpool(object):
         self.shutting_down = False
         self.housekeeper = None
         self._selector = selectors.DefaultSelector()
+        self.reactor = False
+        self._returned = collections.deque()    # connections handed back by the workers (reactor mode)
+        self._pending = collections.deque()     # jobs waiting for a free worker (reactor mode)
+        self._wakeup_recv = self._wakeup_send = None
 
     def init(self, daemon, host, port, unixsocket=None):
         log.info("starting thread pool socketserver")
@@ -121,6 +167,7 @@ class SocketServer_Threadpool(object):
             log.info("not using SSL")
         self.sock = socketutil.create_socket(bind=bind_location,
                                              reuseaddr=config.SOCK_REUSE,
+                                             reuseport=config.SOCK_REUSEPORT,
                                              timeout=config.COMMTIMEOUT,
                                              noinherit=True,
                                              nodelay=config.SOCK_NODELAY,
@@ -138,10 +185,19 @@ class SocketServer_Threadpool(object):
                 self.locationStr = "[%s]:%d" % (host, port)
             else:
                 self.locationStr = "%s:%d" % (host, port)
-        self.pool = Pool()
+        self.reactor = config.THREADPOOL_REACTOR
+        self.pool = Pool(self._wakeupReactor if self.reactor else None)
         self.housekeeper = Housekeeper(daemon)
         self.housekeeper.start()
         self._selector.register(self.sock, selectors.EVENT_READ, self)
+        if self.reactor:
+            # idle client connections are watched by the selector, workers only handle requests.
+            # a socket pair is used to wake up the selector when a worker is done with its job.
+            log.info("threadpool server uses reactor mode")
+            self._wakeup_recv, self._wakeup_send = socket.socketpair()
+            self._wakeup_recv.setblocking(False)
+            self._wakeup_send.setblocking(False)
+            self._selector.register(self._wakeup_recv, selectors.EVENT_READ, None)
 
     def __del__(self):
         if self.sock is not None:
@@ -182,27 +238,86 @@ class SocketServer_Threadpool(object):
     def events(self, eventsockets):
         """used for external event loops: handle events that occur on one of the sockets of this server"""
         # we only react on events on our own server socket.
-        # all other (client) sockets are owned by their individual threads.
+        # all other (client) sockets are owned by their individual threads,
+        # or in reactor mode, are watched by our own selector as well while they are idle.
         assert self.sock in eventsockets
         with contextlib.suppress(socket.timeout):   # just continue the loop on a timeout on accept
             events = self._selector.select(config.POLLTIMEOUT)
-            if not events:
-                return
-            csock, caddr = self.sock.accept()
+            for key, _ in events:
+                if key.fileobj is self.sock:
+                    self._handleConnection()
+                elif key.fileobj is self._wakeup_recv:
+                    with contextlib.suppress(OSError):
+                        self._wakeup_recv.recv(4096)
+                else:
+                    # a request arrived on an idle connection, let a worker handle it
+                    self._selector.unregister(key.fileobj)
+                    self._dispatch(key.data)
+        self.pool.expire()
+        if self.reactor:
+            self._processReturned()
+
+    def _handleConnection(self):
+        csock, caddr = self.sock.accept()
+        if self.shutting_down:
+            csock.close()
+            return
+        if hasattr(csock, "getpeercert"):
+            log.debug("connected %s - SSL", caddr)
+        else:
+            log.debug("connected %s - unencrypted", caddr)
+        if config.COMMTIMEOUT:
+            csock.settimeout(config.COMMTIMEOUT)
+        if self.reactor:
+            self._dispatch(ReactorConnectionJob(socketutil.SocketConnection(csock), caddr, self, handshake=True))
+            return
+        job = ClientConnectionJob(csock, caddr, self.daemon)
+        try:
+            self.pool.process(job)
+        except NoFreeWorkersError:
+            job.denyConnection("no free workers, increase server threadpool size")
+
+    def _dispatch(self, job):
+        if self._pending:
+            self._pending.append(job)   # keep the order
+            return
+        try:
+            self._submit(job)
+        except NoFreeWorkersError:
+            # in reactor mode the job simply waits until a worker becomes available
+            self._pending.append(job)
+
+    def _submit(self, job):
+        # a new connection may have to wait for a worker at most THREADPOOL_QUEUE_WAIT seconds,
+        # but a request that arrived on an established connection is never dropped.
+        self.pool.process(job, None if job.handshake else 0)
+
+    def _processReturned(self):
+        # (re)register the connections that have been handed back by the workers, and dispatch waiting jobs
+        while self._returned:
+            job = self._returned.popleft()
+            sock = job.csock.sock
             if self.shutting_down:
-                csock.close()
-                return
-            if hasattr(csock, "getpeercert"):
-                log.debug("connected %s - SSL", caddr)
+                job.disconnect()
+            elif job.csock.buffered or (hasattr(sock, "pending") and sock.pending()):
+                self._dispatch(job)     # data is already waiting, the selector wouldn't report that
             else:
-                log.debug("connected %s - unencrypted", caddr)
-            if config.COMMTIMEOUT:
-                csock.settimeout(config.COMMTIMEOUT)
-            job = ClientConnectionJob(csock, caddr, self.daemon)
+                self._selector.register(sock, selectors.EVENT_READ, job)
+        while self._pending and not self.shutting_down:
             try:
-                self.pool.process(job)
+                self._submit(self._pending[0])
             except NoFreeWorkersError:
-                job.denyConnection("no free workers, increase server threadpool size")
+                break
+            self._pending.popleft()
+
+    def reactor_done(self, job):
+        """called by a worker when it is done with a connection that stays active; it will wait for the next request"""
+        self._returned.append(job)
+
+    def _wakeupReactor(self):
+        # called by the pool when a worker has become available
+        with contextlib.suppress(OSError):
+            self._wakeup_send.send(b"!")
 
     def shutdown(self):
         self.shutting_down = True
@@ -226,6 +341,18 @@ class SocketServer_Threadpool(object):
                     if os.path.exists(sockname):
                         os.remove(sockname)
             self.sock = None
+        if self.reactor:
+            for key in list(self._selector.get_map().values()):
+                if isinstance(key.data, ReactorConnectionJob):
+                    key.data.csock.close()
+            while self._returned:
+                self._returned.popleft().csock.close()
+            while self._pending:
+                self._pending.popleft().csock.close()
+            with contextlib.suppress(OSError):
+                self._wakeup_recv.close()
+                self._wakeup_send.close()
+            self.reactor = False
         self.pool.close()
 
     @property
@@ -264,38 +391,54 @@ class Worker(threading.Thread):
 
     def run(self):
         while True:
-            self.job_available.wait()
+            if not self.job_available.wait(config.THREADPOOL_IDLETIMEOUT or None):
+                # been idle for a while, the pool decides if we're still needed
+                if self.pool.retire(self):
+                    break
+                continue
             self.job_available.clear()
-            if self.job is None:
+            job = self.job
+            if job is None:
                 break
-            try:
-                self.job()
-            except Exception as x:
-                log.exception("unhandled exception from job in worker thread %s: %s", self.name, x)
-            self.job = None
-            self.pool.notify_done(self)
+            while job is not None:
+                try:
+                    job()
+                except Exception as x:
+                    log.exception("unhandled exception from job in worker thread %s: %s", self.name, x)
+                self.job = None
+                job = self.pool.next_job(self)
         self.pool = None
 
 
 class Pool(object):
     """
     A job processing pool that is using a pool of worker threads.
-    The amount of worker threads in the pool is configurable and scales between min/max size.
+    The amount of worker threads in the pool is configurable and scales between min/max size:
+    new workers are started when a job arrives and all workers are busy, workers that
+    have been idle for THREADPOOL_IDLETIMEOUT seconds are stopped.
+    When the maximum number of workers is busy, jobs wait in a bounded queue (THREADPOOL_QUEUE_SIZE)
+    for at most THREADPOOL_QUEUE_WAIT seconds until a worker picks them up.
     """
-    def __init__(self):
+    def __init__(self, done_callback=None):
         if config.THREADPOOL_SIZE < 1 or config.THREADPOOL_SIZE_MIN < 1:
             raise ValueError("threadpool sizes must be greater than zero")
         if config.THREADPOOL_SIZE_MIN > config.THREADPOOL_SIZE:
             raise ValueError("minimum threadpool size must be less than or equal to max size")
+        if config.THREADPOOL_QUEUE_SIZE < 0:
+            raise ValueError("threadpool queue size can't be negative")
         self.idle = set()
         self.busy = set()
+        self.queue = collections.deque()    # (job, time queued, max wait time)
         self.closed = False
+        self.done_callback = done_callback
+        self.lock = threading.Lock()
+        self.queued_total = self.queued_max = self.rejected = self.expired = 0
+        self.wait_total = self.wait_max = 0.0
         for _ in range(config.THREADPOOL_SIZE_MIN):
             worker = Worker(self)
             self.idle.add(worker)
             worker.start()
         log.debug("worker pool created with initial size %d", self.num_workers())
-        self.count_lock = threading.Lock()
 
     def __enter__(self):
         return self
@@ -306,11 +449,16 @@ class Pool(object):
     def close(self):
         if not self.closed:
             log.debug("closing down")
-            self.closed = True
+            with self.lock:
+                self.closed = True
+                queued, self.queue = self.queue, collections.deque()
+                self.expired += len(queued)
             for w in list(self.busy):
                 w.process(None)
             for w in list(self.idle):
                 w.process(None)
+            for job, _, _ in queued:
+                self._expire_job(job)
             time.sleep(0.1)
             idle, self.idle = self.idle, set()
             busy, self.busy = self.busy, set()
@@ -326,34 +474,118 @@ class Pool(object):
                     p.join(timeout=0.1)
 
     def __repr__(self):
-        return "<%s.%s at 0x%x; %d busy workers; %d idle workers>" % \
-               (self.__class__.__module__, self.__class__.__name__, id(self), len(self.busy), len(self.idle))
+        return "<%s.%s at 0x%x; %d busy workers; %d idle workers; %d queued jobs>" % \
+               (self.__class__.__module__, self.__class__.__name__, id(self), len(self.busy), len(self.idle), len(self.queue))
 
     def num_workers(self):
         return len(self.busy) + len(self.idle)
 
-    def process(self, job):
-        if self.closed:
-            raise PoolError("job queue is closed")
-        if self.idle:
-            worker = self.idle.pop()
-        elif self.num_workers() < config.THREADPOOL_SIZE:
-            worker = Worker(self)
-            worker.start()
-        else:
+    def process(self, job, max_wait=None):
+        """
+        Hand the job to a worker, or put it in the queue if all workers are busy.
+        The job waits at most max_wait seconds in the queue (default: THREADPOOL_QUEUE_WAIT, 0 means no limit).
+        Raises NoFreeWorkersError if the queue is full as well.
+        """
+        with self.lock:
+            if self.closed:
+                raise PoolError("job queue is closed")
+            expired = self._take_expired()
+            worker = None
+            full = False
+            if self.idle:
+                worker = self.idle.pop()
+            elif self.num_workers() < config.THREADPOOL_SIZE:
+                worker = Worker(self)
+                worker.start()
+            elif len(self.queue) < config.THREADPOOL_QUEUE_SIZE:
+                if max_wait is None:
+                    max_wait = config.THREADPOOL_QUEUE_WAIT
+                self.queue.append((job, time.monotonic(), max_wait))
+                self.queued_total += 1
+                self.queued_max = max(self.queued_max, len(self.queue))
+                log.debug("all workers busy, job queued; queue length %d", len(self.queue))
+            else:
+                self.rejected += 1
+                full = True
+            if worker is not None:
+                self.busy.add(worker)
+                worker.process(job)
+                log.debug("worker counts: %d busy, %d idle", len(self.busy), len(self.idle))
+        for expired_job in expired:
+            self._expire_job(expired_job)
+        if full:
             raise NoFreeWorkersError("no free workers available, increase thread pool size")
-        self.busy.add(worker)
-        worker.process(job)
-        log.debug("worker counts: %d busy, %d idle", len(self.busy), len(self.idle))
-
-    def notify_done(self, worker):
-        if worker in self.busy:
-            self.busy.remove(worker)
-        if self.closed:
-            worker.process(None)
-            return
-        if len(self.idle) >= config.THREADPOOL_SIZE_MIN:
-            worker.process(None)
-        else:
-            self.idle.add(worker)
-        log.debug("worker counts: %d busy, %d idle", len(self.busy), len(self.idle))
+
+    def next_job(self, worker):
+        """called by a worker when it finished a job; returns the next queued job for it, or None when it becomes idle"""
+        with self.lock:
+            expired = self._take_expired()
+            job = None
+            if self.queue and not self.closed:
+                job, queued, _ = self.queue.popleft()
+                waited = time.monotonic() - queued
+                self.wait_total += waited
+                self.wait_max = max(self.wait_max, waited)
+            else:
+                self.busy.discard(worker)
+                if not self.closed:
+                    self.idle.add(worker)
+                log.debug("worker counts: %d busy, %d idle", len(self.busy), len(self.idle))
+        for expired_job in expired:
+            self._expire_job(expired_job)
+        if self.done_callback:
+            self.done_callback()
+        return job
+
+    def retire(self, worker):
+        """called by a worker that has been idle for a while; returns True if it should stop"""
+        with self.lock:
+            if worker in self.idle and (self.closed or self.num_workers() > config.THREADPOOL_SIZE_MIN):
+                self.idle.remove(worker)
+                log.debug("idle worker stopped; worker counts: %d busy, %d idle", len(self.busy), len(self.idle))
+                return True
+            return False
+
+    def expire(self):
+        """remove the jobs that have been waiting in the queue for longer than their maximum wait time"""
+        with self.lock:
+            expired = self._take_expired()
+        for job in expired:
+            self._expire_job(job)
+
+    def _take_expired(self):
+        # must be called with the lock held
+        if not self.queue:
+            return []
+        now = time.monotonic()
+        expired = [job for job, queued, max_wait in self.queue if max_wait and now - queued > max_wait]
+        if expired:
+            self.queue = collections.deque(item for item in self.queue if item[0] not in expired)
+            self.expired += len(expired)
+        return expired
+
+    def _expire_job(self, job):
+        log.warning("job waited too long for a free worker, increase thread pool size")
+        expired = getattr(job, "expired", None)
+        if expired:
+            try:
+                expired()
+            except Exception as x:
+                log.warning("error while expiring job: %s", x)
+
+    def stats(self):
+        """statistics about the workers and the job queue, to help with sizing the pool"""
+        with self.lock:
+            dequeued = self.queued_total - len(self.queue) - self.expired
+            return {
+                "workers": self.num_workers(),
+                "busy": len(self.busy),
+                "idle": len(self.idle),
+                "queued": len(self.queue),
+                "queued_max": self.queued_max,
+                "queued_total": self.queued_total,
+                "rejected": self.rejected,
+                "expired": self.expired,
+                "wait_avg": self.wait_total / dequeued if dequeued > 0 else 0.0,
+                "wait_max": self.wait_max
+            }
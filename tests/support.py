@@ -196,6 +196,8 @@ class ConnectionMock(object):
             self.received = initial_msg.data   # it's probably a Message object
 
     def send(self, data):
+        if isinstance(data, list):
+            data = b"".join(data)   # list of buffers, such as the chunks of a message
         self.received += data
 
     def recv(self, datasize):
@@ -0,0 +1,317 @@
+"""
+Tests for the asyncio proxy.
+
+Pyro - Python Remote Objects.  Copyright by Irmen de Jong (irmen@razorvine.net).
+"""
+
+import time
+import asyncio
+import threading
+import pytest
+import Pyro5.aio
+import Pyro5.client
+import Pyro5.server
+import Pyro5.errors
+import Pyro5.callcontext
+import Pyro5.protocol
+from Pyro5 import config
+
+
+@Pyro5.server.expose
+class AioTestObject(object):
+    def __init__(self):
+        self._value = 42
+
+    @property
+    def value(self):
+        return self._value
+
+    @value.setter
+    def value(self, value):
+        self._value = value
+
+    def echo(self, obj):
+        return obj
+
+    def divide(self, x, y):
+        return x // y
+
+    def delay(self, delay):
+        time.sleep(delay)
+        return delay
+
+    @Pyro5.server.oneway
+    def oneway_store(self, value):
+        self._value = value
+
+    def generator(self):
+        yield "one"
+        yield "two"
+        yield "three"
+
+
+class DaemonLoopThread(threading.Thread):
+    def __init__(self, pyrodaemon):
+        super().__init__()
+        self.daemon = True
+        self.pyrodaemon = pyrodaemon
+
+    def run(self):
+        self.pyrodaemon.requestLoop()
+
+
+class TestAsyncProxy:
+    SERVERTYPE = "thread"
+
+    def setup_method(self):
+        config.SERVERTYPE = self.SERVERTYPE
+        config.COMMTIMEOUT = 0.0
+        self.daemon = Pyro5.server.Daemon(port=0)
+        self.uri = self.daemon.register(AioTestObject, "aiotest")
+        self.daemonthread = DaemonLoopThread(self.daemon)
+        self.daemonthread.start()
+
+    def teardown_method(self):
+        self.daemon.shutdown()
+        self.daemonthread.join()
+        config.reset()
+
+    def run(self, coro):
+        return asyncio.run(asyncio.wait_for(coro, 10))
+
+    def testCalls(self):
+        async def calls():
+            async with Pyro5.aio.Proxy(self.uri) as p:
+                assert p._pyroConnection is None
+                assert await p.echo("hello") == "hello"
+                assert p._pyroConnection is not None
+                assert "echo" in p._pyroMethods
+                assert await p.echo([1, 2, 3]) == [1, 2, 3]
+                with pytest.raises(ZeroDivisionError):
+                    await p.divide(1, 0)
+                with pytest.raises(AttributeError):
+                    await p.nonexisting()
+            assert p._pyroConnection is None
+        self.run(calls())
+
+    def testAttributesAndOneway(self):
+        async def attributes():
+            async with Pyro5.aio.Proxy(self.uri) as p:
+                assert await p.value == 42
+                await p._pyroSetAttr("value", 99)
+                assert await p.value == 99
+                with pytest.raises(AttributeError):
+                    p.value = 1
+                assert await p.oneway_store(123) is None
+                await p.echo(0)   # the oneway call was sent before this one
+                assert await p.value == 123
+        self.run(attributes())
+
+    def testConcurrentCalls(self):
+        async def concurrent():
+            async with Pyro5.aio.Proxy(self.uri) as p:
+                results = await asyncio.gather(*(p.echo(i) for i in range(500)))
+                assert results == list(range(500))
+        self.run(concurrent())
+
+    def testAsyncIterator(self):
+        async def iterate():
+            async with Pyro5.aio.Proxy(self.uri) as p:
+                assert [item async for item in await p.generator()] == ["one", "two", "three"]
+                stream = await p.generator()
+                assert await stream.__anext__() == "one"
+                await stream.aclose()
+                with pytest.raises(StopAsyncIteration):
+                    await stream.__anext__()
+        self.run(iterate())
+
+    def testTimeout(self):
+        async def timeout():
+            async with Pyro5.aio.Proxy(self.uri) as p:
+                p._pyroTimeout = 0.1
+                with pytest.raises(Pyro5.errors.TimeoutError):
+                    await p.delay(0.3)
+                # the late reply is discarded, the connection remains usable
+                p._pyroTimeout = 2
+                assert await p.echo("still works") == "still works"
+        self.run(timeout())
+
+    def testConnectionClosed(self):
+        async def closed():
+            p = Pyro5.aio.Proxy(self.uri)
+            await p._pyroBind()
+            call = asyncio.ensure_future(p.delay(0.2))
+            await asyncio.sleep(0.05)
+            p._pyroRelease()
+            with pytest.raises(Pyro5.errors.ConnectionClosedError):
+                await call
+            assert await p.echo(1) == 1, "should reconnect"
+            p._pyroRelease()
+        self.run(closed())
+
+    def testConnectFail(self):
+        async def connect():
+            p = Pyro5.aio.Proxy("PYRO:aiotest@localhost:1")
+            with pytest.raises(Pyro5.errors.CommunicationError):
+                await p._pyroBind()
+        self.run(connect())
+
+
+class TestAsyncProxyMultiplex(TestAsyncProxy):
+    SERVERTYPE = "multiplex"
+
+
+@Pyro5.server.expose
+class AsyncMethodsObject(object):
+    def __init__(self):
+        self.stored = asyncio.Queue()
+
+    async def sleep(self, delay, result):
+        await asyncio.sleep(delay)
+        return result
+
+    async def divide(self, x, y):
+        await asyncio.sleep(0)
+        return x // y
+
+    async def annotated(self, delay):
+        seq = Pyro5.callcontext.current_context.seq
+        await asyncio.sleep(delay)
+        assert Pyro5.callcontext.current_context.seq == seq, "call context must be restored after await"
+        Pyro5.callcontext.current_context.response_annotations["XYZZ"] = b"async"
+        return bytes(Pyro5.callcontext.current_context.annotations.get("XYZZ", b"")).decode()
+
+    @Pyro5.server.oneway
+    async def store(self, value):
+        await asyncio.sleep(0.01)
+        await self.stored.put(value)
+
+    async def fetch(self):
+        return await self.stored.get()
+
+    async def generator(self):
+        return iter(["one", "two"])
+
+    def blocking(self, delay):
+        time.sleep(delay)
+        return threading.current_thread().name
+
+    async def download(self, frames):
+        frame = b"x" * 65536
+        self.frames_produced = 0
+
+        def produce():
+            for _ in range(frames):
+                self.frames_produced += 1
+                yield frame
+        return Pyro5.protocol.ChunkedData(produce(), frame_size=len(frame))
+
+
+class TestAsyncioServer:
+    def setup_method(self):
+        config.SERVERTYPE = "asyncio"
+        config.COMMTIMEOUT = 0.0
+        self.daemon = Pyro5.server.Daemon(port=0)
+        self.uri = self.daemon.register(AsyncMethodsObject(), "asyncobject")
+        self.daemonthread = DaemonLoopThread(self.daemon)
+        self.daemonthread.start()
+
+    def teardown_method(self):
+        self.daemon.shutdown()
+        self.daemonthread.join()
+        config.reset()
+
+    def testCoroutineMethods(self):
+        with Pyro5.client.Proxy(self.uri) as p:
+            assert p.sleep(0.01, "result") == "result"
+            with pytest.raises(ZeroDivisionError):
+                p.divide(1, 0)
+            assert p.store("stored") is None
+            assert p.fetch() == "stored"
+            assert list(p.generator()) == ["one", "two"]
+            assert p.blocking(0).startswith("Pyro-asyncio-worker")
+
+    def testConcurrentCoroutines(self):
+        async def calls():
+            proxies = [Pyro5.aio.Proxy(self.uri) for _ in range(40)]
+            start = time.time()
+            results = await asyncio.gather(*(p.sleep(0.5, i) for i, p in enumerate(proxies)))
+            duration = time.time() - start
+            for p in proxies:
+                p._pyroRelease()
+            return results, duration
+        results, duration = asyncio.run(calls())
+        assert results == list(range(40))
+        assert duration < 3, "coroutine calls must run concurrently on the event loop"
+
+    def testCallContext(self):
+        def call(results):
+            with Pyro5.client.Proxy(self.uri) as p:
+                Pyro5.callcontext.current_context.annotations = {"XYZZ": threading.current_thread().name.encode()}
+                results.append((p.annotated(0.2), threading.current_thread().name,
+                                Pyro5.callcontext.current_context.response_annotations.get("XYZZ")))
+        results = []
+        threads = [threading.Thread(target=call, args=(results,)) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert len(results) == 4
+        for result, expected, response_annotation in results:
+            assert result == expected
+            assert bytes(response_annotation) == b"async"
+
+    def testChunkedResultToSlowConsumer(self):
+        # the frames of a chunked result are produced no faster than the client reads them, without blocking the event loop
+        obj = Pyro5.server._unpack_weakref(self.daemon.objectsById["asyncobject"])
+        with Pyro5.client.Proxy(self.uri) as p:
+            result = p.download(2000)
+            time.sleep(0.5)
+            assert obj.frames_produced < 500, "the server must wait for the client to read the data"
+            with Pyro5.client.Proxy(self.uri) as p2:
+                p2._pyroTimeout = 2
+                assert p2.sleep(0.01, "result") == "result"
+            assert sum(len(chunk) for chunk in result) == 2000 * 65536
+            assert obj.frames_produced == 2000
+
+    def testRegisterAfterUnregister(self):
+        @Pyro5.server.expose
+        class SyncObject(object):
+            def sleep(self, delay, result):
+                return result
+        self.daemon.unregister("asyncobject")
+        uri = self.daemon.register(SyncObject(), "object")
+        with Pyro5.client.Proxy(uri) as p:
+            assert p.sleep(0, "sync") == "sync"
+        # the number of registered objects stays the same, but now there are async methods to await
+        self.daemon.unregister("object")
+        uri = self.daemon.register(AsyncMethodsObject(), "object")
+        with Pyro5.client.Proxy(uri) as p:
+            assert p.sleep(0.01, "async") == "async"
+
+
+class TestAsyncioServerEmbedded:
+    def testRequestLoopAsync(self):
+        async def serve_and_call():
+            with Pyro5.server.Daemon(port=0) as daemon:
+                uri = daemon.register(AsyncMethodsObject(), "asyncobject")
+                server = asyncio.ensure_future(daemon.requestLoopAsync())
+                async with Pyro5.aio.Proxy(uri) as p:
+                    results = await asyncio.gather(*(p.sleep(0.1, i) for i in range(10)))
+                server.cancel()
+                with pytest.raises(asyncio.CancelledError):
+                    await server
+                return results
+        config.SERVERTYPE = "asyncio"
+        config.COMMTIMEOUT = 0.0
+        try:
+            assert asyncio.run(serve_and_call()) == list(range(10))
+        finally:
+            config.reset()
+
+    def testRequestLoopAsyncWrongServerType(self):
+        async def serve():
+            with Pyro5.server.Daemon(port=0) as daemon:
+                await daemon.requestLoopAsync()
+        with pytest.raises(Pyro5.errors.PyroError):
+            asyncio.run(serve())
@@ -4,7 +4,9 @@ import time
 import Pyro5.client
 import Pyro5.server
 import Pyro5.errors
+import Pyro5.protocol
 from Pyro5 import config
+from support import ConnectionMock
 
 
 class TestProxy:
@@ -255,7 +257,7 @@ class TestRemoteMethod:
         def _pyroClaimOwnership(self):
             pass
 
-        def _pyroInvokeBatch(self, calls, oneway=False):
+        def _pyroInvokeBatch(self, calls, oneway=False, parallel=False, stop_on_error=True):
             self.result = []
             for methodname, args, kwargs in calls:
                 if methodname == "error":
@@ -317,3 +319,21 @@ class TestRemoteMethod:
         assert list(results) == ['INVOKED foo args=(3,) kwargs={}', 'INVOKED foo args=(4,) kwargs={}']
         results = batch()
         assert len(list(results)) == 0
+
+
+class TestPipelineReader:
+    class ClosableConnectionMock(ConnectionMock):
+        def close(self):
+            pass
+
+    def testCancelledReplyWithWrongCorrelationId(self):
+        conn = self.ClosableConnectionMock()
+        reader = Pyro5.client._PipelineReader(conn)
+        cancelled = reader.expect(1, b"x" * 16)
+        waiting = reader.expect(2, Pyro5.protocol._empty_correlation_id)
+        cancelled.cancel()
+        conn.send(Pyro5.protocol.SendingMessage(Pyro5.protocol.MSG_RESULT, 0, 1, 1, b"first").data)
+        conn.send(Pyro5.protocol.SendingMessage(Pyro5.protocol.MSG_RESULT, 0, 2, 1, b"second").data)
+        reader.run()    # until the connection runs out of data
+        assert waiting.result(0).data == b"second", "a cancelled call must not break the other calls"
+        assert isinstance(reader.error, Pyro5.errors.ConnectionClosedError)
@@ -5,6 +5,7 @@ Pyro - Python Remote Objects.  Copyright by Irmen de Jong (irmen@razorvine.net).
 """
 
 import logging
+import itertools
 import time
 import socket
 import uuid
@@ -428,6 +429,36 @@ class TestDaemon:
             assert msg.seq == 99
             assert b"no way, handshake denied" in msg.data
 
+    def testClientSession(self):
+        conn = ConnectionMock()
+        with Pyro5.server.Daemon(port=0) as d:
+            corr_id = uuid.uuid4()
+            self.sendHandshakeMessage(conn, correlation_id=corr_id)
+            assert d._handshake(conn)
+            Pyro5.protocol.recv_stub(conn)
+            session = conn.session
+            assert session.handshake == "hello"
+            assert session.serializer_id == Pyro5.serializers.MarshalSerializer.serializer_id
+            assert session.correlation_id == corr_id
+            assert session.sock_addr is None
+            assert session.peer_cert is None
+            ser = Pyro5.serializers.serializers_by_id[Pyro5.serializers.MarshalSerializer.serializer_id]
+            correlation_ids = set()
+            for seq in (1, 2):
+                current_context.correlation_id = None   # the same thread plays the client, that doesn't send one
+                data = ser.dumpsCall(Pyro5.core.DAEMON_NAME, "ping", (), {})
+                conn.send(Pyro5.protocol.SendingMessage(Pyro5.protocol.MSG_INVOKE, 0, seq, ser.serializer_id, data).data)
+                d.handleRequest(conn)
+                msg = Pyro5.protocol.recv_stub(conn)
+                assert msg.type == Pyro5.protocol.MSG_RESULT
+                assert current_context.client is conn
+                assert current_context.seq == seq
+                correlation_ids.add(current_context.correlation_id)
+            assert len(correlation_ids) == 2, "every call without correlation id gets its own"
+            assert corr_id not in correlation_ids
+            assert all(c.int >> 48 == corr_id.int >> 48 for c in correlation_ids), "derived from the one of the session"
+            assert conn.session is session
+
     def testCustomHandshake(self):
         conn = ConnectionMock()
         class CustomHandshakeDaemon(Pyro5.server.Daemon):
@@ -594,6 +625,70 @@ class TestDaemon:
                 assert not(TestClass in d._pyroInstances)
                 assert not(TestClass in conn.pyroInstances)
 
+    def testInstanceCreationPool(self):
+        created = []
+        def creator(clazz):
+            created.append(clazz("testname"))
+            return created[-1]
+        @Pyro5.server.behavior(instance_mode="pool", instance_creator=creator)
+        class TestClass:
+            def __init__(self, name):
+                self.name = name
+        config.INSTANCEPOOL_SIZE_MIN = 2
+        config.INSTANCEPOOL_SIZE = 3
+        config.INSTANCEPOOL_IDLETIMEOUT = 0.1
+        config.COMMTIMEOUT = 0.2
+        try:
+            with Pyro5.socketutil.SocketConnection(socket.socket()) as conn:
+                with Pyro5.server.Daemon() as d:
+                    d.register(TestClass)
+                    assert len(created) == 2, "minimum number of instances should be created when registered"
+                    instances = [d._getInstance(TestClass, conn) for _ in range(3)]
+                    assert len(created) == 3
+                    assert len({id(i) for i in instances}) == 3, "every checkout gets its own instance"
+                    assert not(TestClass in d._pyroInstances)
+                    assert not(TestClass in conn.pyroInstances)
+                    with pytest.raises(DaemonError):
+                        d._getInstance(TestClass, conn)     # pool is at its maximum size and all instances are in use
+                    d._releaseInstance(TestClass, instances[2])
+                    assert d._getInstance(TestClass, conn) is instances[2]
+                    for instance in instances:
+                        d._releaseInstance(TestClass, instance)
+                    pool = d._instancePool(TestClass)
+                    assert pool.stats() == {"size": 3, "idle": 3}
+                    time.sleep(0.15)
+                    d._housekeeping()
+                    assert pool.stats() == {"size": 2, "idle": 2}, "idle instances above the minimum should be evicted"
+        finally:
+            config.INSTANCEPOOL_SIZE_MIN = 0
+            config.INSTANCEPOOL_SIZE = 16
+            config.INSTANCEPOOL_IDLETIMEOUT = 60.0
+            config.COMMTIMEOUT = 0.0
+
+    def testInstancePoolOptions(self):
+        @Pyro5.server.behavior(instance_mode="pool", pool_size=2, pool_min=1, pool_idle=0.1)
+        class TestClass:
+            pass
+        config.COMMTIMEOUT = 0.2
+        try:
+            with Pyro5.socketutil.SocketConnection(socket.socket()) as conn:
+                with Pyro5.server.Daemon() as d:
+                    d.register(TestClass)
+                    pool = d._instancePool(TestClass)
+                    assert pool.stats() == {"size": 1, "idle": 1}
+                    instances = [d._getInstance(TestClass, conn) for _ in range(2)]
+                    with pytest.raises(DaemonError):
+                        d._getInstance(TestClass, conn)     # pool_size overrides INSTANCEPOOL_SIZE
+                    for instance in instances:
+                        d._releaseInstance(TestClass, instance)
+                    time.sleep(0.15)
+                    d._housekeeping()
+                    assert pool.stats() == {"size": 1, "idle": 1}
+        finally:
+            config.COMMTIMEOUT = 0.0
+        with pytest.raises(ValueError):
+            Pyro5.server.behavior(instance_mode="session", pool_size=2)(TestClass)
+
     def testInstanceCreationWrongType(self):
         def creator(clazz):
             return Pyro5.core.URI("PYRO:test@localhost:9999")
@@ -669,7 +764,122 @@ class TestMetaInfo:
             daemon_obj = d.objectsById[Pyro5.core.DAEMON_NAME]
             assert len(daemon_obj.info()) > 10
             meta = daemon_obj.get_metadata(Pyro5.core.DAEMON_NAME)
-            assert meta["methods"] == {"get_metadata", "get_next_stream_item", "close_stream", "info", "ping", "registered"}
+            assert meta["methods"] == {"get_metadata", "get_next_stream_item", "get_next_stream_items", "get_stream_items", "close_stream", "info", "ping", "registered"}
+
+    def testGetNextStreamItems(self):
+        def generator():
+            yield b"x" * 100
+            yield b"y" * 100
+            yield b"z" * 100
+            raise ValueError("failed")
+        with Pyro5.server.Daemon() as d:
+            daemon_obj = d.objectsById[Pyro5.core.DAEMON_NAME]
+            d.streaming_responses["stream"] = (None, time.time(), 0, generator())
+            assert daemon_obj.get_next_stream_items("stream", 2) == [b"x" * 100, b"y" * 100]
+            d.streaming_responses["stream"] = (None, time.time(), 0, generator())
+            assert daemon_obj.get_next_stream_items("stream", 10, 150) == [b"x" * 100, b"y" * 100], "size limit"
+            assert daemon_obj.get_next_stream_items("stream", 10) == [b"z" * 100]
+            with pytest.raises(ValueError):
+                daemon_obj.get_next_stream_items("stream", 10)    # the error is reported by the next call
+            assert "stream" not in d.streaming_responses
+            d.streaming_responses["stream"] = (None, time.time(), 0, iter([1, 2]))
+            assert daemon_obj.get_next_stream_items("stream", 10) == [1, 2]
+            with pytest.raises(StopIteration):
+                daemon_obj.get_next_stream_items("stream", 10)
+            assert "stream" not in d.streaming_responses
+
+    def testReadAheadStream(self):
+        produced = []
+        def generator(count):
+            for i in range(count):
+                produced.append(i)
+                yield i
+            raise ValueError("failed")
+        stream = Pyro5.server._ReadAheadStream(generator(20), 4)
+        time.sleep(0.1)
+        assert produced == [0, 1, 2, 3], "must run ahead, but only up to the buffer limit"
+        assert [next(stream) for _ in range(3)] == [0, 1, 2]
+        time.sleep(0.1)
+        assert len(produced) == 7
+        assert list(itertools.islice(stream, 17)) == list(range(3, 20))
+        with pytest.raises(ValueError):
+            next(stream)
+        stream = Pyro5.server._ReadAheadStream(iter([b"x" * 100] * 10), 10, 250)
+        time.sleep(0.1)
+        assert len(stream.buffer) == 3, "must stop at the size limit"
+        stream.close()
+        assert len(stream.buffer) == 0
+        with pytest.raises(StopIteration):
+            next(stream)
+
+    def testReadAheadStreamRemoved(self):
+        orig_readahead = Pyro5.config.ITER_STREAM_AHEAD
+        try:
+            Pyro5.config.ITER_STREAM_AHEAD = 5
+            with Pyro5.server.Daemon() as d:
+                daemon_obj = d.objectsById[Pyro5.core.DAEMON_NAME]
+                is_stream, stream_id = d._streamResponse(iter(range(100)), None)
+                assert is_stream
+                stream = d.streaming_responses[stream_id][3]
+                assert isinstance(stream, Pyro5.server._ReadAheadStream)
+                assert daemon_obj.get_next_stream_item(stream_id) == 0
+                assert daemon_obj.get_next_stream_items(stream_id, 3) == [1, 2, 3]
+                daemon_obj.close_stream(stream_id)
+                assert stream.closed
+                assert stream_id not in d.streaming_responses
+                _, stream_id = d._streamResponse(iter(range(100)), "client")
+                stream = d.streaming_responses[stream_id][3]
+                orig_linger = Pyro5.config.ITER_STREAM_LINGER
+                try:
+                    Pyro5.config.ITER_STREAM_LINGER = 0
+                    d._clientDisconnect("client")
+                finally:
+                    Pyro5.config.ITER_STREAM_LINGER = orig_linger
+                assert stream.closed
+                assert stream_id not in d.streaming_responses
+                _, stream_id = d._streamResponse(iter(range(100)), None)
+                stream = d.streaming_responses[stream_id][3]
+            assert stream.closed, "daemon close must close the streams"
+        finally:
+            Pyro5.config.ITER_STREAM_AHEAD = orig_readahead
+
+    def testStreamsIndexAndExpiry(self):
+        orig_linger = Pyro5.config.ITER_STREAM_LINGER
+        orig_lifetime = Pyro5.config.ITER_STREAM_LIFETIME
+        try:
+            with Pyro5.server.Daemon() as d:
+                streams = {client: [d._streamResponse(iter([1, 2, 3]), client)[1] for _ in range(100)]
+                           for client in ("client1", "client2", "client3")}
+                assert len(d.streaming_responses) == 300
+                assert d._streams_by_client["client1"] == set(streams["client1"])
+                Pyro5.config.ITER_STREAM_LINGER = 0
+                d._clientDisconnect("client1")
+                assert len(d.streaming_responses) == 200
+                assert "client1" not in d._streams_by_client
+                Pyro5.config.ITER_STREAM_LINGER = 0.2
+                d._clientDisconnect("client2")
+                assert len(d.streaming_responses) == 200, "streams of client2 must linger"
+                assert all(d.streaming_responses[stream_id][0] is None for stream_id in streams["client2"])
+                # reconnect to one of the lingering streams
+                daemon_obj = d.objectsById[Pyro5.core.DAEMON_NAME]
+                current_context.client = "client2b"
+                assert daemon_obj.get_next_stream_item(streams["client2"][0]) == 1
+                assert d._streams_by_client["client2b"] == {streams["client2"][0]}
+                d._housekeeping()
+                assert len(d.streaming_responses) == 200
+                time.sleep(0.3)
+                d._housekeeping()
+                assert len(d.streaming_responses) == 101, "lingering streams of client2 must have expired, except the reconnected one"
+                Pyro5.config.ITER_STREAM_LIFETIME = 0.2
+                d._housekeeping()
+                assert len(d.streaming_responses) == 0, "all streams must have expired"
+                assert not d._streams_by_client
+                assert not d._streams_lifetime_heap
+                assert not d._streams_linger_heap
+        finally:
+            Pyro5.config.ITER_STREAM_LINGER = orig_linger
+            Pyro5.config.ITER_STREAM_LIFETIME = orig_lifetime
+            current_context.client = None
 
     def testMetaSerialization(self):
         with Pyro5.server.Daemon() as d:
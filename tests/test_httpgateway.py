@@ -98,7 +98,7 @@ def wsgiserver():
         def __call__(self, *args, **kwargs):
             return ["Name1", "Name2", "Name3"]
 
-        def _pyroInvokeBatch(self, calls, oneway=False):
+        def _pyroInvokeBatch(self, calls, oneway=False, parallel=False, stop_on_error=True):
             return ["Name1"]
 
         def _pyroClaimOwnership(self):
@@ -1,3 +1,4 @@
+import io
 import zlib
 import pytest
 import Pyro5.protocol
@@ -24,6 +25,20 @@ class TestSendingMessage:
         msg = Pyro5.protocol.SendingMessage(Pyro5.protocol.MSG_INVOKE, 0, 42, 99, b"abcdefg", annotations={"zxcv": b"bytes"})
         assert len(msg.data) > 1
 
+    def test_chunks(self):
+        payload = b"abcdefg" * 100
+        msg = Pyro5.protocol.SendingMessage(Pyro5.protocol.MSG_INVOKE, 0, 42, 99, payload, annotations={"zxcv": b"bytes"})
+        assert len(msg.chunks) == 4
+        assert msg.chunks[-1] is payload    # the payload is not copied
+        assert msg.size == sum(len(c) for c in msg.chunks)
+        data = msg.data
+        assert len(data) == msg.size
+        assert data.endswith(payload)
+        assert msg.chunks == [data]
+        msg = Pyro5.protocol.SendingMessage(Pyro5.protocol.MSG_INVOKE, 0, 42, 99, b"")
+        assert len(msg.chunks) == 1
+        assert msg.size == Pyro5.protocol._header_size
+
     def test_compression(self):
         compr_orig = Pyro5.config.COMPRESSION
         try:
@@ -169,3 +184,80 @@ class TestProtocolMessages:
         assert msg.data == b"hello"
         assert msg.annotations_size == 0
         assert len(msg.annotations) == 0
+
+
+class TestChunkedData:
+    def testSourceChunks(self):
+        data = bytes(range(250))
+        assert [bytes(c) for c in Pyro5.protocol.ChunkedData(data, 100)] == [data[:100], data[100:200], data[200:]]
+        assert [bytes(c) for c in Pyro5.protocol.ChunkedData(io.BytesIO(data), 200)] == [data[:200], data[200:]]
+        assert [bytes(c) for c in Pyro5.protocol.ChunkedData([b"abc", b"defgh"], 3)] == [b"abc", b"def", b"gh"]
+        chunked = Pyro5.protocol.ChunkedData(data, 100)
+        assert chunked.read(5) == data[:5]
+        assert chunked.read(150) == data[5:155]
+        assert chunked.read() == data[155:]
+        assert chunked.read() == b""
+        with pytest.raises(Pyro5.errors.SerializeError):
+            chunked.__getstate__()
+
+    def testFrames(self):
+        c = ConnectionMock()
+        data = b"x" * 2500
+        Pyro5.protocol.send_chunked(c, 42, 1, Pyro5.protocol.ChunkedData(data, 1000))
+        c.send(SendingMessage(Pyro5.protocol.MSG_RESULT, 0, 43, 1, b"next message").data)
+        reader = Pyro5.protocol.ChunkReader(c, 42)
+        received = Pyro5.protocol.ChunkedData()
+        assert Pyro5.protocol.attach_chunked_data([1, received], reader)
+        assert [len(chunk) for chunk in received] == [1000, 1000, 500]
+        assert reader.done
+        assert reader.next_frame() is None
+        assert Pyro5.protocol.recv_stub(c).seq == 43
+
+    def testFramesLargerThanMaxMessageSize(self):
+        c = ConnectionMock()
+        Pyro5.config.MAX_MESSAGE_SIZE = 1000
+        try:
+            with pytest.raises(Pyro5.errors.ProtocolError):
+                SendingMessage(Pyro5.protocol.MSG_INVOKE, 0, 1, 1, b"x" * 5000)
+            Pyro5.protocol.send_chunked(c, 1, 1, Pyro5.protocol.ChunkedData(b"x" * 5000, 1000))
+            received = Pyro5.protocol.ChunkedData()
+            Pyro5.protocol.attach_chunked_data([received], Pyro5.protocol.ChunkReader(c, 1))
+            assert received.read() == b"x" * 5000
+        finally:
+            Pyro5.config.MAX_MESSAGE_SIZE = 1024 * 1024 * 1024
+
+    def testDrainAndAbort(self):
+        def failing():
+            yield b"abc"
+            raise ValueError("source failed")
+        c = ConnectionMock()
+        with pytest.raises(ValueError):
+            Pyro5.protocol.send_chunked(c, 5, 1, Pyro5.protocol.ChunkedData(failing()))
+        Pyro5.protocol.send_chunked(c, 6, 1, Pyro5.protocol.ChunkedData(b"abcdef", 2))
+        received = Pyro5.protocol.ChunkedData()
+        Pyro5.protocol.attach_chunked_data([received], Pyro5.protocol.ChunkReader(c, 5))
+        with pytest.raises(Pyro5.errors.PyroError) as x:
+            received.read()
+        assert "source failed" in str(x.value)
+        reader = Pyro5.protocol.ChunkReader(c, 6)
+        assert reader.next_frame() == b"ab"
+        reader.drain()
+        assert len(c.received) == 0
+        with pytest.raises(Pyro5.errors.PyroError):
+            Pyro5.protocol.ChunkedData().read()
+
+    def testDetach(self):
+        chunked = Pyro5.protocol.ChunkedData(b"data")
+        vargs, kwargs, found = Pyro5.protocol.detach_chunked_data((1, chunked), {"a": 2})
+        assert found is chunked
+        assert vargs == [1, {"__class__": "Pyro5.protocol.ChunkedData"}]
+        assert kwargs == {"a": 2}
+        vargs, kwargs, found = Pyro5.protocol.detach_chunked_data((1,), {"a": chunked})
+        assert found is chunked
+        assert kwargs == {"a": {"__class__": "Pyro5.protocol.ChunkedData"}}
+        assert Pyro5.protocol.detach_chunked_data((1,), {})[2] is None
+        with pytest.raises(Pyro5.errors.PyroError):
+            Pyro5.protocol.detach_chunked_data((chunked,), {"a": chunked})
+        ser = Pyro5.serializers.SerpentSerializer()
+        _, _, _, kwargs = ser.loadsCall(ser.dumpsCall("obj", "method", vargs, kwargs))
+        assert isinstance(kwargs["a"], Pyro5.protocol.ChunkedData)
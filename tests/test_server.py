@@ -4,7 +4,12 @@ Tests for a running Pyro server, without timeouts.
 Pyro - Python Remote Objects.  Copyright by Irmen de Jong (irmen@razorvine.net).
 """
 
+import os
+import sys
 import time
+import signal
+import socket
+import subprocess
 import threading
 import serpent
 import pytest
@@ -96,6 +101,25 @@ class ServerTestObject(object):
         yield "four"
         yield "five"
 
+    def chunked_upload(self, name, data, skip=False):
+        if skip:
+            return name, 0
+        return name, sum(len(chunk) for chunk in data)
+
+    def chunked_download(self, size):
+        return Pyro5.protocol.ChunkedData(b"x" * size, frame_size=1000)
+
+    def chunked_generate(self, frames):
+        # the frames are produced (and counted) while they are being sent
+        frame = b"x" * 65536
+        self.frames_produced = 0
+
+        def produce():
+            for _ in range(frames):
+                self.frames_produced += 1
+                yield frame
+        return Pyro5.protocol.ChunkedData(produce(), frame_size=len(frame))
+
     def response_annotation(self):
         # part of the annotations tests
         if "XYZZ" not in Pyro5.callcontext.current_context.annotations:
@@ -283,7 +307,7 @@ class TestServerOnce:
             assert p._pyroAttrs == {'value', 'dictionary'}
             assert p._pyroMethods == {'echo', 'getDict', 'divide', 'nonserializableException', 'ping', 'oneway_delay', 'delayAndId', 'delay', 'testargs',
                               'multiply', 'oneway_multiply', 'getDictAttr', 'iterator', 'generator', 'response_annotation', 'blob', 'new_test_object',
-                              '__iter__', '__len__', '__getitem__'}
+                              'chunked_upload', 'chunked_download', 'chunked_generate', '__iter__', '__len__', '__getitem__'}
             assert p._pyroOneway == {'oneway_multiply', 'oneway_delay'}
             p._pyroAttrs = None
             p._pyroGetMetadata()
@@ -399,6 +423,51 @@ class TestServerOnce:
             with pytest.raises(StopIteration):
                 next(results)    # no more results should be available after the error
 
+    def testBatchParallel(self):
+        with Pyro5.client.Proxy(self.objectUri) as p:
+            batch = Pyro5.client.BatchProxy(p)
+            for i in range(10):
+                batch.delayAndId(0.2, i)
+            begin = time.time()
+            results = list(batch(parallel=True))
+            duration = time.time() - begin
+            assert duration < 1.5, "the batch calls should have been executed concurrently"
+            assert results == ["slept for " + str(i) for i in range(10)]
+            batch.multiply(7, 6)
+            batch.divide(999, 0)    # force an error here
+            batch.delay(0.5)        # this call should not be waited for anymore
+            batch.multiply(3, 4)
+            results = batch(parallel=True)
+            assert next(results) == 42
+            with pytest.raises(ZeroDivisionError):
+                next(results)
+            with pytest.raises(StopIteration):
+                next(results)
+
+    def testBatchCollectAll(self):
+        with Pyro5.client.Proxy(self.objectUri) as p:
+            batch = Pyro5.client.BatchProxy(p)
+            for parallel in (False, True):
+                batch.multiply(7, 6)
+                batch.divide(999, 0)
+                batch.nonexisting()
+                batch.multiply(3, 4)
+                results = list(batch(parallel=parallel, stop_on_error=False))
+                assert len(results) == 4
+                assert results[0] == 42
+                assert isinstance(results[1], ZeroDivisionError)
+                assert isinstance(results[2], AttributeError)
+                assert results[3] == 12
+            batch.multiply(7, 6)
+            batch.nonexisting()
+            with pytest.raises(AttributeError):
+                batch(parallel=True)    # unknown method fails the whole batch before anything is executed
+            batch.multiply(7, 6)
+            batch.nonexisting()
+            batch.multiply(1, 2)
+            with pytest.raises(AttributeError):
+                batch()     # sequentially, the unknown method fails the batch call itself
+
     def testBatchOneway(self):
         with Pyro5.client.Proxy(self.objectUri) as p:
             batch = Pyro5.client.BatchProxy(p)
@@ -588,6 +657,44 @@ class TestServerOnce:
 
 
 
+@Pyro5.server.expose
+class ProcessPoolTestObject(object):
+    def __init__(self, name="default"):
+        self.name = name
+
+    def pid(self):
+        return os.getpid()
+
+    @Pyro5.server.process_pool
+    def pool_pid(self):
+        return os.getpid()
+
+    @Pyro5.server.process_pool
+    def pool_divide(self, x, y):
+        return x // y
+
+    @Pyro5.server.process_pool
+    def pool_name(self):
+        return self.name
+
+
+@Pyro5.server.expose
+@Pyro5.server.behavior(instance_mode="pool")
+class PooledTestObject(object):
+    def __init__(self):
+        self.in_use = False
+
+    def use(self, delay):
+        assert not self.in_use, "pooled instance must be used by one call at a time"
+        self.in_use = True
+        time.sleep(delay)
+        self.in_use = False
+        return id(self)
+
+    def numbers(self, count):
+        return iter(range(count))
+
+
 class TestServerThreadNoTimeout:
     SERVERTYPE = "thread"
     COMMTIMEOUT = None
@@ -614,6 +721,55 @@ class TestServerThreadNoTimeout:
         config.SERVERTYPE = "thread"
         config.COMMTIMEOUT = None
 
+    def testProcessPoolMethods(self):
+        uri = self.daemon.register(ProcessPoolTestObject("registered"))
+        with Pyro5.client.Proxy(uri) as p:
+            assert p.pid() == os.getpid()
+            assert p.pool_pid() != os.getpid()
+            assert p.pool_divide(7, 2) == 3
+            with pytest.raises(ZeroDivisionError):
+                p.pool_divide(1, 0)
+            assert p.pool_name() == "default", "worker process uses its own instance"
+
+    def testInstancePool(self):
+        def wait_all_idle():
+            pool = self.daemon._instancePool(PooledTestObject)
+            for _ in range(20):
+                stats = pool.stats()
+                if stats["idle"] == stats["size"]:
+                    break
+                time.sleep(0.05)    # the instance is given back just after the response has been sent
+            return stats
+        uri = self.daemon.register(PooledTestObject)
+        results = []
+        def use():
+            with Pyro5.client.Proxy(uri) as p:
+                results.append(p.use(0.1))
+        threads = [threading.Thread(target=use) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert len(results) == 4
+        stats = wait_all_idle()
+        assert stats["size"] == len(set(results))
+        assert stats["idle"] == stats["size"], "all instances should have been given back"
+        with Pyro5.client.Proxy(uri) as p:
+            batch = Pyro5.client.BatchProxy(p)
+            for _ in range(4):
+                batch.use(0.1)
+            assert len(list(batch(parallel=True))) == 4
+        stats = wait_all_idle()
+        assert stats["idle"] == stats["size"], "all instances should have been given back"
+        with Pyro5.client.Proxy(uri) as p:
+            numbers = p.numbers(3)
+            assert next(numbers) == 0
+            stats = wait_all_idle()
+            assert stats["idle"] == stats["size"] - 1, "the item stream should keep its instance checked out"
+            assert list(numbers) == [1, 2]
+        stats = wait_all_idle()
+        assert stats["idle"] == stats["size"], "the instance should have been given back when the stream ended"
+
     def testConnectionStuff(self):
         p1 = Pyro5.client.Proxy(self.objectUri)
         p2 = Pyro5.client.Proxy(self.objectUri)
@@ -782,6 +938,174 @@ class TestServerThreadNoTimeout:
             for p in proxies:
                 p._pyroRelease()
 
+    def testPipelinedThreads(self):
+        results = []
+        with Pyro5.client.Proxy(self.objectUri) as p:
+            p._pyroPipelined = True
+
+            def call(number):
+                results.append(p.delayAndId(0.1, number))
+
+            threads = [threading.Thread(target=call, args=(i,)) for i in range(5)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            assert sorted(results) == ["slept for %d" % i for i in range(5)]
+            assert p.multiply(5, 11) == 55
+
+    def testPipelinedSubmit(self):
+        with Pyro5.client.Proxy(self.objectUri) as p:
+            with pytest.raises(Pyro5.errors.PyroError):
+                p._pyroSubmit("echo", 42)
+            p._pyroPipelined = True
+            futures = [p._pyroSubmit("echo", i) for i in range(20)]
+            assert [f.result(2) for f in futures] == list(range(20))
+            with pytest.raises(AttributeError):
+                p._pyroSubmit("nonexisting_method")
+            future = p._pyroSubmit("divide", 1, 0)
+            with pytest.raises(ZeroDivisionError):
+                future.result(2)
+            assert p._pyroSubmit("oneway_multiply", 5, 11).result(2) is None
+            assert p.multiply(5, 11) == 55
+
+    def testPipelinedTimeout(self):
+        with Pyro5.client.Proxy(self.objectUri) as p:
+            p._pyroPipelined = True
+            p._pyroTimeout = 0.1
+            with pytest.raises(Pyro5.errors.TimeoutError):
+                p.delay(0.3)
+            # the late reply is discarded and the connection remains usable
+            p._pyroTimeout = 2
+            assert p.echo("hello") == "hello"
+            assert p._pyroConnection
+
+    def testPipelinedGenerator(self):
+        with Pyro5.client.Proxy(self.objectUri) as p:
+            p._pyroPipelined = True
+            assert list(p.generator()) == ["one", "two", "three", "four", "five"]
+            assert p.echo(42) == 42
+
+    def testGeneratorPushed(self):
+        orig_credit = config.ITER_STREAM_CREDIT
+        try:
+            for credit in (1, 2, 3, 10):
+                config.ITER_STREAM_CREDIT = credit
+                with Pyro5.client.Proxy(self.objectUri) as p:
+                    generator = p.generator()
+                    items = []
+                    for item in generator:
+                        items.append(item)
+                        assert p.echo(item) == item, "proxy must remain usable while the stream is pushed"
+                    assert items == ["one", "two", "three", "four", "five"]
+                    assert generator.streamProxy is None
+                    with pytest.raises(StopIteration):
+                        next(generator)
+            config.ITER_STREAM_CREDIT = 2
+            with Pyro5.client.Proxy(self.objectUri) as p:
+                generator = p.generator()
+                assert next(generator) == "one"
+                assert len(self.daemon.streaming_responses) == 1
+                generator.close()
+                assert generator.streamProxy is None
+                assert p.echo(42) == 42
+                time.sleep(0.1)
+                assert len(self.daemon.streaming_responses) == 0, "stream must have been closed on the server"
+                with pytest.raises(StopIteration):
+                    next(generator)
+        finally:
+            config.ITER_STREAM_CREDIT = orig_credit
+
+    def testGeneratorChunked(self):
+        orig_chunk = config.ITER_STREAM_CHUNK
+        try:
+            for chunk in (1, 2, 3, 100):
+                config.ITER_STREAM_CHUNK = chunk
+                with Pyro5.client.Proxy(self.objectUri) as p:
+                    generator = p.generator()
+                    items = []
+                    for item in generator:
+                        items.append(item)
+                        assert p.echo(item) == item, "proxy must remain usable while the stream is fetched"
+                    assert items == ["one", "two", "three", "four", "five"]
+                    assert generator.streamProxy is None
+                    with pytest.raises(StopIteration):
+                        next(generator)
+            config.ITER_STREAM_CHUNK = 2
+            with Pyro5.client.Proxy(self.objectUri) as p:
+                p._pyroPipelined = True
+                generator = p.generator()
+                assert next(generator) == "one"
+                assert generator.streamProxy is p, "a pipelined proxy should fetch the chunks itself"
+                assert list(generator) == ["two", "three", "four", "five"]
+                assert generator.chunk == 2, "the short final chunk should not shrink the chunk size"
+                assert p._pyroConnection is not None
+            with Pyro5.client.Proxy(self.objectUri) as p:
+                generator = p.generator()
+                assert next(generator) == "one"
+                assert len(self.daemon.streaming_responses) == 1
+                generator.close()
+                assert generator.streamProxy is None
+                time.sleep(0.1)
+                assert len(self.daemon.streaming_responses) == 0, "stream must have been closed on the server"
+                with pytest.raises(StopIteration):
+                    next(generator)
+        finally:
+            config.ITER_STREAM_CHUNK = orig_chunk
+
+    def testGeneratorReadAhead(self):
+        orig_readahead = config.ITER_STREAM_AHEAD
+        orig_chunk = config.ITER_STREAM_CHUNK
+        try:
+            config.ITER_STREAM_AHEAD = 2
+            for chunk in (0, 3):
+                config.ITER_STREAM_CHUNK = chunk
+                with Pyro5.client.Proxy(self.objectUri) as p:
+                    assert list(p.generator()) == ["one", "two", "three", "four", "five"]
+                    assert list(p.iterator()) == ["one", "two", "three"]
+        finally:
+            config.ITER_STREAM_AHEAD = orig_readahead
+            config.ITER_STREAM_CHUNK = orig_chunk
+
+    def testChunkedData(self):
+        orig_max_size = config.MAX_MESSAGE_SIZE
+        try:
+            config.MAX_MESSAGE_SIZE = 20000
+            with Pyro5.client.Proxy(self.objectUri) as p:
+                data = Pyro5.protocol.ChunkedData(iter([b"a" * 15000] * 10), frame_size=10000)
+                assert p.chunked_upload("upload", data) == ("upload", 150000)
+                assert p.chunked_upload(data=Pyro5.protocol.ChunkedData(b"b" * 50000), name="kw") == ("kw", 50000)
+                assert p.chunked_upload("skipped", Pyro5.protocol.ChunkedData(b"c" * 50000), True) == ("skipped", 0)
+                result = p.chunked_download(50000)
+                assert isinstance(result, Pyro5.protocol.ChunkedData)
+                assert result.read(10) == b"x" * 10
+                assert len(result.read()) == 49990
+                result = p.chunked_download(50000)
+                assert len(next(iter(result))) == 1000
+                assert p.echo("unread chunks are skipped") == "unread chunks are skipped"
+                p._pyroPipelined = True
+                with pytest.raises(Pyro5.errors.PyroError):
+                    p.chunked_upload("pipelined", Pyro5.protocol.ChunkedData(b"d"))
+        finally:
+            config.MAX_MESSAGE_SIZE = orig_max_size
+
+    def testChunkedDownloadToSlowConsumer(self):
+        # the server must not produce the frames of a chunked result faster than the client reads them
+        obj = Pyro5.server._unpack_weakref(self.daemon.objectsById["something"])
+        config.MULTIPLEX_HIGHWATER = 1024 * 1024
+        try:
+            with Pyro5.client.Proxy(self.objectUri) as p:
+                result = p.chunked_generate(2000)
+                time.sleep(0.5)
+                assert obj.frames_produced < 500, "the server must wait for the client to read the data"
+                with Pyro5.client.Proxy(self.objectUri) as p2:
+                    p2._pyroTimeout = 2
+                    assert p2.multiply(5, 11) == 55
+                assert sum(len(chunk) for chunk in result) == 2000 * 65536
+                assert obj.frames_produced == 2000
+        finally:
+            config.MULTIPLEX_HIGHWATER = 4 * 1024 * 1024
+
     def testGeneratorProxyClose(self):
         p = Pyro5.client.Proxy(self.objectUri)
         generator = p.generator()
@@ -842,6 +1166,92 @@ class TestServerMultiplexNoTimeout(TestServerThreadNoTimeout):
     def testException(self):
         pass
 
+    def testSlowClientDoesntBlockOthers(self):
+        # a client that trickles in its messages must not stall the server for the other clients
+        host, port = self.daemon.locationStr.split(":")
+        sock = Pyro5.socketutil.create_socket(connect=(host, int(port)))
+        conn = Pyro5.socketutil.SocketConnection(sock)
+        ser = Pyro5.serializers.serializers_by_id[Pyro5.serializers.MarshalSerializer.serializer_id]
+        data = ser.dumps({"handshake": "hello", "object": Pyro5.core.DAEMON_NAME})
+        handshake = Pyro5.protocol.SendingMessage(Pyro5.protocol.MSG_CONNECT, 0, 0, ser.serializer_id, data).data
+        ping = Pyro5.protocol.SendingMessage(Pyro5.protocol.MSG_PING, 0, 42, ser.serializer_id, b"x" * 100000).data
+        try:
+            with Pyro5.client.Proxy(self.objectUri) as p:
+                p._pyroTimeout = 2
+                conn.send(handshake[:10])
+                time.sleep(0.05)
+                assert p.multiply(5, 11) == 55
+                conn.send(handshake[10:])
+                Pyro5.protocol.recv_stub(conn, [Pyro5.protocol.MSG_CONNECTOK])
+                parts = [ping[i:i+20000] for i in range(0, len(ping), 20000)]
+                for part in parts[:-1]:
+                    conn.send(part)
+                    time.sleep(0.01)
+                    assert p.multiply(5, 11) == 55
+                conn.send(parts[-1])
+                msg = Pyro5.protocol.recv_stub(conn, [Pyro5.protocol.MSG_PING])
+                assert msg.seq == 42
+                assert msg.data == b"pong"
+        finally:
+            conn.close()
+
+    def testChunkedUploadDoesntBlockOthers(self):
+        # a client that sends the continuation frames of its chunked data slowly must not stall the server either
+        proceed = threading.Event()
+        def frames():
+            yield b"a" * 1000
+            proceed.wait(5)
+            yield b"b" * 1000
+        results = []
+        def upload():
+            with Pyro5.client.Proxy(self.objectUri) as p:
+                results.append(p.chunked_upload("slow", Pyro5.protocol.ChunkedData(frames())))
+        uploader = threading.Thread(target=upload)
+        uploader.start()
+        try:
+            time.sleep(0.2)
+            with Pyro5.client.Proxy(self.objectUri) as p:
+                p._pyroTimeout = 2
+                assert p.multiply(5, 11) == 55
+        finally:
+            proceed.set()
+            uploader.join()
+        assert results == [("slow", 2000)]
+
+    def testSlowConsumerDoesntBlockOthers(self):
+        # a client that doesn't read its (large) reply must not stall the server for the other clients
+        config.MULTIPLEX_HIGHWATER = 1024 * 1024
+        host, port = self.daemon.locationStr.split(":")
+        sock = Pyro5.socketutil.create_socket()
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 65536)
+        sock.connect((host, int(port)))
+        conn = Pyro5.socketutil.SocketConnection(sock)
+        ser = Pyro5.serializers.serializers_by_id[Pyro5.serializers.MarshalSerializer.serializer_id]
+        data = ser.dumps({"handshake": "hello", "object": Pyro5.core.DAEMON_NAME})
+        conn.send(Pyro5.protocol.SendingMessage(Pyro5.protocol.MSG_CONNECT, 0, 0, ser.serializer_id, data).data)
+        Pyro5.protocol.recv_stub(conn, [Pyro5.protocol.MSG_CONNECTOK])
+        size = 10 * 1024 * 1024
+        data = ser.dumpsCall("something", "echo", ("x" * size,), {})
+        conn.send(Pyro5.protocol.SendingMessage(Pyro5.protocol.MSG_INVOKE, 0, 42, ser.serializer_id, data).data)
+        try:
+            time.sleep(0.2)
+            with Pyro5.client.Proxy(self.objectUri) as p:
+                p._pyroTimeout = 2
+                start = time.time()
+                assert p.multiply(5, 11) == 55
+                assert time.time() - start < 0.5
+            servers = [self.daemon.transportServer] + self.daemon.transportServer.reactors
+            slow_connections = [s for server in servers for s in server.sockets if getattr(s, "paused", False)]
+            assert len(slow_connections) == 1, "reading from the slow client must be paused"
+            msg = Pyro5.protocol.recv_stub(conn, [Pyro5.protocol.MSG_RESULT])
+            assert msg.seq == 42
+            assert ser.loads(msg.data) == "x" * size
+            time.sleep(0.1)
+            assert not slow_connections[0].paused
+        finally:
+            conn.close()
+            config.MULTIPLEX_HIGHWATER = 4 * 1024 * 1024
+
 
 class TestMetaAndExpose:
     def testBasic(self):
@@ -883,6 +1293,51 @@ class TestMetaAndExpose:
         assert m["attrs"] == {"prop1", "readonly_prop1"}
         assert m["oneway"] == {"oneway"}
 
+    def testDispatchTable(self):
+        o = MyThingFullExposed("irmen")
+        table = Pyro5.server._get_dispatch_table(o)
+        assert table is Pyro5.server._get_dispatch_table(MyThingFullExposed)
+        methods = Pyro5.server._get_exposed_members(o)["methods"]
+        assert set(table) == methods
+        entry = table["oneway"]
+        assert entry.bind
+        assert not entry.callback
+        assert not entry.processpool
+        assert not entry.coroutine
+        assert not table["staticmethod"].bind
+        assert not table["classmethod"].bind
+        method = Pyro5.server._get_exposed_method(o, "method")
+        assert method.__self__ is o
+        assert method.__func__ is MyThingFullExposed.method
+        assert Pyro5.server._get_exposed_method(o, "staticmethod") is MyThingFullExposed.staticmethod
+        assert Pyro5.server._get_exposed_method(o, "classmethod").__self__ is MyThingFullExposed
+        with pytest.raises(AttributeError):
+            Pyro5.server._get_exposed_method(o, "_private")
+        with pytest.raises(AttributeError):
+            Pyro5.server._get_exposed_method(o, "c_attr")
+        o = MyThingPartlyExposed("irmen")
+        assert set(Pyro5.server._get_dispatch_table(o)) == {"oneway", "exposed"}
+        with pytest.raises(AttributeError):
+            Pyro5.server._get_exposed_method(o, "method")
+        o = MyThingFullExposed("irmen")
+        o.method = Pyro5.server.callback(Pyro5.server.expose(lambda: "instance attribute"))
+        method, entry = Pyro5.server._lookup_exposed_method(o, "method")
+        assert method() == "instance attribute", "an instance attribute takes precedence over the class' method"
+        assert entry.callback
+
+    def testDispatchTableReset(self):
+        @Pyro5.server.expose
+        class Thingy(object):
+            def method1(self):
+                pass
+        with Pyro5.server.Daemon() as daemon:
+            uri = daemon.register(Thingy)
+            assert set(Pyro5.server._get_dispatch_table(Thingy)) == {"method1"}
+            Thingy.method2 = Pyro5.server.expose(lambda self: 2)
+            assert set(Pyro5.server._get_dispatch_table(Thingy)) == {"method1"}, "should come from the cache"
+            daemon.resetMetadataCache(uri.object)
+            assert set(Pyro5.server._get_dispatch_table(Thingy)) == {"method1", "method2"}
+
     def testNotOnlyExposed(self):
         o = MyThingPartlyExposed("irmen")
         m = Pyro5.server._get_exposed_members(o, only_exposed=False)
@@ -1200,6 +1655,147 @@ class TestSimpleServe:
             with pytest.raises(Pyro5.errors.DaemonError):
                 Pyro5.server.serve(objects, daemon=d, use_ns=False, verbose=False)
 
+    @pytest.mark.skipif(not hasattr(os, "fork") or not hasattr(socket, "SO_REUSEPORT"), reason="requires fork and SO_REUSEPORT")
+    def testServePrefork(self):
+        script = """
+import os, sys
+import Pyro5.server
+
+@Pyro5.server.expose
+class PidObject(object):
+    def pid(self):
+        return os.getpid()
+
+Pyro5.server.serve_prefork({PidObject: "pidobject"}, port=int(sys.argv[1]), workers=2, use_ns=False)
+"""
+        def worker_pids():
+            pids = set()
+            for _ in range(30):
+                with Pyro5.client.Proxy("PYRO:pidobject@localhost:%d" % port) as p:
+                    pids.add(p.pid())
+            return pids
+        port = Pyro5.socketutil.find_probably_unused_port()
+        env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.dirname(Pyro5.__file__)))
+        supervisor = subprocess.Popen([sys.executable, "-c", script, str(port)], env=env, stdout=subprocess.PIPE, text=True)
+        try:
+            assert supervisor.stdout.readline().startswith("Object")
+            assert supervisor.stdout.readline().strip() == "uri = PYRO:pidobject@localhost:%d" % port
+            assert "2 worker processes" in supervisor.stdout.readline()
+            pids = worker_pids()
+            assert len(pids) == 2, "connections should be spread over both workers"
+            assert supervisor.pid not in pids
+            crashed = pids.pop()
+            os.kill(crashed, signal.SIGKILL)
+            time.sleep(1.5)
+            new_pids = worker_pids()
+            assert crashed not in new_pids
+            assert len(new_pids) == 2, "the killed worker should have been restarted"
+            supervisor.send_signal(signal.SIGTERM)
+            assert supervisor.wait(10) == 0
+            with pytest.raises(Pyro5.errors.CommunicationError):
+                worker_pids()
+        finally:
+            if supervisor.poll() is None:
+                supervisor.kill()
+            supervisor.stdout.close()
+
+
+class TestOnewayCallExecutor:
+    class FakeDaemon(object):
+        def __init__(self):
+            self.errors = []
+
+        def methodcall_error_handler(self, daemon, client_sock, method, vargs, kwargs, exception):
+            self.errors.append(exception)
+
+    def setup_method(self):
+        self.pyro_daemon = self.FakeDaemon()
+        self.release = threading.Event()
+        self.calls = []
+
+    def wait_call(self, value):
+        self.release.wait(5)
+        self.calls.append(value)
+
+    def wait_stats(self, executor, **expected):
+        for _ in range(100):
+            stats = executor.stats()
+            if all(stats[key] == value for key, value in expected.items()):
+                return stats
+            time.sleep(0.02)
+        return executor.stats()
+
+    def testBoundedWorkers(self):
+        executor = Pyro5.server.OnewayCallExecutor(self.pyro_daemon, 3, 100, "block")
+        try:
+            for i in range(10):
+                executor.submit(self.wait_call, (i,), {}, None)
+            stats = self.wait_stats(executor, busy=3)
+            assert stats["workers"] == 3
+            assert stats["busy"] == 3
+            assert stats["queued"] == 7
+            self.release.set()
+            stats = self.wait_stats(executor, completed=10)
+            assert stats["completed"] == 10
+            assert stats["queued_total"] == 10
+            assert stats["workers"] == 3, "worker threads are reused"
+            assert sorted(self.calls) == list(range(10))
+            executor.submit(lambda: 1 // 0, (), {}, None)
+            self.wait_stats(executor, completed=11)
+            assert isinstance(self.pyro_daemon.errors[0], ZeroDivisionError)
+        finally:
+            executor.shutdown()
+
+    def testOverflowDrop(self):
+        executor = Pyro5.server.OnewayCallExecutor(self.pyro_daemon, 1, 2, "drop")
+        try:
+            for i in range(6):
+                executor.submit(self.wait_call, (i,), {}, None)
+                self.wait_stats(executor, busy=1)
+            stats = executor.stats()
+            assert stats["queued"] == 2
+            assert stats["dropped"] == 3
+            self.release.set()
+            self.wait_stats(executor, completed=3)
+            assert self.calls == [0, 1, 2]
+        finally:
+            executor.shutdown()
+
+    def testOverflowReject(self):
+        executor = Pyro5.server.OnewayCallExecutor(self.pyro_daemon, 1, 1, "reject")
+        try:
+            executor.submit(self.wait_call, (1,), {}, None)
+            self.wait_stats(executor, busy=1)
+            executor.submit(self.wait_call, (2,), {}, None)
+            with pytest.raises(Pyro5.errors.CommunicationError):
+                executor.submit(self.wait_call, (3,), {}, None)
+            assert executor.stats()["rejected"] == 1
+        finally:
+            self.release.set()
+            executor.shutdown()
+
+    def testOverflowBlock(self):
+        executor = Pyro5.server.OnewayCallExecutor(self.pyro_daemon, 1, 1, "block")
+        try:
+            executor.submit(self.wait_call, (1,), {}, None)
+            self.wait_stats(executor, busy=1)
+            executor.submit(self.wait_call, (2,), {}, None)
+            blocked = threading.Thread(target=executor.submit, args=(self.wait_call, (3,), {}, None))
+            blocked.start()
+            blocked.join(0.2)
+            assert blocked.is_alive(), "submit should block while the queue is full"
+            self.release.set()
+            blocked.join(2)
+            assert not blocked.is_alive()
+            self.wait_stats(executor, completed=3)
+            assert self.calls == [1, 2, 3]
+        finally:
+            executor.shutdown()
+
+    def testInvalidOverflow(self):
+        with pytest.raises(ValueError):
+            Pyro5.server.OnewayCallExecutor(self.pyro_daemon, 1, 1, "explode")
+
 
 class TestExposeDecorator:
     # note: the bulk of the tests for the @expose decorator are found in the test_util module
@@ -1289,3 +1885,91 @@ class TestBehaviorDecorator:
         im, ic = TestClass2._pyroInstancing
         assert im == "percall"
         assert ic is float
+
+
+class TestServerAsyncioNoTimeout(TestServerThreadNoTimeout):
+    SERVERTYPE = "asyncio"
+    COMMTIMEOUT = None
+
+
+class TestServerThreadReactorNoTimeout(TestServerThreadNoTimeout):
+    SERVERTYPE = "thread"
+    COMMTIMEOUT = None
+
+    def setup_method(self):
+        config.THREADPOOL_REACTOR = True
+        super().setup_method()
+
+    def teardown_method(self):
+        super().teardown_method()
+        config.THREADPOOL_REACTOR = False
+
+
+class TestServerMultiplexOffloadNoTimeout(TestServerThreadNoTimeout):
+    SERVERTYPE = "multiplex"
+    COMMTIMEOUT = None
+
+    def setup_method(self):
+        config.MULTIPLEX_OFFLOAD = True
+        super().setup_method()
+
+    def teardown_method(self):
+        super().teardown_method()
+        config.MULTIPLEX_OFFLOAD = False
+
+    def testSlowCallDoesntBlockOthers(self):
+        results = []
+
+        def slowcall():
+            with Pyro5.client.Proxy(self.objectUri) as p:
+                results.append(p.delay(0.5))
+        with Pyro5.client.Proxy(self.objectUri) as p:
+            p._pyroBind()
+            slow = threading.Thread(target=slowcall)
+            slow.start()
+            time.sleep(0.1)
+            start = time.time()
+            assert p.multiply(5, 11) == 55
+            assert time.time() - start < 0.3, "other connections must be served while a slow call is running"
+            slow.join()
+        assert results == ["slept 0 seconds"]
+
+    def testRepliesInRequestOrder(self):
+        with Pyro5.client.Proxy(self.objectUri) as p:
+            p._pyroPipelined = True
+            futures = [p._pyroSubmit("delayAndId", 0.01 * (i % 3), i) for i in range(10)]
+            futures.append(p._pyroSubmit("echo", "last"))
+            results = [f.result(5) for f in futures]
+            assert results == ["slept for %d" % i for i in range(10)] + ["last"]
+
+
+class TestServerMultiReactorNoTimeout(TestServerMultiplexNoTimeout):
+    SERVERTYPE = "multiplex"
+    COMMTIMEOUT = None
+
+    def setup_method(self):
+        config.MULTIPLEX_REACTORS = 3
+        super().setup_method()
+
+    def teardown_method(self):
+        super().teardown_method()
+        config.MULTIPLEX_REACTORS = 1
+
+    def testConnectionsDistributed(self):
+        proxies = [Pyro5.client.Proxy(self.objectUri) for _ in range(6)]
+        try:
+            for p in proxies:
+                p._pyroBind()
+            time.sleep(0.1)
+            reactors = self.daemon.transportServer.reactors
+            assert len(reactors) == 3
+            assert [reactor.connection_count for reactor in reactors] == [2, 2, 2]
+            assert self.daemon.transportServer.connection_count == 6
+            assert all(p.multiply(i, 2) == i * 2 for i, p in enumerate(proxies))
+            for p in proxies[:3]:
+                p._pyroRelease()
+            time.sleep(0.1)
+            assert self.daemon.transportServer.connection_count == 3
+        finally:
+            for p in proxies:
+                p._pyroRelease()
@@ -3,13 +3,14 @@ import os
 import platform
 import threading
 import socket
+import selectors
 import time
 import ssl
 import pytest
 import contextlib
 from Pyro5 import config, socketutil, protocol, errors, server, serializers, core
 from Pyro5.svr_threads import SocketServer_Threadpool
-from Pyro5.svr_multiplex import SocketServer_Multiplex
+from Pyro5.svr_multiplex import SocketServer_Multiplex, MultiplexConnection
 
 
 # determine ipv6 capability
@@ -178,6 +179,16 @@ class TestSocketutil:
         with pytest.raises(ValueError):
             socketutil.create_socket(bind=('::1', 12345), connect=('::1', 1234))
 
+    @pytest.mark.skipif(not hasattr(socket, "SO_REUSEPORT"), reason="requires SO_REUSEPORT")
+    def testCreateReuseportSockets(self):
+        s1 = socketutil.create_socket(bind=('127.0.0.1', 0), reuseport=True)
+        port = s1.getsockname()[1]
+        s2 = socketutil.create_socket(bind=('127.0.0.1', port), reuseport=True)
+        assert s2.getsockname() == s1.getsockname()
+        assert s2.getsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT) != 0
+        s1.close()
+        s2.close()
+
     def testCreateBoundUnixSockets(self):
         if not hasattr(socket, "AF_UNIX"):
             pytest.skip("no unix domain sockets capability")
@@ -216,6 +227,119 @@ class TestSocketutil:
         ss.close()
         cs.close()
 
+    def testSendBuffers(self):
+        ss = socketutil.create_socket(bind=("localhost", 0))
+        port = ss.getsockname()[1]
+        cs = socketutil.create_socket(connect=("localhost", port), timeout=2)
+        a = ss.accept()
+        buffers = [b"header", bytearray(b"-annotation-"), memoryview(b"payload" * 100000), b""]
+        total = b"".join(buffers)
+        sender = threading.Thread(target=socketutil.send_data, args=(cs, buffers))
+        sender.start()
+        data = socketutil.receive_data(a[0], len(total))
+        sender.join()
+        assert total == data
+        socketutil.send_data(cs, [b"single"])
+        assert b"single" == socketutil.receive_data(a[0], 6)
+        a[0].close()
+        ss.close()
+        cs.close()
+
+    def testBufferedConnectionRecv(self):
+        s1, s2 = socket.socketpair()
+        conn = socketutil.SocketConnection(s2)
+        try:
+            s1.sendall(b"header" + b"payload" + b"next")
+            assert b"header" == conn.recv(6)
+            assert conn.buffered == 11      # the rest was read into the buffer by the same system call
+            assert b"payload" == conn.recv(7)
+            s1.sendall(b"more")
+            assert b"nextmore" == conn.recv(8)
+            assert conn.buffered == 0
+            big = bytes(range(256)) * 1000
+            s1.sendall(b"small" + big[:100])
+            assert b"small" == conn.recv(5)
+            sender = threading.Thread(target=s1.sendall, args=(big[100:],))
+            sender.start()
+            assert big == conn.recv(len(big))
+            sender.join()
+            s1.sendall(b"abc")
+            s1.close()
+            with pytest.raises(errors.ConnectionClosedError) as x:
+                conn.recv(10)
+            assert b"abc" == x.value.partialData
+        finally:
+            conn.close()
+
+    def testReceiveDataInto(self):
+        s1, s2 = socket.socketpair()
+        try:
+            s1.sendall(b"0123456789")
+            buf = bytearray(20)
+            assert socketutil.receive_data_into(s2, memoryview(buf), 4) >= 4
+            assert buf.startswith(b"0123")
+            s1.close()
+            with pytest.raises(errors.ConnectionClosedError):
+                socketutil.receive_data_into(s2, memoryview(bytearray(100)))
+        finally:
+            s2.close()
+
+    def testReceiveDataPartial(self):
+        for waitall in (True, False):
+            s1, s2 = socket.socketpair()
+            try:
+                socketutil.USE_MSG_WAITALL = waitall
+                s1.sendall(b"0123456789")
+                data = socketutil.receive_data(s2, 5)
+                assert type(data) is bytearray
+                assert b"01234" == data
+                s1.close()
+                with pytest.raises(errors.ConnectionClosedError) as x:
+                    socketutil.receive_data(s2, 100)
+                assert b"56789" == x.value.partialData
+            finally:
+                socketutil.USE_MSG_WAITALL = hasattr(socket, "MSG_WAITALL") and platform.system() != "Windows"
+                s2.close()
+
+    def testNonblockingSendReceive(self):
+        s1, s2 = socket.socketpair()
+        try:
+            s1.setblocking(False)
+            s2.setblocking(False)
+            data = bytes(range(256)) * 20000     # way more than fits in the socket buffers
+            result = []
+            receiver = threading.Thread(target=lambda: result.append(socketutil.receive_data(s2, len(data))))
+            receiver.start()
+            socketutil.send_data(s1, [b"", data[:1000], memoryview(data)[1000:]])
+            receiver.join()
+            assert data == result[0]
+        finally:
+            s1.close()
+            s2.close()
+
+    def testWaitForSocketTimeout(self):
+        s1, s2 = socket.socketpair()
+        try:
+            start = time.time()
+            with pytest.raises(errors.TimeoutError):
+                socketutil._wait_for_socket(s2, selectors.EVENT_READ, time.monotonic() + 0.2)
+            assert 0.1 < time.time() - start < 2.0
+            with pytest.raises(errors.TimeoutError):
+                socketutil._wait_for_socket(s2, selectors.EVENT_READ, time.monotonic() - 1)
+            socketutil._wait_for_socket(s2, selectors.EVENT_WRITE, time.monotonic() + 0.2)
+            s1.sendall(b"x")
+            socketutil._wait_for_socket(s2, selectors.EVENT_READ, None)
+        finally:
+            s1.close()
+            s2.close()
+
+    def testCoalesceBuffers(self):
+        big = b"x" * 100000
+        result = socketutil._coalesce_small_buffers([b"a", b"bc", big, b"d", b"e"])
+        assert [b"abc", big, b"de"] == result
+        assert result[1] is big
+        assert [b"a"] == socketutil._coalesce_small_buffers([b"a"])
+
     def testSendUnix(self):
         if not hasattr(socket, "AF_UNIX"):
             pytest.skip("no unix domain sockets capability")
@@ -377,6 +501,36 @@ class TestSocketServer:
         serv.close()
         assert serv.sock is None
 
+    def testServer_multiplex_pauses_reading(self):
+        # reading pauses while too many received requests are waiting to be processed
+        orig_highwater = config.MULTIPLEX_HIGHWATER
+        config.MULTIPLEX_HIGHWATER = 1000
+        serv = SocketServer_Multiplex()
+        sock, client = socket.socketpair()
+        try:
+            sock.setblocking(False)
+            conn = MultiplexConnection(sock, serv)
+            serv.selector.register(conn, selectors.EVENT_READ, serv)
+            serv._selector_thread = threading.get_ident()
+            for seq in range(4):
+                client.sendall(protocol.SendingMessage(protocol.MSG_PING, 0, seq, 0, b"x" * 400).data)
+            time.sleep(0.05)
+            assert conn.receive_messages() == 4
+            assert conn.requests_size > 1000
+            serv._updateInterest(conn)
+            assert conn.paused
+            assert serv.selector.get_key(conn).events == 0
+            conn.next_request()
+            assert conn.paused
+            conn.next_request()
+            assert not conn.paused, "reading should resume when the queued requests are below the limit again"
+            assert serv.selector.get_key(conn).events == selectors.EVENT_READ
+        finally:
+            config.MULTIPLEX_HIGHWATER = orig_highwater
+            client.close()
+            sock.close()
+            serv.close()
+
 
 class TestServerDOS_multiplex:
     def setup_method(self):
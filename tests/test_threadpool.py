@@ -6,8 +6,9 @@ Pyro - Python Remote Objects.  Copyright by Irmen de Jong (irmen@razorvine.net).
 
 import time
 import random
+import threading
 import pytest
-from Pyro5 import socketutil, server
+from Pyro5 import socketutil, server, client, errors
 from Pyro5.svr_threads import Pool, PoolError, NoFreeWorkersError, SocketServer_Threadpool
 from Pyro5 import config
 
@@ -54,6 +55,7 @@ class TestThreadPool:
     def testAllBusy(self):
         try:
             config.COMMTIMEOUT = 0.2
+            config.THREADPOOL_QUEUE_SIZE = 0
             with Pool() as p:
                 for i in range(config.THREADPOOL_SIZE):
                     p.process(SlowJob(str(i+1)))
@@ -73,6 +75,8 @@ class TestThreadPool:
         assert len(p.idle) == 0
 
     def testScaling(self):
+        config.THREADPOOL_QUEUE_SIZE = 0
+        config.THREADPOOL_IDLETIMEOUT = 0.1
         with Pool() as p:
             for i in range(config.THREADPOOL_SIZE_MIN-1):
                 p.process(Job("x"))
@@ -92,8 +96,57 @@ class TestThreadPool:
             # wait till jobs are done and check ending situation
             time.sleep(JOB_TIME*1.5)
             assert len(p.busy) == 0
+            # the idle workers above the minimum are stopped after the idle timeout
+            time.sleep(0.3)
             assert len(p.idle) == config.THREADPOOL_SIZE_MIN
 
+    def testQueue(self):
+        config.THREADPOOL_QUEUE_SIZE = 3
+        with Pool() as p:
+            for i in range(config.THREADPOOL_SIZE):
+                p.process(Job(str(i + 1)))
+            assert len(p.busy) == config.THREADPOOL_SIZE
+            for i in range(config.THREADPOOL_QUEUE_SIZE):
+                p.process(Job("queued"))
+            with pytest.raises(NoFreeWorkersError):
+                p.process(Job("toomuch"))
+            stats = p.stats()
+            assert stats["queued"] == 3
+            assert stats["queued_max"] == 3
+            assert stats["rejected"] == 1
+            # the queued jobs are picked up by the workers when they're done with their job
+            time.sleep(JOB_TIME*2.5)
+            stats = p.stats()
+            assert stats["queued"] == 0
+            assert stats["queued_total"] == 3
+            assert stats["expired"] == 0
+            assert stats["busy"] == 0
+            assert 0 < stats["wait_avg"] <= stats["wait_max"] < JOB_TIME*2
+
+    def testQueueWait(self):
+        class ExpiringJob(SlowJob):
+            expired_called = False
+
+            def expired(self):
+                self.expired_called = True
+
+        config.THREADPOOL_QUEUE_SIZE = 2
+        config.THREADPOOL_QUEUE_WAIT = 0.1
+        with Pool() as p:
+            for i in range(config.THREADPOOL_SIZE):
+                p.process(SlowJob(str(i + 1)))
+            job1 = ExpiringJob("expires")
+            job2 = ExpiringJob("waits")
+            p.process(job1)
+            p.process(job2, max_wait=0)
+            time.sleep(0.2)
+            p.expire()
+            assert job1.expired_called
+            assert not job2.expired_called
+            stats = p.stats()
+            assert stats["expired"] == 1
+            assert stats["queued"] == 1
+
 
 class ServerCallback(server.Daemon):
     def __init__(self):
@@ -117,6 +170,7 @@ class TestThreadPoolServer:
         config.THREADPOOL_SIZE = 1
         config.POLLTIMEOUT = 0.5
         config.COMMTIMEOUT = 0.5
+        config.THREADPOOL_QUEUE_SIZE = 0
 
     def teardown_method(self):
         config.reset()
@@ -142,3 +196,75 @@ class TestThreadPoolServer:
             csock2.close()
             serv.shutdown()
 
+    def testServerQueuedConnection(self):
+        config.THREADPOOL_QUEUE_SIZE = 5
+        config.THREADPOOL_QUEUE_WAIT = 0.5
+        config.COMMTIMEOUT = 2
+        daemon = server.Daemon(port=0)
+        uri = daemon.register(ReactorTestObject, "queuetest")
+        daemonthread = threading.Thread(target=daemon.requestLoop, daemon=True)
+        daemonthread.start()
+        try:
+            results = []
+
+            def call():
+                with client.Proxy(uri) as p:
+                    results.append(p.echo("queued"))
+            with client.Proxy(uri) as p1:
+                assert p1.echo("first") == "first"
+                # the only worker is occupied by p1's connection, a second connection has to wait in the queue
+                caller = threading.Thread(target=call)
+                caller.start()
+                time.sleep(0.2)
+                assert daemon.transportServer.pool.stats()["queued"] == 1
+            caller.join()
+            assert results == ["queued"]
+            # a connection that waits too long is refused
+            with client.Proxy(uri) as p1:
+                assert p1.echo("first") == "first"
+                with pytest.raises(errors.CommunicationError) as x:
+                    with client.Proxy(uri) as p2:
+                        p2._pyroBind()
+                assert "no free workers" in str(x.value)
+            assert daemon.transportServer.pool.stats()["expired"] == 1
+        finally:
+            daemon.shutdown()
+            daemonthread.join()
+
+    def testServerReactorMoreClientsThanWorkers(self):
+        config.THREADPOOL_REACTOR = True
+        config.COMMTIMEOUT = 2
+        daemon = server.Daemon(port=0)
+        uri = daemon.register(ReactorTestObject, "reactortest")
+        daemonthread = threading.Thread(target=daemon.requestLoop, daemon=True)
+        daemonthread.start()
+        proxies = [client.Proxy(uri) for _ in range(5)]
+        try:
+            # with a single worker thread, all 5 connections are still accepted and served
+            for round in range(3):
+                for i, p in enumerate(proxies):
+                    assert p.echo(i) == i
+            assert daemon.transportServer.pool.num_workers() == 1
+            results = []
+
+            def call(proxy):
+                proxy._pyroClaimOwnership()
+                results.append(proxy.echo("thread"))
+            threads = [threading.Thread(target=call, args=(p,)) for p in proxies]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            assert results == ["thread"] * 5
+        finally:
+            for p in proxies:
+                p._pyroClaimOwnership()
+                p._pyroRelease()
+            daemon.shutdown()
+            daemonthread.join()
+
+
+@server.expose
+class ReactorTestObject(object):
+    def echo(self, arg):
+        return arg